@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Migration script to add job leases (processing_jobs.lease_expires_at and the worker_leases table)
+"""
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, inspect, text
+from config import Config
+from app.models import db, WorkerLease
+
+def add_job_lease_columns():
+    """Add the lease_expires_at column to processing_jobs and create worker_leases"""
+
+    # A bare engine: create_app() queries the models, which fails until the schema is migrated
+    engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
+
+    print("Adding job lease tracking...")
+
+    try:
+        inspector = inspect(engine)
+        if 'worker_leases' not in inspector.get_table_names():
+            WorkerLease.__table__.create(engine)
+            print("✅ Created worker_leases table")
+
+        # Check if the column already exists
+        columns = inspector.get_columns('processing_jobs')
+        column_names = [col['name'] for col in columns]
+
+        if 'lease_expires_at' in column_names:
+            print("✅ lease_expires_at column already exists!")
+            return
+
+        # Add the column using raw SQL (MySQL/SQLite compatible)
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE processing_jobs ADD COLUMN lease_expires_at DATETIME NULL"))
+            conn.execute(text(
+                "CREATE INDEX ix_processing_jobs_lease_expires_at ON processing_jobs (lease_expires_at)"
+            ))
+
+        print("✅ Successfully added lease_expires_at column to processing_jobs")
+
+    except Exception as e:
+        print(f"❌ Error adding columns: {str(e)}")
+        # Try to create all tables if the table doesn't exist at all
+        try:
+            db.metadata.create_all(engine)
+            print("✅ Created all tables including the new columns")
+        except Exception as e2:
+            print(f"❌ Error creating tables: {str(e2)}")
+            sys.exit(1)
+
+def main():
+    """Main function"""
+    try:
+        add_job_lease_columns()
+        print("\n🎉 Database migration completed successfully!")
+    except Exception as e:
+        print(f"\n❌ Error during migration: {str(e)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Migration script to add near-duplicate columns to Document table
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, inspect, text
+from config import Config
+from app.models import db, Document
+
+def add_near_duplicate_columns():
+    """Add near_duplicate_of_id and near_duplicate_score columns to Document table"""
+
+    # A bare engine: create_app() queries the models, which fails until the schema is migrated
+    engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
+
+    print("Adding near-duplicate columns to Document table...")
+
+    try:
+        # Check if the columns already exist
+        inspector = inspect(engine)
+        columns = inspector.get_columns('document')
+        column_names = [col['name'] for col in columns]
+
+        if 'near_duplicate_of_id' in column_names:
+            print("✅ near-duplicate columns already exist!")
+            return
+
+        # Add the columns using raw SQL (MySQL/SQLite compatible)
+        with engine.begin() as conn:
+            # Check database type for syntax compatibility
+            if 'mysql' in str(engine.url):
+                # MySQL syntax
+                conn.execute(text("ALTER TABLE document ADD COLUMN near_duplicate_of_id INT NULL"))
+                conn.execute(text("ALTER TABLE document ADD COLUMN near_duplicate_score FLOAT NULL"))
+                conn.execute(text(
+                    "ALTER TABLE document ADD CONSTRAINT fk_document_near_duplicate_of "
+                    "FOREIGN KEY (near_duplicate_of_id) REFERENCES document (id) ON DELETE SET NULL"
+                ))
+            else:
+                # SQLite syntax
+                conn.execute(text("ALTER TABLE document ADD COLUMN near_duplicate_of_id INTEGER REFERENCES document (id)"))
+                conn.execute(text("ALTER TABLE document ADD COLUMN near_duplicate_score FLOAT"))
+
+        print("✅ Successfully added near-duplicate columns to Document table")
+        print("ℹ️  Run 'flask near-duplicates rebuild' to index documents processed so far")
+
+    except Exception as e:
+        print(f"❌ Error adding columns: {str(e)}")
+        # Try to create all tables if the table doesn't exist at all
+        try:
+            db.metadata.create_all(engine)
+            print("✅ Created all tables including the new columns")
+        except Exception as e2:
+            print(f"❌ Error creating tables: {str(e2)}")
+            sys.exit(1)
+
+def main():
+    """Main function"""
+    try:
+        add_near_duplicate_columns()
+        print("\n🎉 Database migration completed successfully!")
+    except Exception as e:
+        print(f"\n❌ Error during migration: {str(e)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Migration script to add fair scheduling columns (processing_jobs.lane and users.queue_weight)
+"""
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, inspect, text
+from config import Config
+from app.models import db
+
+def add_queue_lane_columns():
+    """Add the lane column to processing_jobs and the queue_weight column to users"""
+
+    # A bare engine: create_app() queries the models, which fails until the schema is migrated
+    engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
+
+    print("Adding fair scheduling columns...")
+
+    try:
+        inspector = inspect(engine)
+        job_columns = [col['name'] for col in inspector.get_columns('processing_jobs')]
+        user_columns = [col['name'] for col in inspector.get_columns('users')]
+
+        if 'lane' in job_columns and 'queue_weight' in user_columns:
+            print("✅ fair scheduling columns already exist!")
+            return
+
+        # Add the columns using raw SQL (MySQL/SQLite compatible); existing jobs go to the batch lane
+        with engine.begin() as conn:
+            if 'lane' not in job_columns:
+                conn.execute(text("ALTER TABLE processing_jobs ADD COLUMN lane INTEGER NOT NULL DEFAULT 2"))
+                conn.execute(text(
+                    "CREATE INDEX ix_processing_jobs_status_lane ON processing_jobs (status, lane)"
+                ))
+            if 'queue_weight' not in user_columns:
+                conn.execute(text("ALTER TABLE users ADD COLUMN queue_weight INTEGER NOT NULL DEFAULT 1"))
+
+        print("✅ Successfully added fair scheduling columns")
+        print("ℹ️  Run 'flask queue weight <username> <weight>' to give a user a larger share")
+
+    except Exception as e:
+        print(f"❌ Error adding columns: {str(e)}")
+        # Try to create all tables if the table doesn't exist at all
+        try:
+            db.metadata.create_all(engine)
+            print("✅ Created all tables including the new columns")
+        except Exception as e2:
+            print(f"❌ Error creating tables: {str(e2)}")
+            sys.exit(1)
+
+def main():
+    """Main function"""
+    try:
+        add_queue_lane_columns()
+        print("\n🎉 Database migration completed successfully!")
+    except Exception as e:
+        print(f"\n❌ Error during migration: {str(e)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
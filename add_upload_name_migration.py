@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Migration script to add academi_upload_name column to Document table
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, inspect, text
+from config import Config
+from app.models import db, Document
+
+def add_upload_name_column():
+    """Add academi_upload_name column to Document table"""
+
+    # A bare engine: create_app() queries the models, which fails until the schema is migrated
+    engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
+
+    print("Adding academi_upload_name column to Document table...")
+
+    try:
+        # Check if the column already exists
+        inspector = inspect(engine)
+        columns = inspector.get_columns('document')
+        column_names = [col['name'] for col in columns]
+
+        if 'academi_upload_name' in column_names:
+            print("✅ academi_upload_name column already exists!")
+            return
+
+        # Add the column using raw SQL (MySQL/SQLite compatible)
+        with engine.begin() as conn:
+            # Check database type for syntax compatibility
+            if 'mysql' in str(engine.url):
+                # MySQL syntax
+                conn.execute(text("ALTER TABLE document ADD COLUMN academi_upload_name VARCHAR(255) NULL"))
+            else:
+                # SQLite syntax
+                conn.execute(text("ALTER TABLE document ADD COLUMN academi_upload_name VARCHAR(255)"))
+            conn.execute(text("CREATE INDEX ix_document_academi_upload_name ON document (academi_upload_name)"))
+
+        print("✅ Successfully added academi_upload_name column to Document table")
+
+    except Exception as e:
+        print(f"❌ Error adding column: {str(e)}")
+        # Try to create all tables if the table doesn't exist at all
+        try:
+            db.metadata.create_all(engine)
+            print("✅ Created all tables including the new column")
+        except Exception as e2:
+            print(f"❌ Error creating tables: {str(e2)}")
+            sys.exit(1)
+
+def main():
+    """Main function"""
+    try:
+        add_upload_name_column()
+        print("\n🎉 Database migration completed successfully!")
+    except Exception as e:
+        print(f"\n❌ Error during migration: {str(e)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
+
@@ -1,12 +1,13 @@
 import os
-from flask import Flask
+import time
+from flask import Flask, g
 from config import Config
 from datetime import datetime
 
 # Import extensions
 from .extensions import db, login_manager, migrate
 
-def create_app(config_class=Config):
+def create_app(config_class=Config, seed_admin=True):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
@@ -29,6 +30,10 @@ def create_app(config_class=Config):
     app.register_blueprint(main_bp)
     app.register_blueprint(admin_bp, url_prefix='/admin')
 
+    # Register CLI commands
+    from .cli import register_cli
+    register_cli(app)
+
     # Import models here to avoid circular imports
     from .models import User, Document
 
@@ -50,6 +55,21 @@ def create_app(config_class=Config):
 
     app.jinja_env.filters['filesizeformat'] = filesizeformat
 
+    # Request latency, to see whether request handling stays flat while jobs run
+    from .metrics import metrics, export_process_metrics
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.monotonic()
+
+    @app.teardown_request
+    def observe_request_latency(exc=None):
+        started = g.pop('request_started', None)
+        if started is not None:
+            metrics.observe('http.request_seconds', time.monotonic() - started)
+        # Each web process exports its own metrics for /admin/metrics to aggregate
+        export_process_metrics(app.config.get('METRICS_DIR'), app.config.get('METRICS_EXPORT_INTERVAL', 30))
+
     # Inject current time into templates
     @app.context_processor
     def inject_now():
@@ -63,8 +83,10 @@ def create_app(config_class=Config):
         admin_email = app.config.get('ADMIN_EMAIL')
         admin_password = app.config.get('ADMIN_PASSWORD')
         
-        if admin_email and admin_password:
-            admin = User.query.filter_by(email=admin_email).first()
+        # Workers leave the admin account to the web app, which has its credentials
+        if seed_admin and admin_email and admin_password:
+            # Select only the id so an older schema (before a migration adds a column) still boots
+            admin = db.session.query(User.id).filter_by(email=admin_email).first()
             if not admin:
                 admin = User(
                     username='admin',
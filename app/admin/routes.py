@@ -1,11 +1,14 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, abort
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, jsonify, current_app
 from flask_login import login_required, current_user
 
 # Create blueprint
 bp = Blueprint('admin', __name__)
 
 # Import models after creating the blueprint to avoid circular imports
-from ..models import User, db
+from ..models import User, Document, db
+from ..metrics import metrics, export_process_metrics, aggregate
+from ..dedup import reuse_results
+from ..job_queue import cancel
 
 @bp.before_request
 @login_required
@@ -77,3 +80,34 @@ def delete_user(user_id):
     
     flash(f'User {user.username} has been deleted.', 'success')
     return redirect(url_for('admin.dashboard'))
+
+@bp.route('/metrics')
+@login_required
+def processing_metrics():
+    """Processing metrics (WebDriver round trips, timings, ...) of every worker and web process as JSON"""
+    directory = current_app.config.get('METRICS_DIR')
+    if not directory:
+        return jsonify(metrics.snapshot())
+    export_process_metrics(directory)
+    # Leave out processes that missed several exports: they were restarted or have stopped
+    max_age = 3 * current_app.config.get('METRICS_EXPORT_INTERVAL', 30)
+    return jsonify(aggregate(directory, max_age=max_age))
+
+@bp.route('/document/<int:document_id>/accept_near_duplicate', methods=['POST'])
+@login_required
+def accept_near_duplicate(document_id):
+    """Complete a flagged resubmission with its near-duplicate's report, skipping academi.cx"""
+    document = Document.query.get_or_404(document_id)
+    source = document.near_duplicate_of
+
+    if document.status != 'processing' or source is None or source.status != 'completed' or not source.report_path:
+        flash('No completed near-duplicate report is available for this document.', 'warning')
+        return redirect(url_for('main.view_document', document_id=document_id))
+
+    cancel(document.id)
+    reuse_results(document, source)
+    db.session.commit()
+    metrics.incr('near_duplicates_accepted_total')
+
+    flash(f'Results of "{source.original_filename}" have been applied to this document.', 'success')
+    return redirect(url_for('main.view_document', document_id=document_id))
@@ -0,0 +1,120 @@
+"""
+Autoscaler - grows and shrinks a worker's processing slots with the queue
+
+Every slot holds a browser, so the number of slots decides both how fast the
+queue drains and how much memory the worker keeps in warm Chromes. The
+controller sizes the slots to clear the current backlog within
+``target_drain`` seconds, judged by how long recent jobs took, and keeps
+them between ``min_slots`` and ``max_slots``. It grows at once when the
+queue builds up, but shrinks one slot at a time and only after the backlog
+has stayed small for ``scale_down_after`` seconds. Slots are never added
+beyond what the host's available memory can hold, and one is dropped when
+memory runs below the reserve.
+"""
+
+import math
+import time
+
+from .metrics import metrics
+
+MEMINFO = '/proc/meminfo'
+
+
+def available_memory():
+    """Memory the host can still give to new processes in bytes, or None outside Linux"""
+    try:
+        with open(MEMINFO) as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class Autoscaler:
+    """Decides how many processing slots a worker should run.
+
+    ``slot_memory`` is what one more slot (a job and its browser) is expected
+    to use and ``memory_reserve`` what must stay free on the host, both in
+    bytes. Jobs take ``default_latency`` seconds until recent ones say
+    otherwise.
+    """
+
+    def __init__(self, min_slots=1, max_slots=4, target_drain=300, scale_down_after=300,
+                 slot_memory=600 * 1024 * 1024, memory_reserve=512 * 1024 * 1024,
+                 default_latency=60, clock=time.monotonic):
+        if min_slots < 1 or max_slots < min_slots:
+            raise ValueError("Autoscaler needs 1 <= min_slots <= max_slots")
+        self.min_slots = min_slots
+        self.max_slots = max_slots
+        self.target_drain = target_drain
+        self.scale_down_after = scale_down_after
+        self.slot_memory = slot_memory
+        self.memory_reserve = memory_reserve
+        self.default_latency = default_latency
+        self._clock = clock
+        self._shrink_since = None
+
+    def clamp(self, slots):
+        return max(self.min_slots, min(self.max_slots, slots))
+
+    def wanted(self, queued, running, latency):
+        """Slots needed to finish the queued and running jobs within ``target_drain`` seconds"""
+        work = (queued + running) * (latency or self.default_latency)
+        return self.clamp(math.ceil(work / self.target_drain))
+
+    def decide(self, slots, queued, running, latency=None, memory=None):
+        """Return the number of slots to run now, exporting the decision as metrics"""
+        wanted = self.wanted(queued, running, latency)
+        decision, reason = slots, None
+
+        if memory is not None and memory < self.memory_reserve:
+            decision, reason = slots - 1, 'memory'
+        elif wanted > slots:
+            if memory is not None:
+                room = (memory - self.memory_reserve) // self.slot_memory
+                wanted = min(wanted, slots + room)
+            decision, reason = wanted, 'queue'
+        elif wanted < slots:
+            now = self._clock()
+            if self._shrink_since is None:
+                self._shrink_since = now
+            elif now - self._shrink_since >= self.scale_down_after:
+                # Every further step waits out the delay again
+                self._shrink_since = now
+                decision, reason = slots - 1, 'idle'
+        if wanted >= slots:
+            self._shrink_since = None
+        decision = self.clamp(decision)
+
+        metrics.set_gauge('autoscaler.queue_depth', queued)
+        metrics.set_gauge('autoscaler.wanted_slots', wanted)
+        metrics.set_gauge('autoscaler.slots', decision)
+        if latency is not None:
+            metrics.set_gauge('autoscaler.job_seconds', latency)
+        if memory is not None:
+            metrics.set_gauge('autoscaler.available_memory_mb', memory / (1024 * 1024))
+        if decision != slots:
+            direction = 'up' if decision > slots else 'down'
+            metrics.incr(f'autoscaler.scaled_{direction}')
+            metrics.incr(f'autoscaler.scaled_{direction}.{reason}')
+            print(f"📈 Scaling {direction} from {slots} to {decision} slot(s) "
+                  f"({reason}: {queued} queued, {running} running)")
+        return decision
+
+
+def from_config(config):
+    """Build the autoscaler configured for a worker, or None when its bounds leave nothing to scale"""
+    min_slots = config.get('WORKER_MIN_CONCURRENCY', 1)
+    max_slots = config.get('WORKER_MAX_CONCURRENCY', 4)
+    if max_slots <= min_slots:
+        return None
+    return Autoscaler(
+        min_slots=min_slots,
+        max_slots=max_slots,
+        target_drain=config.get('AUTOSCALE_TARGET_DRAIN', 300),
+        scale_down_after=config.get('AUTOSCALE_SCALE_DOWN_AFTER', 300),
+        slot_memory=config.get('AUTOSCALE_SLOT_MEMORY_MB', 600) * 1024 * 1024,
+        memory_reserve=config.get('AUTOSCALE_MEMORY_RESERVE_MB', 512) * 1024 * 1024
+    )
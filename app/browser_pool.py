@@ -0,0 +1,232 @@
+"""
+Browser Pool - keeps logged-in academi.cx sessions (WebDriver or HTTP) warm between jobs
+"""
+
+import threading
+import time
+
+from .metrics import metrics
+
+
+class PooledSession:
+    """A client (WebDriver or HTTP session) owned by a BrowserPool"""
+
+    def __init__(self, client):
+        self.client = client
+        self.created_at = time.time()
+        self.jobs = 0
+
+    @property
+    def age(self):
+        return time.time() - self.created_at
+
+
+class RecyclePolicy:
+    """Decides when a pooled session has served long enough and must be replaced.
+
+    A session is recycled after ``max_jobs`` jobs, ``max_age`` seconds, or once
+    ``memory(client)`` reports at least ``max_rss`` bytes; 0 disables a limit.
+    """
+
+    def __init__(self, max_jobs=0, max_age=0, max_rss=0, memory=None):
+        self.max_jobs = max_jobs
+        self.max_age = max_age
+        self.max_rss = max_rss
+        self.memory = memory
+
+    def reason(self, session):
+        """Why ``session`` should be recycled, or None to keep it"""
+        if self.max_jobs and session.jobs >= self.max_jobs:
+            return 'jobs'
+        if self.max_age and session.age >= self.max_age:
+            return 'age'
+        if self.max_rss and self.memory is not None:
+            used = self.memory(session.client)
+            if used:
+                metrics.observe('browser_pool.session_rss_mb', used / (1024 * 1024))
+                if used >= self.max_rss:
+                    return 'memory'
+        return None
+
+
+class BrowserPool:
+    """Process-wide pool of reusable, already logged-in sessions.
+
+    ``factory`` must return a ready-to-use client (e.g. a browser started and
+    logged in). ``health_check`` receives a client and returns False when the
+    session should be thrown away and replaced; ``closer`` shuts a client down
+    and defaults to calling its ``quit()``. An optional ``recycle`` policy
+    replaces sessions that have served long enough, using ``recycler`` (which
+    defaults to ``closer``) to shut them down; the next checkout simply gets a
+    fresh session.
+    """
+
+    def __init__(self, factory, size=2, health_check=None, closer=None, recycle=None, recycler=None):
+        if size < 1:
+            raise ValueError("Browser pool size must be at least 1")
+        self.size = size
+        self._factory = factory
+        self._health_check = health_check
+        self._closer = closer or (lambda client: client.quit())
+        self._recycle_policy = recycle
+        self._recycler = recycler or self._closer
+        # Used as a stack so the most recently returned (hottest) session goes out first
+        self._idle = []
+        self._cond = threading.Condition()
+        self._created = 0
+        self._closed = False
+
+    @property
+    def created(self):
+        """Number of live sessions (idle and checked out)"""
+        return self._created
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    def _is_healthy(self, session):
+        if self._health_check is None:
+            return True
+        try:
+            return bool(self._health_check(session.client))
+        except Exception:
+            return False
+
+    def _discard(self, session, closer=None):
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+        try:
+            (closer or self._closer)(session.client)
+        except Exception as e:
+            print(f"⚠️  Error closing pooled session: {str(e)}")
+
+    def _recycle_reason(self, session):
+        if self._recycle_policy is None:
+            return None
+        try:
+            return self._recycle_policy.reason(session)
+        except Exception as e:
+            print(f"⚠️  Could not apply recycle policy: {str(e)}")
+            return None
+
+    def _recycle(self, session, reason):
+        print(f"♻️  Recycling pooled session after {session.jobs} job(s), "
+              f"{session.age:.0f}s ({reason} limit)")
+        metrics.incr('browser_pool.recycled')
+        metrics.incr(f'browser_pool.recycled.{reason}')
+        self._discard(session, self._recycler)
+
+    def _start_session(self):
+        try:
+            client = self._factory()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+        print(f"🌐 Started pooled session ({self._created}/{self.size})")
+        return PooledSession(client)
+
+    def checkout(self, timeout=None):
+        """Take a healthy session out of the pool, starting one if there is room.
+
+        Blocks for up to ``timeout`` seconds (forever when None) while every
+        session is in use, then raises TimeoutError.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            session = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Browser pool is closed")
+                    if self._idle:
+                        session = self._idle.pop()
+                        break
+                    if self._created < self.size:
+                        self._created += 1
+                        break
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No browser session became available in time")
+                    self._cond.wait(remaining)
+
+            if session is None:
+                return self._start_session()
+            if not self._is_healthy(session):
+                print("♻️  Pooled session failed health check, recycling...")
+                self._discard(session)
+                continue
+            reason = self._recycle_reason(session)
+            if reason is None:
+                return session
+            self._recycle(session, reason)
+
+    def checkin(self, session, broken=False):
+        """Return a session to the pool; broken or unhealthy sessions are quit"""
+        session.jobs += 1
+        if broken or self._closed or not self._is_healthy(session):
+            self._discard(session)
+            return
+        reason = self._recycle_reason(session)
+        if reason is not None:
+            self._recycle(session, reason)
+            return
+        with self._cond:
+            if self._created > self.size:
+                # The pool was shrunk while this session was out
+                surplus = True
+            else:
+                surplus = False
+                self._idle.append(session)
+                self._cond.notify()
+        if surplus:
+            self._discard(session)
+
+    def resize(self, size):
+        """Change how many sessions the pool may hold, quitting idle ones above the new size.
+
+        Sessions still checked out above the new size are quit on checkin.
+        """
+        if size < 1:
+            raise ValueError("Browser pool size must be at least 1")
+        with self._cond:
+            self.size = size
+            surplus = []
+            while self._idle and self._created - len(surplus) > size:
+                # Coldest sessions first
+                surplus.append(self._idle.pop(0))
+            self._cond.notify_all()
+        for session in surplus:
+            self._discard(session)
+        return len(surplus)
+
+    def session(self, timeout=None):
+        """Context manager that checks a session out and always returns it"""
+        return _SessionLease(self, timeout)
+
+    def close(self):
+        """Quit every idle session; sessions still checked out are quit on checkin"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for session in idle:
+            self._discard(session)
+
+
+class _SessionLease:
+    def __init__(self, pool, timeout):
+        self.pool = pool
+        self.timeout = timeout
+        self.session = None
+
+    def __enter__(self):
+        self.session = self.pool.checkout(timeout=self.timeout)
+        return self.session
+
+    def __exit__(self, exc_type, exc, tb):
+        self.pool.checkin(self.session, broken=exc_type is not None)
+        return False
@@ -0,0 +1,112 @@
+"""
+Browser Reaper - kill Chrome and chromedriver processes whose owning job is gone
+
+Every Chrome the processor starts carries an ``--potplag-owner=<pid>``
+switch naming the process that started it, and its chromedriver is tracked
+in that process. A browser is an orphan when:
+
+- its owner process has exited (a worker that crashed or was killed),
+- its chromedriver has exited and left Chrome running, or
+- it belongs to this process but no driver object refers to it any more
+  (a job died or ``cleanup()`` failed before ``driver.quit()``).
+
+Browsers younger than the grace period are left alone, since one that is
+still starting up is not tracked yet.
+"""
+
+import os
+import threading
+import weakref
+
+from .metrics import metrics
+from .utils import process_tree
+
+OWNER_SWITCH = '--potplag-owner'
+
+_tracked = {}
+_tracked_lock = threading.Lock()
+
+
+def owner_argument():
+    """Chrome switch marking a browser as owned by this process"""
+    return f'{OWNER_SWITCH}={os.getpid()}'
+
+
+def track(driver, pid):
+    """Remember which driver object owns the chromedriver ``pid``"""
+    with _tracked_lock:
+        _tracked[pid] = weakref.ref(driver)
+
+
+def _owner(arguments):
+    for argument in arguments:
+        if argument.startswith(OWNER_SWITCH + '='):
+            try:
+                return int(argument.split('=', 1)[1])
+            except ValueError:
+                return None
+    return None
+
+
+def _has_live_driver(pid):
+    with _tracked_lock:
+        reference = _tracked.get(pid)
+        return reference is not None and reference() is not None
+
+
+def find_orphans(grace=60, processes=None):
+    """Return ``(root pid, reason)`` for every orphaned browser.
+
+    The root is the browser's chromedriver when it is still running, so
+    killing the root's process tree removes the whole browser.
+    """
+    if processes is None:
+        processes = process_tree.all_processes()
+    me = os.getpid()
+    orphans = []
+    for pid, info in processes.items():
+        if info['state'] == 'Z':
+            continue
+        owner = _owner(process_tree.cmdline(pid))
+        if owner is None:
+            continue
+        parent = processes.get(info['ppid'])
+        if parent is not None and _owner(process_tree.cmdline(parent['pid'])) is not None:
+            # A child of a marked Chrome, removed together with it
+            continue
+        if process_tree.age(info) < grace:
+            continue
+
+        driver_pid = parent['pid'] if parent and parent['comm'].startswith('chromedriver') else None
+        if not process_tree.is_alive(owner):
+            reason = 'owner exited'
+        elif driver_pid is None:
+            reason = 'chromedriver exited'
+        elif owner == me and not _has_live_driver(driver_pid):
+            reason = 'driver released without quit'
+        else:
+            continue
+        orphans.append((driver_pid or pid, reason))
+    return orphans
+
+
+def reap(grace=60, dry_run=False):
+    """Kill every orphaned browser; returns the number of processes killed (or found on a dry run)"""
+    processes = process_tree.all_processes()
+    killed = 0
+    for root, reason in find_orphans(grace, processes):
+        tree = 1 + len(process_tree.descendants(root, processes))
+        print(f"🪓 {'Found' if dry_run else 'Reaping'} orphaned browser {root} "
+              f"({tree} process(es), {reason})")
+        killed += tree if dry_run else process_tree.kill_tree(root, processes)
+    if dry_run:
+        return killed
+
+    # Forget drivers whose chromedriver is gone
+    with _tracked_lock:
+        for pid in [pid for pid in _tracked if not process_tree.is_alive(pid)]:
+            del _tracked[pid]
+
+    metrics.incr('browser_reaper.reaped', killed)
+    metrics.set_gauge('browser_reaper.last_reaped', killed)
+    return killed
@@ -0,0 +1,182 @@
+"""
+Browser Tabs - serve several documents at once from tabs of one logged-in Chrome
+
+Every tab is handed out as its own driver object sharing the browser's
+WebDriver session. A tab driver switches the browser to its window before
+each command, under a per-browser lock, so commands of different tabs never
+interleave while the long waits between them (uploads, report generation,
+downloads) overlap. Tabs share the browser's cookies and cache, so a new tab
+is logged in as soon as it opens. Per-target settings (CDP commands such as
+the lean profile's blocked URLs) are not shared, so ``setup_tab`` applies
+them to every tab opened after the first.
+
+Browsers are shared between the threads of one process only. Under
+WORKER_ISOLATION=process every slot is a child process with a pool of its
+own, so tabs need WORKER_ISOLATION=thread.
+"""
+
+import copy
+import threading
+
+from selenium.webdriver.remote.command import Command
+
+from .metrics import metrics
+
+
+class SharedBrowser:
+    """One Chrome process whose windows are handed out as separate tab drivers"""
+
+    def __init__(self, manager, driver, max_tabs):
+        self.manager = manager
+        self.driver = driver
+        self.max_tabs = max_tabs
+        self.handles = set()
+        # Retired browsers get no new tabs and quit once their last tab closes
+        self.retired = False
+        # Serialises WebDriver commands so each runs in the tab that issued it
+        self.lock = threading.RLock()
+        # Chrome's download directory is browser-wide, so tabs download one report at a time
+        self.download_lock = threading.Lock()
+        self._current = driver.current_window_handle
+        # The window the browser started (and logged in) with becomes the first tab
+        self._spare = self._current
+
+    @property
+    def full(self):
+        return self.retired or len(self.handles) >= self.max_tabs
+
+    def retire(self):
+        self.retired = True
+
+    def open_tab(self):
+        with self.lock:
+            if self._spare is not None:
+                handle, self._spare = self._spare, None
+                new = False
+            else:
+                handle = self.driver.execute(Command.NEW_WINDOW, {'type': 'tab'})['value']['handle']
+                new = True
+            self.handles.add(handle)
+        tab = self._tab_driver(handle)
+        if new and self.manager.setup_tab is not None:
+            # The first window was set up with the browser itself
+            self.manager.setup_tab(tab)
+        return tab
+
+    def _switch(self, handle):
+        if self._current != handle:
+            self.driver.execute(Command.SWITCH_TO_WINDOW, {'handle': handle})
+            self._current = handle
+
+    def _tab_driver(self, handle):
+        execute = self.driver.execute
+        tab = copy.copy(self.driver)
+        tab.browser = self
+        tab.window_handle = handle
+        tab.download_lock = self.download_lock
+        tab.command_count = 0
+        if hasattr(tab, '_switch_to'):
+            tab._switch_to = type(tab._switch_to)(tab)
+
+        def tab_execute(driver_command, params=None):
+            with self.lock:
+                self._switch(handle)
+                tab.command_count += 1
+                return execute(driver_command, params)
+
+        tab.execute = tab_execute
+        return tab
+
+    def close_tab(self, handle):
+        """Close one tab; returns True when it was the last one and the browser should quit"""
+        with self.lock:
+            self.handles.discard(handle)
+            if not self.handles:
+                return True
+            try:
+                self._switch(handle)
+                self.driver.execute(Command.CLOSE)
+            except Exception as e:
+                # A browser that cannot close a tab gets no new ones
+                self.retired = True
+                print(f"⚠️  Could not close browser tab: {str(e)}")
+            self._current = None
+            return False
+
+
+class BrowserTabs:
+    """Opens tabs in running browsers up to ``max_tabs`` each, starting browsers as needed.
+
+    ``start_browser`` returns a new WebDriver that is already logged in;
+    ``setup_tab``, when given, is called with every tab opened in a new
+    window of a browser.
+    """
+
+    def __init__(self, start_browser, max_tabs, setup_tab=None):
+        self.max_tabs = max_tabs
+        self.setup_tab = setup_tab
+        self._start_browser = start_browser
+        self._browsers = []
+        self._lock = threading.Lock()
+
+    @property
+    def browsers(self):
+        return len(self._browsers)
+
+    @property
+    def tabs(self):
+        return sum(len(browser.handles) for browser in self._browsers)
+
+    def _export(self):
+        metrics.set_gauge('browser.browsers_open', self.browsers)
+        metrics.set_gauge('browser.tabs_open', self.tabs)
+
+    def open_tab(self):
+        with self._lock:
+            browser = next((browser for browser in self._browsers if not browser.full), None)
+            if browser is None:
+                browser = SharedBrowser(self, self._start_browser(), self.max_tabs)
+                self._browsers.append(browser)
+                print(f"🌐 Started shared browser {len(self._browsers)} ({self.max_tabs} tab(s) max)")
+            tab = browser.open_tab()
+            self._export()
+            return tab
+
+    def close_tab(self, tab):
+        browser = tab.browser
+        with self._lock:
+            last = browser.close_tab(tab.window_handle)
+            if last:
+                self._browsers.remove(browser)
+            self._export()
+        if last:
+            browser.driver.quit()
+
+
+def is_tab(driver):
+    return getattr(driver, 'browser', None) is not None
+
+
+def close_tab(tab):
+    tab.browser.manager.close_tab(tab)
+
+
+def browser_pid(driver):
+    """Pid of the chromedriver a driver (or tab) talks to; Chrome runs below it"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+_browser_tabs = None
+_browser_tabs_lock = threading.Lock()
+
+
+def get_browser_tabs(start_browser, max_tabs, setup_tab=None):
+    """Return the process-wide tab manager"""
+    global _browser_tabs
+    with _browser_tabs_lock:
+        if _browser_tabs is None:
+            _browser_tabs = BrowserTabs(start_browser, max_tabs, setup_tab)
+        return _browser_tabs
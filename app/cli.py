@@ -0,0 +1,115 @@
+"""
+Flask CLI commands for operating the document processing side of the app
+"""
+
+import click
+from flask.cli import AppGroup
+
+browser_cli = AppGroup('browser', help='Browser automation tools.')
+
+
+@browser_cli.command('page-load')
+@click.option('--url', default=None, help='Page to load (defaults to the academi.cx login page).')
+@click.option('--runs', default=3, show_default=True, help='Page loads per profile.')
+def page_load(url, runs):
+    """Compare page-load time with the lean browser profile off and on."""
+    from .document_processor import compare_page_load, ACADEMI_LOGIN_URL
+
+    results = compare_page_load(url or ACADEMI_LOGIN_URL, runs)
+    for profile, timing in results.items():
+        click.echo(
+            f"{profile:>8}: DOMContentLoaded {timing['dom_content_loaded']} ms, "
+            f"load {timing['load']} ms, transferred {timing['transfer_kb']} KB"
+        )
+
+
+@browser_cli.command('reap')
+@click.option('--grace', default=None, type=int, help='Leave browsers younger than this many seconds alone.')
+@click.option('--dry-run', is_flag=True, help='Only list orphaned browsers.')
+def reap_browsers(grace, dry_run):
+    """Kill Chrome and chromedriver processes whose owning job is gone."""
+    from flask import current_app
+    from .browser_reaper import reap
+
+    if grace is None:
+        grace = current_app.config.get('BROWSER_REAPER_GRACE', 120)
+    count = reap(grace, dry_run=dry_run)
+    click.echo(f"{'Found' if dry_run else 'Reaped'} {count} orphaned browser process(es)")
+
+
+@click.command('worker')
+@click.option('--concurrency', type=int, default=None, help='Jobs run at once, without autoscaling (defaults to autoscaling from WORKER_CONCURRENCY).')
+def run_worker(concurrency):
+    """Run a processing worker that claims queued documents."""
+    from .worker import main
+    main(concurrency=concurrency)
+
+
+near_duplicate_cli = AppGroup('near-duplicates', help='Local near-duplicate index.')
+
+
+@near_duplicate_cli.command('rebuild')
+def rebuild_near_duplicates():
+    """Rebuild the near-duplicate index from every completed document."""
+    from .models import Document
+    from .near_duplicate import get_index, signature_for_file
+
+    def entries():
+        for document in Document.query.filter_by(status='completed').yield_per(100):
+            signature = signature_for_file(document.path)
+            if signature is not None:
+                yield document.id, signature
+
+    index = get_index()
+    index.rebuild(entries())
+    click.echo(f"Indexed {len(index)} document(s) into {index.path}")
+
+
+local_similarity_cli = AppGroup('local-similarity', help='Offline similarity engine.')
+
+
+@local_similarity_cli.command('merge')
+def merge_local_similarity():
+    """Merge recent additions into the fingerprint index and drop removed documents."""
+    from .local_similarity import get_index
+
+    index = get_index()
+    index.merge()
+    click.echo(f"Merged the fingerprint index in {index.directory}")
+
+
+queue_cli = AppGroup('queue', help='Processing job queue.')
+
+
+@queue_cli.command('status')
+def queue_status():
+    """Show how many jobs wait in each priority lane."""
+    from .job_queue import queue_depth, running_count
+    from .scheduler import LANE_NAMES
+
+    for lane, name in sorted(LANE_NAMES.items()):
+        click.echo(f"{name:>11}: {queue_depth(lane)} queued")
+    click.echo(f"{'running':>11}: {running_count()}")
+
+
+@queue_cli.command('weight')
+@click.argument('username')
+@click.argument('weight', type=click.IntRange(min=1))
+def set_queue_weight(username, weight):
+    """Give a user WEIGHT times the default share of the workers."""
+    from .models import db, User
+
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"No user named {username}")
+    user.queue_weight = weight
+    db.session.commit()
+    click.echo(f"{username} now gets a queue weight of {weight}")
+
+
+def register_cli(app):
+    app.cli.add_command(browser_cli)
+    app.cli.add_command(near_duplicate_cli)
+    app.cli.add_command(local_similarity_cli)
+    app.cli.add_command(queue_cli)
+    app.cli.add_command(run_worker)
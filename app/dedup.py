@@ -0,0 +1,79 @@
+"""
+Deduplication - recognise resubmitted files so they can reuse an earlier report
+
+Only a user's own earlier documents are reused. The same bytes uploaded by
+someone else are a copy: that document is checked like any other and
+flagged as a near-duplicate of the original.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from flask import current_app
+
+from .models import Document
+from .metrics import metrics
+
+CHUNK_SIZE = 64 * 1024
+
+
+def save_and_hash(file, path, chunk_size=CHUNK_SIZE):
+    """Stream an uploaded file to ``path`` and return the SHA-256 hex digest of its bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'wb') as out:
+        while True:
+            chunk = file.stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
+
+def find_exact_duplicate(content_sha256, user_id, exclude_id=None):
+    """Most recent completed document of ``user_id`` with the same bytes whose report is still on disk"""
+    query = Document.query.filter(
+        Document.content_sha256 == content_sha256,
+        Document.user_id == user_id,
+        Document.status == 'completed',
+        Document.report_path.isnot(None)
+    )
+    if exclude_id is not None:
+        query = query.filter(Document.id != exclude_id)
+
+    for candidate in query.order_by(Document.processed_at.desc()).limit(5):
+        if os.path.exists(os.path.join(current_app.config['DOWNLOAD_DIR'], candidate.report_path)):
+            return candidate
+    return None
+
+
+def flag_exact_copy(document):
+    """Flag ``document`` as a copy of the earliest document another user uploaded with the same bytes.
+
+    Sets ``near_duplicate_of_id`` and a ``near_duplicate_score`` of 1.0 and
+    returns the original, or None when no other user uploaded these bytes.
+    """
+    original = Document.query.filter(
+        Document.content_sha256 == document.content_sha256,
+        Document.user_id != document.user_id,
+        Document.id != document.id
+    ).order_by(Document.uploaded_at).first()
+    if original is not None:
+        document.near_duplicate_of_id = original.id
+        document.near_duplicate_score = 1.0
+        metrics.incr('uploads_copied_total')
+    return original
+
+
+def reuse_results(document, source):
+    """Complete ``document`` with the report and scores of an identical earlier document"""
+    document.status = 'completed'
+    document.processed_at = datetime.utcnow()
+    document.similarity_score = source.similarity_score
+    document.ai_percentage = source.ai_percentage
+    document.word_count = source.word_count
+    document.report_path = source.report_path
+    document.error_message = None
+
+    from .near_duplicate import index_document
+    index_document(document)
@@ -0,0 +1,35 @@
+"""
+Dispatch - run blocking work from request handlers without stalling gevent
+
+Under gunicorn's gevent worker every request is a greenlet on one OS thread,
+so work that never yields (text extraction, hashing, fcntl file locks)
+stalls every other request of that worker while it runs. ``run_blocking``
+hands such work to gevent's pool of real OS threads and suspends only the
+calling greenlet. Without gevent it simply calls the function.
+
+Only pass work that needs no app context or database session: those are
+bound to the request's greenlet. Browser work never runs in the web tier;
+it is queued for worker processes (see job_queue.py and supervisor.py).
+"""
+
+from .metrics import metrics
+
+
+def gevent_active():
+    """Whether this process runs under gevent's monkey patching"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+
+def run_blocking(func, *args, **kwargs):
+    """Call ``func`` on a native thread when running under gevent and return its result"""
+    if not gevent_active():
+        return func(*args, **kwargs)
+
+    import gevent
+    metrics.incr('dispatch.blocking_calls')
+    with metrics.timed('dispatch.blocking_seconds'):
+        return gevent.get_hub().threadpool.apply(func, args, kwargs)
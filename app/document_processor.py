@@ -5,47 +5,249 @@ Document Processing Module - Integrates main.py logic with Flask app
 
 import time
 import os
-import glob
-import uuid
 import shutil
+import tempfile
 import csv
+import threading
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
 # Import Flask components for database access
 from .models import db, Document
-from . import create_app
+from .worker import get_worker_app
+from .processor_backend import (
+    ProcessorBackend, ACADEMI_LOGIN_URL, ACADEMI_DASHBOARD_URL, _config, _as_bool,
+    create_processor, get_processor_class, get_session_pool
+)
+from .session_store import to_cdp_cookie
+from .browser_tabs import get_browser_tabs, is_tab, close_tab, browser_pid
+from .browser_reaper import owner_argument, track
+from .metrics import metrics
+from .utils.download_watch import wait_for_download as watch_for_download
+from .utils.process_tree import tree_rss
+
+# Resources the lean browser profile never fetches
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+]
+
+# In-page helpers so reading the dashboard or driving the results modal costs
+# one WebDriver round trip instead of one per element lookup and click
+_FIND_JS = """
+const isVisible = el => !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+const byText = (root, label) => Array.from(root.querySelectorAll('button, a'))
+    .find(el => el.textContent.includes(label));
+const closeModals = () => {
+    Array.from(document.querySelectorAll(
+        "button.close, span.close, [data-dismiss='modal'], [data-bs-dismiss='modal']"
+    )).filter(isVisible).forEach(el => el.click());
+    document.body.dispatchEvent(new KeyboardEvent('keydown', {key: 'Escape', bubbles: true}));
+};
+"""
+
+SNAPSHOT_JS = _FIND_JS + """
+const rows = Array.from(document.querySelectorAll('tr')).map(tr => ({
+    text: tr.innerText,
+    ready: !!byText(tr, 'View Results')
+}));
+const modal = Array.from(document.querySelectorAll('.modal')).find(isVisible);
+return {
+    url: location.href,
+    rows: rows,
+    modal_open: !!modal,
+    download_ready: isVisible(byText(document, 'Download similarity report'))
+};
+"""
+
+OPEN_RESULTS_JS = _FIND_JS + """
+closeModals();
+const row = Array.from(document.querySelectorAll('tr')).find(tr => tr.innerText.includes(arguments[0]));
+const button = row && byText(row, 'View Results');
+if (!button) { return false; }
+button.click();
+return true;
+"""
+
+CLICK_DOWNLOAD_JS = _FIND_JS + """
+const button = byText(document, 'Download similarity report');
+if (!isVisible(button)) { return false; }
+button.click();
+return true;
+"""
+
+CLOSE_MODALS_JS = _FIND_JS + "closeModals(); return true;"
+
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+
+def resolve_chromedriver():
+    """Resolve the chromedriver binary once per process and reuse it for every browser.
+
+    CHROMEDRIVER_PATH pins an explicit binary. With CHROMEDRIVER_OFFLINE set no
+    network call is ever made: the pinned path or a chromedriver on PATH must
+    exist. Otherwise webdriver-manager resolves (and caches) it on first use.
+    """
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path:
+            return _chromedriver_path
+
+        configured = _config('CHROMEDRIVER_PATH')
+        offline = _config('CHROMEDRIVER_OFFLINE', False, _as_bool)
+
+        if configured:
+            if not os.access(configured, os.X_OK):
+                raise RuntimeError(f"CHROMEDRIVER_PATH is not an executable file: {configured}")
+            path = configured
+        elif offline:
+            path = shutil.which('chromedriver')
+            if not path:
+                raise RuntimeError("CHROMEDRIVER_OFFLINE is set but no chromedriver was found; set CHROMEDRIVER_PATH")
+        else:
+            print("🔧 Resolving chromedriver with webdriver-manager...")
+            path = ChromeDriverManager().install()
+
+        print(f"🔧 Using chromedriver: {path}")
+        _chromedriver_path = path
+        return path
+
+
+def instrument_driver(driver):
+    """Count every WebDriver command (one HTTP round trip to chromedriver each)"""
+    execute = driver.execute
+    driver.command_count = 0
 
-class DocumentProcessor:
+    def counting_execute(driver_command, params=None):
+        driver.command_count += 1
+        metrics.incr('webdriver_commands_total')
+        return execute(driver_command, params)
+
+    driver.execute = counting_execute
+    return driver
+
+
+def block_lean_urls(driver):
+    """Block LEAN_BLOCKED_URLS in the browser target (window or tab) the driver talks to"""
+    # Fonts have no content setting, so block them (and any stray images) at the network layer
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS})
+
+
+class DocumentProcessor(ProcessorBackend):
     """Handles document processing via academi.cx using Selenium"""
 
+    name = 'selenium'
+    pool_size_setting = 'BROWSER_POOL_SIZE'
+
     def __init__(self, email=None, password=None):
         """Initialize the document processor"""
-        self.email = email or os.getenv('ACADEMI_EMAIL')
-        self.password = password or os.getenv('ACADEMI_PASSWORD')
-        
-        if not self.email or not self.password:
-            raise ValueError("ACADEMI_EMAIL and ACADEMI_PASSWORD environment variables must be set")
-        self.download_dir = os.path.abspath("downloads")
+        super().__init__(email, password)
         self.driver = None
 
-        # Ensure download directory exists
-        os.makedirs(self.download_dir, exist_ok=True)
-
-    def setup_driver(self):
-        """Setup Chrome WebDriver with download preferences"""
+    @classmethod
+    def prepare(cls):
+        # Resolve the driver binary up front rather than on a job's hot path
+        resolve_chromedriver()
+
+    @classmethod
+    def start_session(cls):
+        """Start a Chrome session that is already logged into academi.cx.
+
+        With BROWSER_TABS_PER_BROWSER above 1 the session is a tab of a shared
+        browser, and a new Chrome is only started once every browser is full.
+        """
+        max_tabs = _config('BROWSER_TABS_PER_BROWSER', 1, int)
+        if max_tabs > 1:
+            return get_browser_tabs(cls.start_browser, max_tabs, cls.setup_tab).open_tab()
+        return cls.start_browser()
+
+    @classmethod
+    def setup_tab(cls, tab):
+        """Apply the per-tab CDP settings of the browser profile to a newly opened tab"""
+        if _config('BROWSER_LEAN_PROFILE', False, _as_bool):
+            block_lean_urls(tab)
+
+    @classmethod
+    def start_browser(cls):
+        """Start a Chrome process and log it into academi.cx"""
+        processor = cls()
+        processor.setup_driver()
+        if not processor.login():
+            processor.driver.quit()
+            raise RuntimeError("Failed to login to academi.cx")
+        return processor.driver
+
+    @classmethod
+    def session_is_healthy(cls, driver):
+        """A pooled browser is usable while it responds and is still logged in"""
+        driver.execute_script("return document.readyState")
+        return "/login" not in driver.current_url
+
+    @classmethod
+    def close_session(cls, driver):
+        if is_tab(driver):
+            close_tab(driver)
+        else:
+            driver.quit()
+
+    @classmethod
+    def recycle_session(cls, driver):
+        # A recycled tab retires its whole browser, which quits once its other tabs are done
+        if is_tab(driver):
+            driver.browser.retire()
+        cls.close_session(driver)
+
+    @classmethod
+    def session_memory(cls, driver):
+        """Resident memory of chromedriver and every Chrome process it started"""
+        pid = browser_pid(driver)
+        return tree_rss(pid) if pid else None
+
+    def attach(self, driver):
+        self.driver = driver
+
+    @contextmanager
+    def count_commands(self, operation):
+        """Record how many WebDriver round trips an operation took"""
+        before = getattr(self.driver, 'command_count', 0)
+        try:
+            yield
+        finally:
+            metrics.observe(f'webdriver_commands.{operation}',
+                            getattr(self.driver, 'command_count', 0) - before)
+
+    @property
+    def connected(self):
+        return self.driver is not None
+
+    def setup_driver(self, lean=None):
+        """Setup Chrome WebDriver with download preferences.
+
+        ``lean`` switches on the lean page-load profile (no images or fonts,
+        eager page loads, optional domain allowlist); it defaults to the
+        BROWSER_LEAN_PROFILE setting.
+        """
+        if lean is None:
+            lean = _config('BROWSER_LEAN_PROFILE', False, _as_bool)
         options = webdriver.ChromeOptions()
 
         # Always run in headless mode to avoid showing browser window
         options.add_argument('--headless')
         options.add_argument('--no-sandbox')
         options.add_argument('--disable-dev-shm-usage')
+        # Lets the reaper tell which process owns this browser
+        options.add_argument(owner_argument())
 
         # Download preferences
         prefs = {
@@ -54,6 +256,9 @@ class DocumentProcessor:
             "plugins.always_open_pdf_externally": True,
             "download.directory_upgrade": True
         }
+        if lean:
+            prefs["profile.managed_default_content_settings.images"] = 2
+            self._apply_lean_options(options)
         options.add_experimental_option("prefs", prefs)
 
         # Additional options for stability
@@ -61,21 +266,88 @@ class DocumentProcessor:
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
 
-        self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+        self.driver = webdriver.Chrome(service=Service(resolve_chromedriver()), options=options)
+        instrument_driver(self.driver)
+        track(self.driver, browser_pid(self.driver))
 
         # Execute script to remove webdriver property
         self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
 
+        if lean:
+            block_lean_urls(self.driver)
+
         return self.driver
 
+    def _apply_lean_options(self, options):
+        """Chrome options for the lean profile"""
+        # Hand control back at DOMContentLoaded; the automation only needs the DOM
+        options.page_load_strategy = 'eager'
+        options.add_argument('--blink-settings=imagesEnabled=false')
+
+        allowed_domains = _config('BROWSER_ALLOWED_DOMAINS', [], lambda v: [d.strip() for d in v.split(',') if d.strip()])
+        if allowed_domains:
+            # Every host outside the allowlist fails DNS resolution, so third-party scripts never load
+            excludes = ', '.join(f"EXCLUDE {domain}, EXCLUDE *.{domain}" for domain in allowed_domains)
+            options.add_argument(f"--host-resolver-rules=MAP * ~NOTFOUND, {excludes}")
+
+    def measure_page_load(self, url=ACADEMI_LOGIN_URL, runs=3):
+        """Load ``url`` several times and return average Navigation Timing figures in ms"""
+        totals = {'dom_content_loaded': 0.0, 'load': 0.0, 'transfer_kb': 0.0}
+        for _ in range(runs):
+            self.driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+            self.driver.get(url)
+            timing = self.driver.execute_script(
+                "const n = performance.getEntriesByType('navigation')[0];"
+                "const r = performance.getEntriesByType('resource');"
+                "return {dcl: n.domContentLoadedEventEnd, load: n.loadEventEnd,"
+                " bytes: n.transferSize + r.reduce((sum, e) => sum + (e.transferSize || 0), 0)};"
+            )
+            totals['dom_content_loaded'] += timing['dcl']
+            totals['load'] += timing['load']
+            totals['transfer_kb'] += timing['bytes'] / 1024.0
+        return {key: round(value / runs, 1) for key, value in totals.items()}
+
+    def restore_session(self):
+        """Load saved academi.cx cookies into the browser before the first navigation"""
+        cookies = self.cookie_store.load()
+        if not cookies:
+            return False
+
+        try:
+            print("🍪 Restoring saved academi.cx session...")
+            self.driver.execute_cdp_cmd('Network.setCookies', {
+                'cookies': [to_cdp_cookie(cookie) for cookie in cookies]
+            })
+            self.driver.get(ACADEMI_DASHBOARD_URL)
+
+            if "/dashboard" in self.driver.current_url and "/login" not in self.driver.current_url:
+                print("✅ Saved session is still valid, skipping login")
+                return True
+        except Exception as e:
+            print(f"⚠️  Could not restore saved session: {str(e)}")
+
+        print("ℹ️  Saved session has expired, logging in again")
+        self.cookie_store.clear()
+        return False
+
+    def save_session(self):
+        """Persist the authenticated cookie jar for later jobs and restarts"""
+        try:
+            self.cookie_store.save(self.driver.get_cookies())
+        except Exception as e:
+            print(f"⚠️  Could not save session cookies: {str(e)}")
+
     def login(self):
-        """Login to academi.cx"""
+        """Login to academi.cx, reusing the saved session when it is still valid"""
         if not self.driver:
             self.setup_driver()
 
+        if self.restore_session():
+            return True
+
         try:
             print("🔐 Logging into academi.cx...")
-            self.driver.get("https://academi.cx/login/")
+            self.driver.get(ACADEMI_LOGIN_URL)
 
             # Wait for email field and enter credentials
             WebDriverWait(self.driver, 20).until(
@@ -96,343 +368,191 @@ class DocumentProcessor:
             )
 
             print("✅ Successfully logged in!")
+            self.save_session()
             return True
 
         except Exception as e:
             print(f"❌ Login failed: {str(e)}")
             return False
 
-    def wait_for_download(self, timeout=180):
-        """Wait until download completes"""
-        end_time = time.time() + timeout
-        while time.time() < end_time:
-            if not glob.glob(os.path.join(self.download_dir, "*.crdownload")):
-                return True
-            time.sleep(1)
-        raise TimeoutError("Download did not complete in time.")
-
-    def generate_unique_name(self, original_name):
-        """Generate unique filename"""
-        base, ext = os.path.splitext(original_name)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_id = str(uuid.uuid4())[:8]
-        return f"{base}_{timestamp}_{unique_id}{ext}"
-
-    def upload_document(self, file_path):
-        """Upload a document to academi.cx"""
-        unique_path = None
+    def open_dashboard(self):
+        """Make sure the browser is on the academi.cx dashboard"""
+        if "/dashboard" not in self.driver.current_url:
+            self.driver.get(ACADEMI_DASHBOARD_URL)
+
+    def job_download_dir(self):
+        """Create a private download directory for one report and point Chrome at it.
+
+        It lives inside the permanent download directory so the finished file
+        can be moved into place with an atomic rename.
+        """
+        job_dir = tempfile.mkdtemp(prefix='.job-', dir=self.download_dir)
+        self.driver.execute_cdp_cmd('Browser.setDownloadBehavior', {
+            'behavior': 'allow',
+            'downloadPath': job_dir
+        })
+        return job_dir
+
+    def wait_for_download(self, timeout=180, directory=None):
+        """Wait until a download finishes and return the path of the new file"""
+        return watch_for_download(directory or self.download_dir, timeout=timeout)
+
+    def wait_for_upload(self, uploaded_name, timeout=None):
+        """Wait until academi.cx lists the uploaded document in the dashboard table.
+
+        Returns True once the row shows up, False if ``timeout`` runs out first.
+        The time actually spent waiting is kept in ``self.last_upload_wait``.
+        """
+        if timeout is None:
+            timeout = _config('UPLOAD_COMPLETE_TIMEOUT', 50, int)
+        row_xpath = f"//tr[contains(., '{uploaded_name}')]"
+        started = time.monotonic()
         try:
-            print(f"📤 Uploading document: {os.path.basename(file_path)}")
-
-            # Generate unique name to avoid conflicts
-            unique_name = self.generate_unique_name(os.path.basename(file_path))
-            unique_path = os.path.join(os.path.dirname(file_path), unique_name)
-
-            # Copy file with unique name
-            shutil.copy(file_path, unique_path)
-
-            # Find and interact with file input
-            upload_input = WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='file']"))
+            WebDriverWait(self.driver, timeout, poll_frequency=0.5).until(
+                lambda driver: driver.find_elements(By.XPATH, row_xpath)
             )
+            return True
+        except TimeoutException:
+            return False
+        finally:
+            self.last_upload_wait = time.monotonic() - started
 
-            upload_input.send_keys(os.path.abspath(unique_path))
-
-            # Try to submit (some sites auto-submit, others need manual submit)
+    def upload_document(self, file_path, unique_name=None):
+        """Upload a document to academi.cx"""
+        with self.count_commands('upload_document'):
+            unique_path = None
             try:
-                submit_btn = self.driver.find_element(By.CSS_SELECTOR, "button[type='submit'], input[type='submit']")
-                submit_btn.click()
-            except:
-                print("ℹ️  Upload appears to be automatic or submit button not found")
-
-            # Wait for upload to complete on academi.cx
-            print("⏳ Waiting 50 seconds for document to fully upload to academi.cx...")
-            time.sleep(50)
-            
-            print("✅ Document uploaded successfully!")
-            return unique_name
+                print(f"📤 Uploading document: {os.path.basename(file_path)}")
 
-        except Exception as e:
-            print(f"❌ Upload failed: {str(e)}")
-            return None
-        finally:
-            # Clean up temporary file with retry mechanism
-            if unique_path and os.path.exists(unique_path):
-                max_retries = 5
-                for attempt in range(max_retries):
-                    try:
-                        os.remove(unique_path)
-                        print(f"🧹 Cleaned up temporary file: {unique_name}")
-                        break
-                    except PermissionError:
-                        if attempt < max_retries - 1:
-                            print(f"⏳ File locked, retrying cleanup in {attempt + 1} seconds...")
-                            time.sleep(attempt + 1)
-                        else:
-                            print(f"⚠️  Could not delete temporary file: {unique_path}")
-                    except Exception as cleanup_error:
-                        print(f"⚠️  Error during cleanup: {str(cleanup_error)}")
-                        break
+                # Generate unique name to avoid conflicts
+                unique_name = unique_name or self.generate_unique_name(os.path.basename(file_path))
+                unique_path = os.path.join(os.path.dirname(file_path), unique_name)
 
-    def extract_results(self, document_name):
-        """Extract plagiarism results by downloading PDF report only"""
-        try:
-            print("📊 Looking for results...")
+                # Copy file with unique name
+                shutil.copy(file_path, unique_path)
 
-            # First, close any open modals that might be blocking clicks
-            print("🗂️  Closing any open modals...")
-            try:
-                # Try to close modal by clicking close button
-                close_buttons = self.driver.find_elements(By.XPATH,
-                    "//button[contains(., '×') or contains(@class, 'close') or @data-dismiss='modal'] | //span[contains(@class, 'close')]")
-                for close_btn in close_buttons:
-                    try:
-                        if close_btn.is_displayed():
-                            close_btn.click()
-                            time.sleep(1)
-                            break
-                    except:
-                        continue
+                # Pooled sessions may be left on another page by the previous job
+                self.open_dashboard()
+
+                # Find and interact with file input
+                upload_input = WebDriverWait(self.driver, 20).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='file']"))
+                )
 
-                # Try pressing Escape key as fallback
+                upload_input.send_keys(os.path.abspath(unique_path))
+
+                # Try to submit (some sites auto-submit, others need manual submit)
                 try:
-                    from selenium.webdriver.common.keys import Keys
-                    body = self.driver.find_element(By.TAG_NAME, 'body')
-                    body.send_keys(Keys.ESCAPE)
-                    time.sleep(1)
+                    submit_btn = self.driver.find_element(By.CSS_SELECTOR, "button[type='submit'], input[type='submit']")
+                    submit_btn.click()
                 except:
-                    pass
-
-                # Wait for any modals to disappear
-                time.sleep(2)
+                    print("ℹ️  Upload appears to be automatic or submit button not found")
 
-            except Exception as modal_error:
-                print(f"⚠️  Error closing modals: {str(modal_error)}")
+                # Wait for the new row to appear instead of sleeping a fixed time
+                print("⏳ Waiting for academi.cx to list the uploaded document...")
+                if self.wait_for_upload(unique_name):
+                    print(f"✅ Document uploaded successfully! (waited {self.last_upload_wait:.1f}s)")
+                else:
+                    print(f"⚠️  Upload not confirmed after {self.last_upload_wait:.1f}s, continuing anyway")
+                return unique_name
 
-            # Find all document rows that contain the document name
-            document_rows = self.driver.find_elements(By.XPATH, f"//tr[contains(., '{document_name}')]")
-            
-            if not document_rows:
-                print(f"⚠️  No results found for document: {document_name}")
+            except Exception as e:
+                print(f"❌ Upload failed: {str(e)}")
                 return None
-
-            print(f"📋 Found {len(document_rows)} matching document(s)")
-            
-            # Find the "View Results" button in the matching row
-            target_row = document_rows[0]  # Use the first matching row
-            results_button = target_row.find_element(By.XPATH, ".//button[contains(., 'View Results')] | .//a[contains(., 'View Results')]")
-            
-            print(f"🎯 Clicking results for document: {document_name}")
-            results_button.click()
-
-            # Wait for modal to open
-            print("⏳ Waiting for results modal to open...")
-            modal = WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located(
-                    (By.XPATH, "//div[contains(@class, 'modal') or contains(., 'Results')]")
-                )
-            )
-            
-            # Wait a moment for modal content to load
-            time.sleep(2)
-
-            # Look for and click the download similarity report button
-            print("🔍 Looking for download similarity report button...")
-            try:
-                download_btn = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable(
-                        (By.XPATH, "//button[contains(., 'Download similarity report')] | //a[contains(., 'Download similarity report')]")
-                    )
-                )
-                
-                print("📥 Clicking download similarity report button...")
-                download_btn.click()
-
-                # Wait for download to complete
-                print("⏳ Waiting for PDF download to complete...")
-                self.wait_for_download(timeout=60)
-
-                # Find the downloaded PDF and rename it
-                pdf_files = glob.glob(os.path.join(self.download_dir, "*.pdf"))
-                if pdf_files:
-                    latest_pdf = max(pdf_files, key=os.path.getctime)
-                    report_name = os.path.splitext(document_name)[0] + "_similarity_report.pdf"
-                    report_path = os.path.join(self.download_dir, report_name)
-                    
-                    # Rename with retry mechanism
-                    max_retries = 3
+            finally:
+                # Clean up temporary file with retry mechanism
+                if unique_path and os.path.exists(unique_path):
+                    max_retries = 5
                     for attempt in range(max_retries):
                         try:
-                            os.rename(latest_pdf, report_path)
+                            os.remove(unique_path)
+                            print(f"🧹 Cleaned up temporary file: {unique_name}")
                             break
                         except PermissionError:
                             if attempt < max_retries - 1:
-                                time.sleep(2)
+                                print(f"⏳ File locked, retrying cleanup in {attempt + 1} seconds...")
+                                time.sleep(attempt + 1)
                             else:
-                                # Use original filename if rename fails
-                                report_path = latest_pdf
-                    
-                    # Create minimal results with just the PDF
-                    results = {
-                        'document_name': document_name,
-                        'processed_at': datetime.utcnow(),
-                        'report_path': report_path
-                    }
-                    
-                    print(f"✅ PDF report downloaded successfully: {os.path.basename(report_path)}")
-                    
-                    # Close modal
+                                print(f"⚠️  Could not delete temporary file: {unique_path}")
+                        except Exception as cleanup_error:
+                            print(f"⚠️  Error during cleanup: {str(cleanup_error)}")
+                            break
+
+    def snapshot(self):
+        """Capture the dashboard table and results modal in a single round trip"""
+        return self.driver.execute_script(SNAPSHOT_JS)
+
+    def scan_dashboard(self):
+        """Reload the dashboard once and return every table row as a dict"""
+        with self.count_commands('scan_dashboard'):
+            self.driver.get(ACADEMI_DASHBOARD_URL)
+            return self.snapshot()['rows']
+
+    def extract_results(self, document_name):
+        """Extract plagiarism results by downloading PDF report only"""
+        with self.count_commands('extract_results'):
+            try:
+                print("📊 Looking for results...")
+
+                # Close any open modal and open this document's results in one call
+                clicked = self.driver.execute_script(OPEN_RESULTS_JS, document_name)
+                if not clicked:
+                    print(f"⚠️  No results found for document: {document_name}")
+                    return None
+
+                print(f"🎯 Opened results for document: {document_name}")
+                # Tabs of one browser share its download directory setting, so download one at a time
+                with getattr(self.driver, 'download_lock', None) or nullcontext():
+                    job_dir = self.job_download_dir()
                     try:
-                        close_btn = self.driver.find_element(
-                            By.XPATH, "//button[contains(., '×')] | //span[contains(@class, 'close')] | //button[@data-dismiss='modal']"
+                        # Each poll checks for the button and clicks it once it is visible
+                        print("🔍 Waiting for download similarity report button...")
+                        WebDriverWait(self.driver, 20, poll_frequency=0.5).until(
+                            lambda driver: driver.execute_script(CLICK_DOWNLOAD_JS)
                         )
-                        close_btn.click()
-                        time.sleep(1)
-                    except:
-                        # Try pressing Escape key as fallback
-                        try:
-                            from selenium.webdriver.common.keys import Keys
-                            self.driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.ESCAPE)
-                        except:
-                            pass
-                    
-                    return results
-                else:
-                    print("❌ No PDF file found after download")
-                    return None
 
-            except Exception as download_error:
-                print(f"❌ Could not download report: {str(download_error)}")
-                return None
+                        # Wait for download to complete
+                        print("⏳ Waiting for PDF download to complete...")
+                        downloaded_path = self.wait_for_download(timeout=60, directory=job_dir)
 
-        except Exception as e:
-            print(f"❌ Error extracting results: {str(e)}")
-            return None
+                        report_name = os.path.splitext(document_name)[0] + "_similarity_report.pdf"
+                        report_path = os.path.join(self.download_dir, report_name)
 
-    def process_document(self, document_id):
-        """Process a single document by ID"""
-        app = create_app()
+                        # Atomic move into permanent storage, retried while the file is locked
+                        max_retries = 3
+                        for attempt in range(max_retries):
+                            try:
+                                os.replace(downloaded_path, report_path)
+                                break
+                            except PermissionError:
+                                if attempt < max_retries - 1:
+                                    time.sleep(2)
+                                else:
+                                    raise
+                    finally:
+                        shutil.rmtree(job_dir, ignore_errors=True)
 
-        with app.app_context():
-            try:
-                # Get document from database
-                document = Document.query.get(document_id)
-                if not document:
-                    print(f"❌ Document {document_id} not found")
-                    return False
-
-                print(f"🚀 Starting processing for document: {document.original_filename}")
-
-                # Update status to processing
-                document.status = 'processing'
-                db.session.commit()
-
-                # Setup browser and login
-                if not self.driver:
-                    if not self.login():
-                        document.status = 'failed'
-                        document.error_message = 'Failed to login to academi.cx'
-                        db.session.commit()
-                        return False
-
-                # Check if document is completed
-                if document.status == 'completed':
-                    print(f"ℹ️  Document already completed")
-                    return True
-                
-                # If document is in processing status, continue with the processing
-                if document.status == 'processing':
-                    print(f"ℹ️  Document in processing status, continuing with processing...")
-
-                # Check if document was already uploaded to academi.cx
-                if not document.academi_uploaded:
-                    print("📤 Uploading document to academi.cx...")
-                    print(f"📁 File path: {document.path}")
-                    print(f"📁 File exists: {os.path.exists(document.path)}")
-                    
-                    if not os.path.exists(document.path):
-                        print(f"❌ File not found at path: {document.path}")
-                        document.status = 'failed'
-                        document.error_message = f'Uploaded file not found: {document.path}'
-                        db.session.commit()
-                        return False
-                    
-                    uploaded_name = self.upload_document(document.path)
-                    
-                    # Store the unique uploaded name for result extraction
-                    document.academi_upload_name = uploaded_name
-                    
-                    # Mark as uploaded and save timestamp
-                    document.academi_uploaded = True
-                    document.academi_upload_time = datetime.utcnow()
-                    db.session.commit()
-                    print(f"✅ Document uploaded successfully to academi.cx as: {uploaded_name}")
-                    
-                    # Initial wait after upload - academi.cx needs time to process the upload
-                    print("⏳ Waiting for initial processing on academi.cx...")
-                else:
-                    print("ℹ️  Document already uploaded to academi.cx, checking for results...")
-
-                # Try to extract results (retry mechanism for waiting)
-                max_retries = 40  # Increased for 500-700 second wait time
-                wait_time = 15    # Check every 15 seconds
-                print(f"DEBUG: max_retries={max_retries}, wait_time={wait_time}")
-                
-                # Use the unique uploaded name for result extraction
-                if document.academi_upload_name:
-                    search_name = document.academi_upload_name
-                    print(f"🔍 Searching for results using uploaded name: {search_name}")
-                else:
-                    # Fallback to original filename if upload name not available
-                    search_name = document.original_filename
-                    print(f"⚠️  Using original filename for search: {search_name}")
-                
-                print(f"DEBUG: About to start for loop with max_retries={max_retries}")
-                for attempt in range(max_retries):
-                    elapsed_time = attempt * wait_time
-                    print(f"🔄 Attempt {attempt + 1}/{max_retries} to extract results... (elapsed: {elapsed_time}s)")
-                    
-                    results = self.extract_results(search_name)
-
-                    if results:
-                        # Update document with results
-                        document.status = 'completed'
-                        document.processed_at = results['processed_at']
-
-                        # Only store what we have from the PDF download
-                        document.similarity_score = 0.0
-                        document.ai_percentage = 0.0
-                        document.word_count = 0
-
-                        # Store report path if available
-                        if 'report_path' in results:
-                            # Store relative path for web access
-                            document.report_path = os.path.basename(results['report_path'])
-
-                        db.session.commit()
-                        print(f"✅ Document processing completed successfully!")
-                        return True
-
-                    # Wait before retry
-                    print(f"⏳ Results not ready yet, waiting {wait_time} seconds...")
-                    time.sleep(wait_time)
-
-                # If we get here, processing timed out
-                print("❌ Document processing timed out after maximum retries")
-                document.status = 'failed'
-                document.error_message = 'Processing timed out - results not available after maximum wait time'
-                db.session.commit()
-                return False
 
-            except Exception as e:
-                print(f"❌ Error processing document: {str(e)}")
+                print(f"✅ PDF report downloaded successfully: {os.path.basename(report_path)}")
+
                 try:
-                    document.status = 'failed'
-                    document.error_message = str(e)
-                    db.session.commit()
-                except:
+                    self.driver.execute_script(CLOSE_MODALS_JS)
+                except Exception:
                     pass
-                return False
+
+                # Create minimal results with just the PDF
+                return {
+                    'document_name': document_name,
+                    'processed_at': datetime.utcnow(),
+                    'report_path': report_path
+                }
+
+            except TimeoutException:
+                print("❌ Could not download report: download button never appeared")
+                return None
+            except Exception as e:
+                print(f"❌ Error extracting results: {str(e)}")
+                return None
 
     def cleanup(self):
         """Clean up resources"""
@@ -456,11 +576,30 @@ class DocumentProcessor:
             except Exception as e:
                 print(f"⚠️  Error during cleanup: {str(e)}")
 
-def process_document_background(document_id):
-    """Background function to process a document - can be called from Flask routes"""
-    app = create_app()
-    processor = None
-    
+def compare_page_load(url=ACADEMI_LOGIN_URL, runs=3):
+    """Measure page-load time for ``url`` with the lean profile off and on"""
+    results = {}
+    for lean in (False, True):
+        processor = DocumentProcessor()
+        processor.setup_driver(lean=lean)
+        try:
+            results['lean' if lean else 'default'] = processor.measure_page_load(url, runs)
+        finally:
+            processor.driver.quit()
+    return results
+
+
+def process_with_academi(document_id, wait=True):
+    """Upload a document to academi.cx with a pooled session and wait for its report.
+
+    With ``wait`` False it returns as soon as the upload is done and leaves
+    the report to the dashboard harvester.
+    """
+    app = get_worker_app()
+    pool = None
+    session = None
+    broken = False
+
     with app.app_context():
         try:
             print(f"🚀 Starting background processing for document {document_id}")
@@ -479,13 +618,42 @@ def process_document_background(document_id):
                     document.error_message = 'Academi.cx credentials not configured'
                     db.session.commit()
                 return False
-                
-            processor = DocumentProcessor()
-            print(f"✅ DocumentProcessor created, starting processing...")
-            success = processor.process_document(document_id)
+
+            # Reuse a warm, logged-in session of the configured backend
+            pool = get_session_pool()
+            timeout = app.config.get('BROWSER_POOL_CHECKOUT_TIMEOUT')
+            try:
+                session = pool.checkout(timeout=timeout)
+            except Exception as e:
+                print(f"❌ Could not get an academi.cx session: {str(e)}")
+                document = Document.query.get(document_id)
+                if document:
+                    document.status = 'failed'
+                    document.error_message = 'Failed to login to academi.cx'
+                    db.session.commit()
+                return False
+
+            processor = create_processor(session.client)
+            print(f"✅ {type(processor).__name__} created, starting processing...")
+            uploaded = processor.upload_stage(document_id)
+
+            # The session is not needed while academi.cx checks the document,
+            # so give it back before waiting on the shared harvester
+            pool.checkin(session)
+            session = None
+
+            from .harvester import get_harvester
+            if not wait:
+                if uploaded:
+                    get_harvester().ensure_running()
+                print(f"📊 Upload stage result: {uploaded}")
+                return uploaded
+
+            success = uploaded and get_harvester().wait_for(document_id)
             print(f"📊 Processing result: {success}")
             return success
         except Exception as e:
+            broken = True
             print(f"❌ Background processing error: {str(e)}")
             import traceback
             print(f"📍 Full traceback: {traceback.format_exc()}")
@@ -501,12 +669,39 @@ def process_document_background(document_id):
             return False
         finally:
             try:
-                if processor:
-                    processor.cleanup()
-                    print("🧹 Processor cleanup completed")
+                if session:
+                    # Hand the session back instead of closing it; the pool
+                    # health-checks it and recycles it if it is broken
+                    pool.checkin(session, broken=broken)
+                    print("🧹 Session returned to pool")
             except Exception as cleanup_error:
                 print(f"⚠️ Cleanup error: {str(cleanup_error)}")
 
+def process_document_background(document_id, wait=True):
+    """Background function to process a document - can be called from Flask routes.
+
+    ``wait`` False runs only the upload stage; see ``process_with_academi``.
+    """
+    backend = get_processor_class()
+    if not backend.pooled:
+        return backend().process_document(document_id)
+
+    if process_with_academi(document_id, wait=wait):
+        return True
+
+    # academi.cx could not produce a report: score the document offline instead
+    from .local_similarity import fallback_enabled, LocalSimilarityProcessor
+    if fallback_enabled():
+        with get_worker_app().app_context():
+            document = Document.query.get(document_id)
+            if document is None or document.status != 'failed':
+                return False
+            print(f"🔁 Falling back to local similarity scoring: {document.error_message}")
+            document.status = 'processing'
+            db.session.commit()
+        return LocalSimilarityProcessor().process_document(document_id)
+    return False
+
 # For standalone testing
 if __name__ == '__main__':
     import sys
@@ -0,0 +1,266 @@
+"""
+Dashboard Harvester - resolves every pending document from one dashboard scan per cycle
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from .models import db, Document
+from .processor_backend import create_processor, get_session_pool, _config
+from .worker import get_worker_app, default_worker_id
+from .job_queue import acquire_lease, LEASE_SECONDS
+from .metrics import metrics
+from .local_similarity import fallback_enabled, LocalSimilarityProcessor
+
+
+def search_name(document):
+    """Name academi.cx lists the document under"""
+    return document.academi_upload_name or document.original_filename
+
+
+def match_ready_rows(rows, names):
+    """Return the subset of ``names`` whose dashboard row has results available"""
+    ready = set()
+    remaining = set(names)
+    for row in rows:
+        if not row['ready']:
+            continue
+        for name in list(remaining):
+            if name in row['text']:
+                ready.add(name)
+                remaining.discard(name)
+        if not remaining:
+            break
+    return ready
+
+
+class DashboardHarvester:
+    """Polls the academi.cx dashboard on behalf of all documents still processing.
+
+    Each cycle loads the dashboard once, matches its rows against every
+    uploaded document in the ``processing`` state and downloads reports only
+    for the rows that are ready, so polling cost grows with cycles rather than
+    with documents times cycles. Ready reports are downloaded by up to
+    ``workers`` pooled sessions at once.
+
+    When several worker nodes run a harvester, only the holder of the
+    ``harvester`` lease scans the dashboard; the others just wake their
+    waiters once the leader has resolved a document.
+    """
+
+    LEASE_NAME = 'harvester'
+
+    def __init__(self, app, pool, interval=15, timeout=600, workers=1, holder=None,
+                 lease_seconds=LEASE_SECONDS):
+        self.app = app
+        self.holder = holder or default_worker_id()
+        # Must outlast a cycle's gaps; renewed before every download too
+        self.lease_seconds = max(lease_seconds, 2 * interval)
+        self.pool = pool
+        self.interval = interval
+        self.timeout = timeout
+        self.workers = max(1, workers)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._waiters = {}
+        self._thread = None
+        self._kicked = False
+
+    def pending_documents(self):
+        return Document.query.filter(
+            Document.status == 'processing',
+            Document.academi_uploaded.is_(True)
+        ).all()
+
+    def _timed_out(self, document, now):
+        started = document.academi_upload_time or document.uploaded_at or now
+        return now - started > timedelta(seconds=self.timeout)
+
+    def run_cycle(self):
+        """Scan the dashboard once and resolve what it can.
+
+        Returns the number of documents still waiting for results.
+        """
+        with self.app.app_context():
+            pending = self.pending_documents()
+            if not pending:
+                self._notify(set())
+                return 0
+            if not self.lead():
+                # Another node harvests; only report what it resolved
+                self._notify({document.id for document in pending})
+                return len(pending)
+
+            print(f"🔄 Harvesting results for {len(pending)} pending document(s)...")
+            with self.pool.session() as session:
+                processor = create_processor(session.client)
+                ready = match_ready_rows(processor.scan_dashboard(),
+                                         [search_name(document) for document in pending])
+
+                # Spread ready documents over the harvest workers; this thread takes the first share
+                batches = [[] for _ in range(min(self.workers, len(ready)) or 1)]
+                for i, document in enumerate(d for d in pending if search_name(d) in ready):
+                    batches[i % len(batches)].append(document)
+                futures = [self._pool_executor().submit(self._harvest_in_session,
+                                                        [document.id for document in batch])
+                           for batch in batches[1:]]
+                resolved = self._harvest(processor, batches[0])
+                for future in futures:
+                    try:
+                        resolved |= future.result()
+                    except Exception as e:
+                        print(f"⚠️  Harvest worker failed: {str(e)}")
+                db.session.expire_all()
+
+                now = datetime.utcnow()
+                for document in pending:
+                    if document.id in resolved or not self._timed_out(document, now):
+                        continue
+                    if fallback_enabled():
+                        print(f"🔁 Document {document.id} timed out upstream, scoring it locally")
+                        processor.record_results(document, LocalSimilarityProcessor().score(document))
+                    else:
+                        print(f"❌ Document {document.id} timed out waiting for results")
+                        document.status = 'failed'
+                        document.error_message = 'Processing timed out - results not available after maximum wait time'
+                    db.session.commit()
+                    resolved.add(document.id)
+
+            still_pending = {document.id for document in pending} - resolved
+            metrics.set_gauge('harvester.awaiting_results', len(still_pending))
+            self._notify(still_pending)
+            return len(still_pending)
+
+    def _harvest(self, processor, documents):
+        """Download and record the reports of ready documents; returns the ids resolved"""
+        resolved = set()
+        for document in documents:
+            if not self.lead():
+                print("⚠️  Lost the harvester lease, leaving the rest to the new leader")
+                break
+            results = processor.extract_results(search_name(document))
+            if results:
+                processor.record_results(document, results)
+                db.session.commit()
+                resolved.add(document.id)
+                metrics.incr('harvester.documents_harvested')
+                print(f"✅ Results harvested for document {document.id}")
+        return resolved
+
+    def _harvest_in_session(self, document_ids):
+        """Harvest a share of the ready documents on a session of its own"""
+        with self.app.app_context(), self.pool.session() as session:
+            documents = Document.query.filter(Document.id.in_(document_ids)).all()
+            return self._harvest(create_processor(session.client), documents)
+
+    def lead(self):
+        """Take or keep the harvester lease; True while this harvester is the leader"""
+        return acquire_lease(self.LEASE_NAME, self.holder, self.lease_seconds)
+
+    def _pool_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=max(1, self.workers - 1),
+                                                thread_name_prefix='harvest')
+        return self._executor
+
+    def _notify(self, still_pending):
+        """Wake every waiter whose document is no longer pending"""
+        with self._lock:
+            for document_id, events in self._waiters.items():
+                if document_id not in still_pending:
+                    for event in events:
+                        event.set()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                self._kicked = False
+            try:
+                remaining = self.run_cycle()
+            except Exception as e:
+                print(f"⚠️  Harvest cycle failed: {str(e)}")
+                remaining = None
+
+            with self._lock:
+                if remaining == 0 and not self._waiters and not self._kicked:
+                    self._thread = None
+                    return
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def run_forever(self, heartbeat=None):
+        """Harvest every ``interval`` seconds until the process exits, for a dedicated harvester process"""
+        while True:
+            try:
+                self.run_cycle()
+            except Exception as e:
+                print(f"⚠️  Harvest cycle failed: {str(e)}")
+            if heartbeat is not None:
+                heartbeat()
+            time.sleep(self.interval)
+
+    def ensure_running(self):
+        """Start the harvest loop if it is not already running"""
+        if _external:
+            return
+        with self._lock:
+            self._kicked = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='dashboard-harvester')
+                self._thread.daemon = True
+                self._thread.start()
+
+    def wait_for(self, document_id, timeout=None):
+        """Block until the harvester resolves a document; True if it completed"""
+        event = threading.Event()
+        with self._lock:
+            self._waiters.setdefault(document_id, []).append(event)
+        self.ensure_running()
+
+        if timeout is None:
+            timeout = self.timeout + 2 * self.interval
+        try:
+            event.wait(timeout)
+        finally:
+            with self._lock:
+                events = self._waiters.get(document_id, [])
+                if event in events:
+                    events.remove(event)
+                if not events:
+                    self._waiters.pop(document_id, None)
+
+        with self.app.app_context():
+            document = Document.query.get(document_id)
+            return bool(document and document.status == 'completed')
+
+
+_harvester = None
+_harvester_lock = threading.Lock()
+# Set in job processes, whose uploads are harvested by a separate supervised process
+_external = False
+
+
+def use_external_harvester():
+    global _external
+    _external = True
+
+
+def get_harvester():
+    """Return the process-wide dashboard harvester"""
+    global _harvester
+    with _harvester_lock:
+        if _harvester is None:
+            pool = get_session_pool()
+            _harvester = DashboardHarvester(
+                get_worker_app(),
+                pool,
+                interval=_config('HARVEST_INTERVAL', 15, int),
+                timeout=_config('HARVEST_TIMEOUT', 600, int),
+                # Every harvest worker holds a pooled session while it downloads
+                workers=min(_config('HARVEST_CONCURRENCY', 1, int), pool.size),
+                lease_seconds=_config('WORKER_LEASE_SECONDS', LEASE_SECONDS, int)
+            )
+        return _harvester
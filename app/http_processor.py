@@ -0,0 +1,340 @@
+"""
+HTTP Processor - talks to academi.cx with pooled HTTP sessions instead of a browser
+
+Login, upload, dashboard polling and report download are plain form posts and
+file fetches underneath, so this backend drives them with ``requests`` and a
+small HTML parser. Select it with PROCESSOR_BACKEND=http; the Selenium
+``DocumentProcessor`` stays available as the fallback.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .processor_backend import ProcessorBackend, ACADEMI_LOGIN_URL, ACADEMI_DASHBOARD_URL, _config
+
+# Attributes a results/download button may carry its target URL in
+URL_ATTRIBUTES = ('href', 'data-url', 'data-href', 'formaction')
+
+
+class PageParser(HTMLParser):
+    """Collects the forms, table rows and links of an academi.cx page"""
+
+    def __init__(self):
+        super().__init__()
+        self.forms = []
+        self.rows = []
+        self.links = []
+        self._form = None
+        self._row = None
+        self._link = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'form':
+            self._form = {
+                'action': attrs.get('action') or '',
+                'method': (attrs.get('method') or 'get').lower(),
+                'inputs': []
+            }
+            self.forms.append(self._form)
+        elif tag in ('input', 'textarea', 'select') and self._form is not None and attrs.get('name'):
+            self._form['inputs'].append({
+                'name': attrs['name'],
+                'type': (attrs.get('type') or 'text').lower(),
+                'value': attrs.get('value') or ''
+            })
+        elif tag == 'tr':
+            self._row = {'text': '', 'links': []}
+            self.rows.append(self._row)
+        elif tag in ('a', 'button'):
+            url = next((attrs[name] for name in URL_ATTRIBUTES if attrs.get(name)), None)
+            self._link = {'text': '', 'url': url}
+            self.links.append(self._link)
+            if self._row is not None:
+                self._row['links'].append(self._link)
+
+    def handle_endtag(self, tag):
+        if tag == 'form':
+            self._form = None
+        elif tag == 'tr':
+            self._row = None
+        elif tag in ('a', 'button'):
+            self._link = None
+
+    def handle_data(self, data):
+        if self._row is not None:
+            self._row['text'] += data
+        if self._link is not None:
+            self._link['text'] += data
+
+    def find_form(self, input_type=None, input_name=None):
+        for form in self.forms:
+            for field in form['inputs']:
+                if (input_type and field['type'] == input_type) or (input_name and field['name'] == input_name):
+                    return form
+        return None
+
+
+def parse_page(html):
+    parser = PageParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+def find_link(links, label):
+    """First link whose text contains ``label`` and that has a URL to follow"""
+    for link in links:
+        if label in link['text'] and link['url']:
+            return link
+    return None
+
+
+class HttpProcessor(ProcessorBackend):
+    """Handles document processing via academi.cx using pooled HTTP sessions"""
+
+    name = 'http'
+    pool_size_setting = 'HTTP_POOL_SIZE'
+
+    def __init__(self, email=None, password=None):
+        """Initialize the document processor"""
+        super().__init__(email, password)
+        self.http = None
+        self.timeout = _config('HTTP_REQUEST_TIMEOUT', 30, int)
+        self._last_rows = []
+
+    @classmethod
+    def new_http_session(cls):
+        """A requests session with keep-alive connection pooling and retries"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=_config('HTTP_POOL_MAXSIZE', 10, int),
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504],
+                              allowed_methods=['GET', 'HEAD'])
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['User-Agent'] = (
+            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+        )
+        return session
+
+    @classmethod
+    def start_session(cls):
+        processor = cls()
+        if not processor.login():
+            processor.http.close()
+            raise RuntimeError("Failed to login to academi.cx")
+        return processor.http
+
+    @classmethod
+    def session_is_healthy(cls, http):
+        response = http.get(ACADEMI_DASHBOARD_URL, allow_redirects=False, timeout=10)
+        return response.status_code == 200
+
+    @classmethod
+    def close_session(cls, http):
+        http.close()
+
+    def attach(self, http):
+        self.http = http
+
+    @property
+    def connected(self):
+        return self.http is not None
+
+    def _get(self, url, **kwargs):
+        response = self.http.get(url, timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _on_dashboard(self, response):
+        return "/dashboard" in response.url and "/login" not in response.url
+
+    def restore_session(self):
+        """Load the saved cookie jar (shared with the Selenium backend) and check it still works"""
+        cookies = self.cookie_store.load()
+        if not cookies:
+            return False
+
+        for cookie in cookies:
+            self.http.cookies.set(cookie['name'], cookie['value'],
+                                  domain=cookie.get('domain'), path=cookie.get('path', '/'))
+        try:
+            if self._on_dashboard(self._get(ACADEMI_DASHBOARD_URL)):
+                print("✅ Saved session is still valid, skipping login")
+                return True
+        except requests.RequestException as e:
+            print(f"⚠️  Could not restore saved session: {str(e)}")
+
+        print("ℹ️  Saved session has expired, logging in again")
+        self.cookie_store.clear()
+        self.http.cookies.clear()
+        return False
+
+    def save_session(self):
+        """Persist the cookie jar in the same format Selenium uses"""
+        cookies = []
+        for cookie in self.http.cookies:
+            entry = {'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain,
+                     'path': cookie.path, 'secure': cookie.secure}
+            if cookie.expires is not None:
+                entry['expiry'] = cookie.expires
+            cookies.append(entry)
+        try:
+            self.cookie_store.save(cookies)
+        except OSError as e:
+            print(f"⚠️  Could not save session cookies: {str(e)}")
+
+    def login(self):
+        """Login to academi.cx, reusing the saved session when it is still valid"""
+        if not self.http:
+            self.http = self.new_http_session()
+
+        if self.restore_session():
+            return True
+
+        try:
+            print("🔐 Logging into academi.cx over HTTP...")
+            response = self._get(ACADEMI_LOGIN_URL)
+            form = parse_page(response.text).find_form(input_name='email')
+            if form is None:
+                raise RuntimeError("Login form not found")
+
+            # Keep hidden fields such as CSRF tokens
+            data = {field['name']: field['value'] for field in form['inputs'] if field['type'] == 'hidden'}
+            data['email'] = self.email
+            data['password'] = self.password
+
+            response = self.http.post(urljoin(response.url, form['action']), data=data, timeout=self.timeout)
+            response.raise_for_status()
+            if not self._on_dashboard(response):
+                raise RuntimeError(f"Login did not reach the dashboard (ended on {response.url})")
+
+            print("✅ Successfully logged in!")
+            self.save_session()
+            return True
+
+        except Exception as e:
+            print(f"❌ Login failed: {str(e)}")
+            return False
+
+    def upload_document(self, file_path, unique_name=None):
+        """Upload a document to academi.cx"""
+        try:
+            print(f"📤 Uploading document: {os.path.basename(file_path)}")
+            unique_name = unique_name or self.generate_unique_name(os.path.basename(file_path))
+
+            response = self._get(ACADEMI_DASHBOARD_URL)
+            form = parse_page(response.text).find_form(input_type='file')
+            if form is None:
+                raise RuntimeError("Upload form not found on dashboard")
+
+            data = {field['name']: field['value'] for field in form['inputs']
+                    if field['type'] not in ('file', 'submit', 'button')}
+            file_field = next(field['name'] for field in form['inputs'] if field['type'] == 'file')
+
+            # Stream the original file under its unique name; no temporary copy needed
+            with open(file_path, 'rb') as f:
+                upload = self.http.post(urljoin(response.url, form['action']), data=data,
+                                        files={file_field: (unique_name, f)}, timeout=self.timeout)
+            upload.raise_for_status()
+
+            if self.wait_for_upload(unique_name):
+                print(f"✅ Document uploaded successfully! (waited {self.last_upload_wait:.1f}s)")
+            else:
+                print(f"⚠️  Upload not confirmed after {self.last_upload_wait:.1f}s, continuing anyway")
+            return unique_name
+
+        except Exception as e:
+            print(f"❌ Upload failed: {str(e)}")
+            return None
+
+    def wait_for_upload(self, uploaded_name, timeout=None):
+        """Poll the dashboard until the uploaded document is listed; see DocumentProcessor.wait_for_upload"""
+        if timeout is None:
+            timeout = _config('UPLOAD_COMPLETE_TIMEOUT', 50, int)
+        started = time.monotonic()
+        try:
+            while True:
+                if any(uploaded_name in row['text'] for row in self.scan_dashboard()):
+                    return True
+                if time.monotonic() - started >= timeout:
+                    return False
+                time.sleep(1)
+        finally:
+            self.last_upload_wait = time.monotonic() - started
+
+    def scan_dashboard(self):
+        """Fetch the dashboard once and return every table row as a dict"""
+        page = parse_page(self._get(ACADEMI_DASHBOARD_URL).text)
+        self._last_rows = [
+            {
+                'text': ' '.join(row['text'].split()),
+                'ready': find_link(row['links'], 'View Results') is not None,
+                'results_url': (find_link(row['links'], 'View Results') or {}).get('url')
+            }
+            for row in page.rows
+        ]
+        return self._last_rows
+
+    def extract_results(self, document_name):
+        """Download the similarity report for a document whose results are ready"""
+        try:
+            rows = [row for row in self._last_rows if document_name in row['text']]
+            if not rows:
+                rows = [row for row in self.scan_dashboard() if document_name in row['text']]
+            row = next((row for row in rows if row.get('results_url')), None)
+            if row is None:
+                print(f"⚠️  No results link found for document: {document_name}")
+                return None
+
+            results_page = self._get(urljoin(ACADEMI_DASHBOARD_URL, row['results_url']))
+            link = find_link(parse_page(results_page.text).links, 'Download similarity report')
+            if link is None:
+                print("❌ Download similarity report link not found")
+                return None
+
+            report_name = os.path.splitext(document_name)[0] + "_similarity_report.pdf"
+            report_path = os.path.join(self.download_dir, report_name)
+
+            # Stream into a private file, then move it into place atomically
+            job_dir = tempfile.mkdtemp(prefix='.job-', dir=self.download_dir)
+            try:
+                partial_path = os.path.join(job_dir, report_name)
+                with self.http.get(urljoin(results_page.url, link['url']), stream=True,
+                                   timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    with open(partial_path, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=64 * 1024):
+                            f.write(chunk)
+                os.replace(partial_path, report_path)
+            finally:
+                shutil.rmtree(job_dir, ignore_errors=True)
+
+            print(f"✅ PDF report downloaded successfully: {report_name}")
+            return {
+                'document_name': document_name,
+                'processed_at': datetime.utcnow(),
+                'report_path': report_path
+            }
+
+        except Exception as e:
+            print(f"❌ Error extracting results: {str(e)}")
+            return None
+
+    def cleanup(self):
+        """Clean up resources"""
+        if self.http:
+            self.http.close()
+            self.http = None
@@ -0,0 +1,316 @@
+"""
+Job Queue - durable, database-backed queue of document processing jobs
+
+Web requests only enqueue; worker processes (see app/worker.py) claim jobs
+atomically, so every job is run by exactly one worker and survives restarts.
+
+A claimed job is leased to its worker until ``lease_expires_at``. Workers on
+any host renew the leases of their running jobs with heartbeats; a job whose
+lease ran out is reclaimed by whichever worker notices first.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, and_
+from sqlalchemy.exc import IntegrityError
+
+from .models import db, Document, ProcessingJob, WorkerLease
+from .metrics import metrics
+from .scheduler import assign_lane, next_candidates, LANE_NAMES
+
+ACTIVE_STATUSES = ('queued', 'running')
+LEASE_SECONDS = 120
+
+
+def _supports_skip_locked():
+    return db.engine.dialect.name in ('mysql', 'mariadb', 'postgresql')
+
+
+def enqueue(document_id, lane=None):
+    """Queue a document for processing unless it already has an active job.
+
+    The job goes into ``lane``, or the lane scheduler.assign_lane picks.
+    """
+    job = ProcessingJob.query.filter(
+        ProcessingJob.document_id == document_id,
+        ProcessingJob.status.in_(ACTIVE_STATUSES)
+    ).first()
+    if job is None:
+        if lane is None:
+            lane = assign_lane(db.session.get(Document, document_id))
+        job = ProcessingJob(document_id=document_id, status='queued', lane=lane,
+                            created_at=datetime.utcnow())
+        db.session.add(job)
+        db.session.commit()
+    return job
+
+
+def claim_next(worker_id, lease_seconds=LEASE_SECONDS):
+    """Atomically claim the next job for ``worker_id`` in fair-share order; None if the queue is empty.
+
+    See scheduler.py for the order.
+    """
+    if _supports_skip_locked():
+        job = _claim_skip_locked(worker_id, lease_seconds)
+    else:
+        job = _claim_compare_and_set(worker_id, lease_seconds)
+    if job is not None:
+        waited = (job.claimed_at - job.created_at).total_seconds()
+        metrics.observe('queue.wait_seconds', waited)
+        metrics.observe(f'queue.wait_seconds.{LANE_NAMES.get(job.lane, "batch")}', waited)
+    return job
+
+
+def _mark_claimed(job, worker_id, lease_seconds):
+    now = datetime.utcnow()
+    job.status = 'running'
+    job.worker_id = worker_id
+    job.claimed_at = now
+    job.lease_expires_at = now + timedelta(seconds=lease_seconds)
+    job.attempts = (job.attempts or 0) + 1
+
+
+def _claim_skip_locked(worker_id, lease_seconds):
+    """MySQL/PostgreSQL: lock one queued row, skipping rows other workers hold.
+
+    Each user's next job is tried in fair-share order; when other workers
+    hold all of them, the oldest unlocked job in lane order is taken instead.
+    """
+    queued = ProcessingJob.query.filter_by(status='queued')
+    for job_id in next_candidates():
+        job = queued.filter_by(id=job_id).with_for_update(skip_locked=True).first()
+        if job is not None:
+            break
+    else:
+        job = queued.order_by(ProcessingJob.lane, ProcessingJob.created_at, ProcessingJob.id)\
+                    .with_for_update(skip_locked=True)\
+                    .first()
+    if job is None:
+        db.session.rollback()
+        return None
+    _mark_claimed(job, worker_id, lease_seconds)
+    db.session.commit()
+    return job
+
+
+def _claim_compare_and_set(worker_id, lease_seconds, max_attempts=5):
+    """SQLite: pick a candidate, then flip it to running only if it is still queued.
+
+    SQLite serialises writers, so the conditional UPDATE succeeds for exactly
+    one worker; losers retry with the next candidate.
+    """
+    for _ in range(max_attempts):
+        candidates = next_candidates()
+        if not candidates:
+            db.session.rollback()
+            return None
+
+        for job_id in candidates:
+            now = datetime.utcnow()
+            claimed = ProcessingJob.query.filter_by(id=job_id, status='queued').update({
+                ProcessingJob.status: 'running',
+                ProcessingJob.worker_id: worker_id,
+                ProcessingJob.claimed_at: now,
+                ProcessingJob.lease_expires_at: now + timedelta(seconds=lease_seconds),
+                ProcessingJob.attempts: ProcessingJob.attempts + 1
+            }, synchronize_session=False)
+            db.session.commit()
+            if claimed == 1:
+                return db.session.get(ProcessingJob, job_id)
+    return None
+
+
+def finish(job_id, success, error=None, worker_id=None):
+    """Record the outcome of a claimed job.
+
+    With ``worker_id`` the outcome is only recorded while that worker still
+    holds the job, so a worker whose lease was reclaimed cannot overwrite the
+    new owner's result.
+    """
+    query = ProcessingJob.query.filter_by(id=job_id)
+    if worker_id is not None:
+        query = query.filter_by(worker_id=worker_id, status='running')
+    updated = query.update({
+        ProcessingJob.status: 'done' if success else 'failed',
+        ProcessingJob.error: error,
+        ProcessingJob.finished_at: datetime.utcnow(),
+        ProcessingJob.lease_expires_at: None
+    }, synchronize_session=False)
+    db.session.commit()
+    if not updated:
+        return None
+    return db.session.get(ProcessingJob, job_id)
+
+
+def renew_leases(worker_id, job_ids, lease_seconds=LEASE_SECONDS):
+    """Heartbeat: extend the leases ``worker_id`` holds on ``job_ids``.
+
+    Returns the ids of jobs the worker no longer holds (reclaimed elsewhere).
+    """
+    job_ids = list(job_ids)
+    if not job_ids:
+        return set()
+    ProcessingJob.query.filter(
+        ProcessingJob.id.in_(job_ids),
+        ProcessingJob.worker_id == worker_id,
+        ProcessingJob.status == 'running'
+    ).update({ProcessingJob.lease_expires_at: datetime.utcnow() + timedelta(seconds=lease_seconds)},
+             synchronize_session=False)
+    db.session.commit()
+    # Jobs that just finished here are not lost; re-queued or re-claimed ones are
+    lost = db.session.query(ProcessingJob.id).filter(
+        ProcessingJob.id.in_(job_ids),
+        or_(ProcessingJob.status == 'queued',
+            ProcessingJob.worker_id.is_(None),
+            ProcessingJob.worker_id != worker_id)
+    )
+    return {job_id for job_id, in lost}
+
+
+def _release(job):
+    """Hand a job whose owner is gone onward; only one worker wins each job.
+
+    Documents academi.cx already has go to the harvester (job done); the rest
+    are queued again. Returns 'resumed', 'requeued' or None if another worker
+    got there first.
+    """
+    query = ProcessingJob.query.filter_by(id=job.id, status='running', worker_id=job.worker_id)
+    if job.document.academi_uploaded:
+        changes, outcome = {ProcessingJob.status: 'done', ProcessingJob.finished_at: datetime.utcnow()}, 'resumed'
+    else:
+        changes, outcome = {ProcessingJob.status: 'queued', ProcessingJob.worker_id: None,
+                            ProcessingJob.claimed_at: None}, 'requeued'
+    changes[ProcessingJob.lease_expires_at] = None
+    updated = query.update(changes, synchronize_session=False)
+    db.session.commit()
+    return outcome if updated else None
+
+
+def reclaim_expired():
+    """Release running jobs whose lease has expired; returns ``(requeued, resumed)``"""
+    expired = ProcessingJob.query.filter(
+        ProcessingJob.status == 'running',
+        ProcessingJob.lease_expires_at < datetime.utcnow()
+    ).all()
+    outcomes = [_release(job) for job in expired]
+    return outcomes.count('requeued'), outcomes.count('resumed')
+
+
+def acquire_lease(name, holder, seconds=LEASE_SECONDS):
+    """Take or renew the named lease for ``holder``; False while another holder's lease is live"""
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=seconds)
+    renewed = WorkerLease.query.filter(
+        WorkerLease.name == name,
+        or_(WorkerLease.holder == holder, WorkerLease.expires_at < now)
+    ).update({WorkerLease.holder: holder, WorkerLease.expires_at: expires_at}, synchronize_session=False)
+    db.session.commit()
+    if renewed:
+        return True
+    if db.session.get(WorkerLease, name) is not None:
+        return False
+    try:
+        db.session.add(WorkerLease(name=name, holder=holder, expires_at=expires_at))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        # Another worker created it first
+        db.session.rollback()
+        return False
+
+
+def fail_document(document_id, error):
+    """Fail a document its job left mid-way, unless academi.cx already has it.
+
+    Uploaded documents are left alone: the dashboard harvester resolves them.
+    """
+    document = db.session.get(Document, document_id)
+    if document is None or document.status != 'processing' or document.academi_uploaded:
+        return False
+    document.status = 'failed'
+    document.error_message = error
+    db.session.commit()
+    return True
+
+
+def cancel(document_id):
+    """Cancel a document's queued job so no worker picks it up"""
+    cancelled = ProcessingJob.query.filter_by(document_id=document_id, status='queued')\
+                                   .update({ProcessingJob.status: 'cancelled',
+                                            ProcessingJob.finished_at: datetime.utcnow()},
+                                           synchronize_session=False)
+    db.session.commit()
+    return cancelled
+
+
+def queue_depth(lane=None):
+    """Number of jobs waiting to be claimed, in one lane or all of them"""
+    query = ProcessingJob.query.filter_by(status='queued')
+    if lane is not None:
+        query = query.filter_by(lane=lane)
+    return query.count()
+
+
+def running_count():
+    """Number of jobs currently claimed by any worker"""
+    return ProcessingJob.query.filter_by(status='running').count()
+
+
+def average_job_seconds(window=900):
+    """Average claim-to-finish time of jobs done in the last ``window`` seconds; None if there were none"""
+    since = datetime.utcnow() - timedelta(seconds=window)
+    jobs = db.session.query(ProcessingJob.claimed_at, ProcessingJob.finished_at).filter(
+        ProcessingJob.status == 'done',
+        ProcessingJob.finished_at >= since,
+        ProcessingJob.claimed_at.isnot(None)
+    ).all()
+    if not jobs:
+        return None
+    return sum((finished - claimed).total_seconds() for claimed, finished in jobs) / len(jobs)
+
+
+def recover_interrupted(stale_after=0):
+    """Resume documents whose processing was cut short by a crash or restart.
+
+    Running jobs whose lease has expired are treated as abandoned, as are
+    jobs claimed before leases existed (no ``lease_expires_at``) more than
+    ``stale_after`` seconds ago and ``processing`` documents with no active
+    job. Jobs other nodes still hold under a live lease are never touched.
+    Documents academi.cx already has go straight back to the dashboard
+    harvester; only documents that never made it upstream are queued for
+    upload again.
+
+    Returns ``(requeued, resumed)``: the number of documents queued for upload
+    and the number left for the harvester to pick up.
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=stale_after)
+    requeued = 0
+    resumed = set()
+
+    stale_jobs = ProcessingJob.query.filter(
+        ProcessingJob.status == 'running',
+        or_(ProcessingJob.lease_expires_at < now,
+            and_(ProcessingJob.lease_expires_at.is_(None), ProcessingJob.claimed_at <= cutoff))
+    ).all()
+    for job in stale_jobs:
+        outcome = _release(job)
+        if outcome == 'resumed':
+            resumed.add(job.document_id)
+        elif outcome == 'requeued':
+            requeued += 1
+
+    active = db.session.query(ProcessingJob.document_id)\
+                       .filter(ProcessingJob.status.in_(ACTIVE_STATUSES))
+    orphans = Document.query.filter(
+        Document.status == 'processing',
+        ~Document.id.in_(active)
+    ).all()
+    for document in orphans:
+        if document.academi_uploaded:
+            resumed.add(document.id)
+        else:
+            enqueue(document.id)
+            requeued += 1
+
+    return requeued, len(resumed)
@@ -0,0 +1,445 @@
+"""
+Local Similarity - offline similarity scoring against every stored document
+
+Documents are reduced to winnowed fingerprints: 64-bit hashes of word
+5-grams, keeping the minimum of every window of 4 consecutive hashes, which
+guarantees any shared passage of 8 or more words is detected. An inverted
+index maps each fingerprint to the documents containing it.
+
+On disk the index is a memory-mapped postings generation (parallel
+``hashes``/``docs`` arrays sorted by hash) plus an append-only delta of recent
+additions. Once the delta grows large, worker maintenance (or ``flask
+local-similarity merge``) merges it into a new generation, off the job path.
+Scoring a document is a batch of binary searches over the mapped arrays,
+vectorized with numpy when it is installed.
+
+``LocalSimilarityProcessor`` exposes the engine as the ``local`` processor
+backend (PROCESSOR_BACKEND=local) and, with LOCAL_SIMILARITY_FALLBACK, as the
+fallback when academi.cx cannot produce a report.
+"""
+
+import bisect
+import fcntl
+import heapq
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from operator import itemgetter
+
+try:
+    import numpy as np
+except ImportError:  # optional: pure-Python scoring without it
+    np = None
+
+from .models import db, Document
+from .metrics import metrics
+from .near_duplicate import _hash64
+from .processor_backend import ProcessorBackend, _config, _as_bool
+from .utils.pdf_report import write_text_pdf
+from .utils.text_extract import extract_text, words
+from .worker import get_worker_app
+
+SHINGLE_SIZE = 5
+WINDOW = 4
+MERGE_THRESHOLD = 500000
+# Postings buffered per write while streaming a merge without numpy
+MERGE_CHUNK = 65536
+
+DELTA_RECORD = struct.Struct('<QI')
+DOCUMENT_RECORD = struct.Struct('<II')
+
+
+def fingerprints(tokens, size=SHINGLE_SIZE, window=WINDOW):
+    """Winnowed fingerprint set of a token list"""
+    if not tokens:
+        return set()
+    if len(tokens) < size:
+        return {_hash64(' '.join(tokens).encode('utf-8'))}
+    hashes = [_hash64(' '.join(tokens[i:i + size]).encode('utf-8'))
+              for i in range(len(tokens) - size + 1)]
+    if len(hashes) <= window:
+        return {min(hashes)}
+    return {min(hashes[i:i + window]) for i in range(len(hashes) - window + 1)}
+
+
+class _Generation:
+    """One immutable, memory-mapped sorted postings generation"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._files = []
+        self.hashes = self._map('hashes', 'Q')
+        self.docs = self._map('docs', 'I')
+        self.count = len(self.hashes)
+
+    def _map(self, name, fmt):
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return memoryview(b'').cast(fmt)
+        f = open(path, 'rb')
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._files.append(f)
+        return memoryview(mapped).cast(fmt)
+
+    def postings(self, fingerprint):
+        index = bisect.bisect_left(self.hashes, fingerprint)
+        while index < self.count and self.hashes[index] == fingerprint:
+            yield self.docs[index]
+            index += 1
+
+
+class FingerprintIndex:
+    """Inverted fingerprint index shared by every process through its directory.
+
+    Layout: ``CURRENT`` names the active generation directory holding the
+    sorted ``hashes`` (uint64) and ``docs`` (uint32) arrays; ``delta.bin``
+    appends ``<hash, document id>`` pairs not merged yet and ``documents.bin``
+    appends ``<document id, fingerprint count>`` (a count of 0 removes).
+    """
+
+    def __init__(self, directory, merge_threshold=MERGE_THRESHOLD):
+        self.directory = directory
+        self.merge_threshold = merge_threshold
+        self._lock = threading.Lock()
+        self._generation_name = None
+        self._generation = None
+        self._reset()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _reset(self):
+        self._delta = defaultdict(set)
+        self._delta_offset = 0
+        self._delta_size = 0
+        self._lengths = {}
+        self._documents_offset = 0
+
+    def _read_current(self):
+        try:
+            with open(self._path('CURRENT')) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _read_tail(self, name, offset, record):
+        try:
+            with open(self._path(name), 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return offset, []
+        usable = len(data) - len(data) % record.size
+        return offset + usable, list(record.iter_unpack(data[:usable]))
+
+    def _refresh(self):
+        """Pick up merges and appends made by any process"""
+        name = self._read_current()
+        if name != self._generation_name:
+            self._generation_name = name
+            self._generation = _Generation(self._path(name)) if name else None
+            self._reset()
+        if os.path.exists(self._path('delta.bin')) and os.path.getsize(self._path('delta.bin')) < self._delta_offset:
+            self._reset()
+
+        self._delta_offset, records = self._read_tail('delta.bin', self._delta_offset, DELTA_RECORD)
+        for fingerprint, document_id in records:
+            self._delta[fingerprint].add(document_id)
+        self._delta_size += len(records)
+        self._documents_offset, records = self._read_tail('documents.bin', self._documents_offset, DOCUMENT_RECORD)
+        for document_id, count in records:
+            self._lengths[document_id] = count
+
+    def _exclusive(self):
+        os.makedirs(self.directory, exist_ok=True)
+        lock = open(self._path('index.lock'), 'a')
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    def __contains__(self, document_id):
+        with self._lock:
+            self._refresh()
+            return bool(self._lengths.get(document_id))
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return sum(1 for count in self._lengths.values() if count)
+
+    def add(self, document_id, document_fingerprints):
+        if not document_fingerprints:
+            return
+        with self._lock, self._exclusive():
+            self._refresh()
+            if self._lengths.get(document_id):
+                return
+            with open(self._path('delta.bin'), 'ab') as f:
+                f.write(b''.join(DELTA_RECORD.pack(fingerprint, document_id)
+                                 for fingerprint in document_fingerprints))
+            with open(self._path('documents.bin'), 'ab') as f:
+                f.write(DOCUMENT_RECORD.pack(document_id, len(document_fingerprints)))
+            self._refresh()
+
+    def remove(self, document_id):
+        with self._lock, self._exclusive():
+            self._refresh()
+            if self._lengths.get(document_id):
+                with open(self._path('documents.bin'), 'ab') as f:
+                    f.write(DOCUMENT_RECORD.pack(document_id, 0))
+                self._refresh()
+
+    @property
+    def needs_merge(self):
+        """Whether the delta has grown past ``merge_threshold`` postings"""
+        with self._lock:
+            self._refresh()
+            return self._delta_size >= self.merge_threshold
+
+    def merge(self):
+        """Fold the delta into a new sorted generation and drop removed documents"""
+        with self._lock, self._exclusive():
+            self._refresh()
+            self._merge()
+
+    def _merge(self):
+        alive = {document_id for document_id, count in self._lengths.items() if count}
+        delta = [(fingerprint, document_id)
+                 for fingerprint in sorted(self._delta)
+                 for document_id in self._delta[fingerprint] if document_id in alive]
+        # A document removed and added again is only kept with its new postings
+        kept = alive - {document_id for _, document_id in delta}
+
+        name = f"gen-{int(time.time() * 1000)}"
+        directory = self._path(name)
+        os.makedirs(directory)
+        # Both runs are sorted by hash, so they merge without sorting the corpus again
+        if np is not None:
+            self._merge_numpy(delta, kept, directory)
+        else:
+            self._merge_streaming(delta, kept, directory)
+        with open(self._path('documents.tmp'), 'wb') as f:
+            f.write(b''.join(DOCUMENT_RECORD.pack(document_id, self._lengths[document_id])
+                             for document_id in sorted(alive)))
+
+        with open(self._path('CURRENT.tmp'), 'w') as f:
+            f.write(name)
+        os.replace(self._path('CURRENT.tmp'), self._path('CURRENT'))
+        os.replace(self._path('documents.tmp'), self._path('documents.bin'))
+        open(self._path('delta.bin'), 'wb').close()
+
+        # Processes still mapping an old generation keep their open files
+        for entry in os.listdir(self.directory):
+            if entry.startswith('gen-') and entry != name:
+                shutil.rmtree(self._path(entry), ignore_errors=True)
+        self._generation_name = None
+        self._refresh()
+
+    def _merge_numpy(self, delta, kept, directory):
+        hashes = np.empty(0, dtype=np.uint64)
+        docs = np.empty(0, dtype=np.uint32)
+        if self._generation is not None and self._generation.count:
+            hashes = np.frombuffer(self._generation.hashes, dtype=np.uint64)
+            docs = np.frombuffer(self._generation.docs, dtype=np.uint32)
+            keep = np.isin(docs, np.fromiter(kept, dtype=np.uint32, count=len(kept)))
+            hashes, docs = hashes[keep], docs[keep]
+        delta_hashes = np.fromiter((fingerprint for fingerprint, _ in delta), dtype=np.uint64, count=len(delta))
+        delta_docs = np.fromiter((document_id for _, document_id in delta), dtype=np.uint32, count=len(delta))
+
+        at = np.searchsorted(hashes, delta_hashes, side='right')
+        np.insert(hashes, at, delta_hashes).tofile(os.path.join(directory, 'hashes'))
+        np.insert(docs, at, delta_docs).tofile(os.path.join(directory, 'docs'))
+
+    def _merge_streaming(self, delta, kept, directory):
+        generation = ()
+        if self._generation is not None:
+            generation = ((fingerprint, document_id)
+                          for fingerprint, document_id in zip(self._generation.hashes, self._generation.docs)
+                          if document_id in kept)
+        with open(os.path.join(directory, 'hashes'), 'wb') as hashes_file, \
+                open(os.path.join(directory, 'docs'), 'wb') as docs_file:
+            hashes, docs = array('Q'), array('I')
+            for fingerprint, document_id in heapq.merge(generation, delta, key=itemgetter(0)):
+                hashes.append(fingerprint)
+                docs.append(document_id)
+                if len(hashes) >= MERGE_CHUNK:
+                    hashes.tofile(hashes_file)
+                    docs.tofile(docs_file)
+                    hashes, docs = array('Q'), array('I')
+            hashes.tofile(hashes_file)
+            docs.tofile(docs_file)
+
+    def query(self, document_fingerprints, exclude=None):
+        """Match fingerprints against the index.
+
+        Returns ``(covered, shared)``: how many of the fingerprints occur in
+        at least one other document, and ``{document_id: shared fingerprints}``.
+        """
+        with self._lock:
+            self._refresh()
+            if np is not None and self._generation is not None and self._generation.count:
+                return self._query_numpy(document_fingerprints, exclude)
+            return self._query_python(document_fingerprints, exclude)
+
+    def _alive(self, document_id, exclude):
+        return document_id != exclude and bool(self._lengths.get(document_id))
+
+    def _query_python(self, document_fingerprints, exclude):
+        covered = 0
+        shared = defaultdict(int)
+        for fingerprint in document_fingerprints:
+            documents = set(self._delta.get(fingerprint, ()))
+            if self._generation is not None:
+                documents.update(self._generation.postings(fingerprint))
+            documents = [document_id for document_id in documents if self._alive(document_id, exclude)]
+            if documents:
+                covered += 1
+                for document_id in documents:
+                    shared[document_id] += 1
+        return covered, dict(shared)
+
+    def _query_numpy(self, document_fingerprints, exclude):
+        query = np.fromiter(document_fingerprints, dtype=np.uint64, count=len(document_fingerprints))
+        hashes = np.frombuffer(self._generation.hashes, dtype=np.uint64)
+        docs = np.frombuffer(self._generation.docs, dtype=np.uint32)
+
+        # Every posting of every query fingerprint, as (query position, document) pairs
+        low = np.searchsorted(hashes, query, side='left')
+        lengths = np.searchsorted(hashes, query, side='right') - low
+        positions = np.arange(lengths.sum()) + np.repeat(low - (np.cumsum(lengths) - lengths), lengths)
+        query_index = np.repeat(np.arange(query.size), lengths)
+        document_ids = docs[positions]
+
+        delta_pairs = [(i, document_id) for i, fingerprint in enumerate(query.tolist())
+                       for document_id in self._delta.get(fingerprint, ())]
+        if delta_pairs:
+            delta_pairs = np.array(delta_pairs, dtype=np.int64)
+            query_index = np.concatenate([query_index, delta_pairs[:, 0]])
+            document_ids = np.concatenate([document_ids, delta_pairs[:, 1]])
+
+        alive = np.array([document_id for document_id, count in self._lengths.items()
+                          if count and document_id != exclude], dtype=np.uint32)
+        keep = np.isin(document_ids, alive)
+        pairs = np.unique((query_index[keep].astype(np.uint64) << np.uint64(32)) | document_ids[keep].astype(np.uint64))
+
+        covered = np.unique(pairs >> np.uint64(32)).size
+        matched, counts = np.unique(pairs & np.uint64(0xFFFFFFFF), return_counts=True)
+        return int(covered), {int(document_id): int(count) for document_id, count in zip(matched, counts)}
+
+    def score(self, document_fingerprints, exclude=None, top=10):
+        """Percentage of the fingerprints found elsewhere and the best matching documents"""
+        if not document_fingerprints:
+            return 0.0, []
+        covered, shared = self.query(document_fingerprints, exclude)
+        total = len(document_fingerprints)
+        sources = sorted(shared.items(), key=lambda item: (-item[1], item[0]))[:top]
+        return round(100.0 * covered / total, 2), [(document_id, 100.0 * count / total)
+                                                   for document_id, count in sources]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Return the process-wide fingerprint index"""
+    global _index
+    directory = _config('LOCAL_SIMILARITY_DIR', os.path.abspath(os.path.join("status", "similarity")))
+    with _index_lock:
+        if _index is None or _index.directory != directory:
+            _index = FingerprintIndex(directory)
+        return _index
+
+
+def index_document(document, text=None):
+    """Add a processed document to the corpus; failures are logged, never raised"""
+    try:
+        if text is None:
+            text = extract_text(document.path)
+        get_index().add(document.id, fingerprints(words(text)))
+    except Exception as e:
+        print(f"⚠️  Could not add document {document.id} to the local similarity index: {str(e)}")
+
+
+def fallback_enabled():
+    return _as_bool(_config('LOCAL_SIMILARITY_FALLBACK', False))
+
+
+class LocalSimilarityProcessor(ProcessorBackend):
+    """Scores documents against the local corpus without contacting academi.cx"""
+
+    name = 'local'
+    pooled = False
+    requires_credentials = False
+
+    def attach(self, client):
+        pass
+
+    @property
+    def connected(self):
+        return True
+
+    def login(self):
+        return True
+
+    def score(self, document):
+        """Score a document and write its report; returns a results dict for ``record_results``"""
+        with metrics.timed('local_similarity.score_seconds'):
+            text = extract_text(document.path)
+            tokens = words(text)
+            index = get_index()
+            similarity, sources = index.score(fingerprints(tokens), exclude=document.id)
+
+        # Only the owner's own documents are named; the corpus is shared between users
+        names = {match.id: match.original_filename if match.user_id == document.user_id
+                 else 'document from another user'
+                 for match in Document.query.filter(Document.id.in_([source for source, _ in sources]))}
+        report_name = os.path.splitext(os.path.basename(document.path))[0] + "_similarity_report.pdf"
+        report_path = os.path.join(self.download_dir, report_name)
+        lines = [
+            f"Document: {document.original_filename}",
+            f"Checked: {datetime.utcnow().strftime('%Y-%m-%d %H:%M')} UTC",
+            f"Words: {len(tokens)}",
+            f"Similarity: {similarity:.2f}%",
+            f"Compared against {len(index)} stored document(s) by the local similarity engine.",
+            "",
+            "Matching documents:" if sources else "No matching documents found.",
+        ]
+        for source_id, share in sources:
+            lines.append(f"  {share:5.1f}%  {names.get(source_id, f'document {source_id}')}")
+        write_text_pdf(report_path, "Similarity Report", lines)
+
+        return {
+            'document_name': document.original_filename,
+            'processed_at': datetime.utcnow(),
+            'report_path': report_path,
+            'similarity_score': similarity,
+            'word_count': len(tokens),
+            'text': text
+        }
+
+    def process_document(self, document_id):
+        """Score a document locally and complete it"""
+        with get_worker_app().app_context():
+            document = Document.query.get(document_id)
+            if not document:
+                print(f"❌ Document {document_id} not found")
+                return False
+            try:
+                print(f"🧮 Scoring document locally: {document.original_filename}")
+                self.record_results(document, self.score(document))
+                document.error_message = None
+                db.session.commit()
+                print(f"✅ Local similarity {document.similarity_score:.2f}% for document {document_id}")
+                return True
+            except Exception as e:
+                print(f"❌ Local scoring failed: {str(e)}")
+                document.status = 'failed'
+                document.error_message = str(e)
+                db.session.commit()
+                return False
@@ -10,6 +10,13 @@ bp = Blueprint('main', __name__)
 # Import models and forms after creating the blueprint to avoid circular imports
 from ..models import db, Document
 from ..forms import DocumentUploadForm
+from ..job_queue import enqueue
+from ..scheduler import queue_position
+from ..dedup import save_and_hash, find_exact_duplicate, flag_exact_copy, reuse_results
+from ..near_duplicate import check_upload, get_index
+from .. import local_similarity
+from ..metrics import metrics
+from ..dispatch import run_blocking
 
 def allowed_file(filename):
     return '.' in filename and \
@@ -61,8 +68,8 @@ def upload():
         os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
         filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
         
-        # Save the file
-        file.save(filepath)
+        # Save the file, hashing it on the way to disk
+        content_sha256 = save_and_hash(file, filepath)
         
         # Create document record
         document = Document(
@@ -71,20 +78,33 @@ def upload():
             path=filepath,
             user_id=current_user.id,
             status='processing',
-            uploaded_at=datetime.utcnow()
+            uploaded_at=datetime.utcnow(),
+            content_sha256=content_sha256
         )
         
         db.session.add(document)
+
+        # Identical bytes this user already checked: reuse that report instead of resubmitting
+        duplicate = find_exact_duplicate(content_sha256, current_user.id)
+        if duplicate:
+            reuse_results(document, duplicate)
+            db.session.commit()
+            metrics.incr('uploads_deduplicated_total')
+            flash('This document was already checked - its results are ready', 'success')
+            return redirect(url_for('main.dashboard'))
+
         db.session.commit()
 
-        # Process document for plagiarism in background
-        from ..document_processor import process_document_background
-        from threading import Thread
+        # Queue the document; a worker process picks it up
+        enqueue(document.id)
 
-        # Start background processing
-        processing_thread = Thread(target=process_document_background, args=(document.id,))
-        processing_thread.daemon = True
-        processing_thread.start()
+        # Instant local hint while academi.cx runs the real check; another user's identical file is a copy
+        match = flag_exact_copy(document) or check_upload(document)
+        if match:
+            db.session.commit()
+            flash(f'Document uploaded and is being processed. It is about '
+                  f'{document.near_duplicate_score * 100:.0f}% similar to a previously checked document.', 'info')
+            return redirect(url_for('main.dashboard'))
 
         flash('Document uploaded successfully and is being processed', 'success')
         return redirect(url_for('main.dashboard'))
@@ -106,7 +126,9 @@ def view_document(document_id):
     if document.report_path and os.path.exists(os.path.join(current_app.config['DOWNLOAD_DIR'], document.report_path)):
         report_exists = True
 
-    return render_template('view_document.html', document=document, report_exists=report_exists)
+    queue = queue_position(document.id) if document.status == 'processing' else None
+
+    return render_template('view_document.html', document=document, report_exists=report_exists, queue=queue)
 
 @bp.route('/download/<path:filename>')
 @login_required
@@ -180,15 +202,11 @@ def reprocess_document(document_id):
     document.error_message = None
     document.academi_uploaded = False  # Reset upload flag to allow re-upload
     document.academi_upload_time = None
+    document.academi_upload_name = None  # A fresh upload gets a fresh name
     db.session.commit()
 
-    # Start background processing
-    from ..document_processor import process_document_background
-    from threading import Thread
-
-    processing_thread = Thread(target=process_document_background, args=(document.id,))
-    processing_thread.daemon = True
-    processing_thread.start()
+    # Queue the document again; a worker process picks it up
+    enqueue(document.id)
 
     flash('Document reprocessing started', 'info')
     return redirect(url_for('main.view_document', document_id=document_id))
@@ -212,9 +230,14 @@ def delete_document(document_id):
         flash('Error deleting file', 'danger')
         return redirect(url_for('main.dashboard'))
     
-    # Delete the database record
+    # Delete the database record, and forget it as a near-duplicate source
+    Document.query.filter_by(near_duplicate_of_id=document.id)\
+                  .update({Document.near_duplicate_of_id: None, Document.near_duplicate_score: None})
     db.session.delete(document)
     db.session.commit()
+    get_index().remove(document_id)
+    # Waits on the index's file lock
+    run_blocking(local_similarity.get_index().remove, document_id)
     
     flash('Document deleted successfully', 'success')
     return redirect(url_for('main.dashboard'))
@@ -233,7 +256,10 @@ def document_status(document_id):
         'status': document.status,
         'similarity_score': document.similarity_score,
         'processed_at': document.processed_at.isoformat() if document.processed_at else None,
-        'report_available': bool(document.report_path)
+        'report_available': bool(document.report_path),
+        'near_duplicate_score': document.near_duplicate_score,
+        # Lane, position, seconds waited and estimated seconds to start while still queued
+        'queue': queue_position(document.id) if document.status == 'processing' else None
     })
 
 @bp.route('/health')
@@ -0,0 +1,171 @@
+"""
+Metrics - in-process counters, gauges and summaries for the processing pipeline
+
+Every process keeps its own registry. Job and harvester processes send what
+they recorded to their worker, and workers and web processes export their
+snapshot to ``metrics-<source>.json`` files in one directory, which
+``aggregate`` combines for the admin metrics page.
+"""
+
+import glob
+import json
+import os
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Metrics:
+    """Thread-safe registry of named counters, gauges and value summaries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._summaries = {}
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, value):
+        """Record one observation (a latency, a count per item, ...)"""
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                summary = self._summaries[name] = {'count': 0, 'sum': 0.0, 'min': value, 'max': value}
+            summary['count'] += 1
+            summary['sum'] += value
+            summary['min'] = min(summary['min'], value)
+            summary['max'] = max(summary['max'], value)
+
+    @contextmanager
+    def timed(self, name):
+        """Observe how many seconds the block took"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - started)
+
+    def snapshot(self):
+        with self._lock:
+            summaries = {}
+            for name, summary in self._summaries.items():
+                summaries[name] = dict(summary, avg=summary['sum'] / summary['count'])
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'summaries': summaries
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+
+    def drain(self):
+        """Return a snapshot and reset, so a child process can hand its metrics to its parent"""
+        with self._lock:
+            snapshot = {
+                'counters': self._counters,
+                'gauges': self._gauges,
+                'summaries': self._summaries
+            }
+            self._counters, self._gauges, self._summaries = {}, {}, {}
+            return snapshot
+
+    def merge(self, snapshot):
+        """Add the counters and observations of another registry's snapshot, taking its gauges"""
+        with self._lock:
+            for name, value in snapshot.get('counters', {}).items():
+                self._counters[name] = self._counters.get(name, 0) + value
+            self._gauges.update(snapshot.get('gauges', {}))
+            for name, other in snapshot.get('summaries', {}).items():
+                _merge_summary(self._summaries, name, other)
+
+
+def _merge_summary(summaries, name, other):
+    summary = summaries.get(name)
+    if summary is None:
+        summaries[name] = {key: other[key] for key in ('count', 'sum', 'min', 'max')}
+        return
+    summary['count'] += other['count']
+    summary['sum'] += other['sum']
+    summary['min'] = min(summary['min'], other['min'])
+    summary['max'] = max(summary['max'], other['max'])
+
+
+# Process-wide registry
+metrics = Metrics()
+
+
+def export(directory, source, registry=None):
+    """Write the registry's snapshot to ``directory/metrics-<source>.json``, replacing it atomically"""
+    registry = registry or metrics
+    os.makedirs(directory, exist_ok=True)
+    name = re.sub(r'[^\w.-]', '_', source)
+    path = os.path.join(directory, f"metrics-{name}.json")
+    data = dict(registry.snapshot(), source=source, pid=os.getpid(), written_at=time.time())
+    with open(path + '.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+_next_process_export = 0
+
+
+def export_process_metrics(directory, interval=0):
+    """Export this web process's metrics as ``web-<host>-<pid>``, at most once per ``interval`` seconds"""
+    global _next_process_export
+    if not directory or time.monotonic() < _next_process_export:
+        return
+    _next_process_export = time.monotonic() + interval
+    try:
+        export(directory, f"web-{socket.gethostname()}-{os.getpid()}")
+    except OSError as e:
+        print(f"⚠️  Exporting metrics failed: {str(e)}")
+
+
+def aggregate(directory, max_age=None):
+    """Combine every exported snapshot in ``directory``.
+
+    Counters and summaries are summed over all sources; gauges describe one
+    process each, so they are kept per source. ``sources`` maps each source
+    to when it last exported (epoch seconds). Snapshots older than
+    ``max_age`` seconds belong to processes that have exited (or gone idle)
+    and are deleted; a live process writes its whole snapshot again on its
+    next export.
+    """
+    counters, summaries, gauges, sources = {}, {}, {}, {}
+    now = time.time()
+    for path in sorted(glob.glob(os.path.join(directory, 'metrics-*.json'))):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if max_age is not None and now - data.get('written_at', 0) > max_age:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        source = data.get('source', os.path.basename(path))
+        sources[source] = data.get('written_at')
+        gauges[source] = data.get('gauges', {})
+        for name, value in data.get('counters', {}).items():
+            counters[name] = counters.get(name, 0) + value
+        for name, summary in data.get('summaries', {}).items():
+            _merge_summary(summaries, name, summary)
+    for summary in summaries.values():
+        summary['avg'] = summary['sum'] / summary['count'] if summary['count'] else 0.0
+    return {'counters': counters, 'gauges': gauges, 'summaries': summaries, 'sources': sources}
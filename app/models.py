@@ -15,6 +15,8 @@ class User(db.Model, UserMixin):
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
+    # Share of the processing workers relative to other users with queued documents
+    queue_weight = db.Column(db.Integer, default=1, nullable=False)
     
     # Relationships
     documents = db.relationship('Document', backref='author', lazy='dynamic')
@@ -45,6 +47,20 @@ class Document(db.Model):
     # Track upload state to prevent duplicate uploads
     academi_uploaded = db.Column(db.Boolean, default=False)
     academi_upload_time = db.Column(db.DateTime, nullable=True)
+    # Unique name the document was uploaded under; the harvester matches dashboard rows on it
+    academi_upload_name = db.Column(db.String(255), nullable=True, index=True)
+    # Seconds spent waiting for academi.cx to confirm the upload
+    academi_upload_wait = db.Column(db.Float, nullable=True)
+    # SHA-256 of the uploaded bytes; identical resubmissions reuse an earlier report
+    content_sha256 = db.Column(db.String(64), nullable=True, index=True)
+    # Closest previously processed document by text similarity, flagged at upload time
+    near_duplicate_of_id = db.Column(db.Integer, db.ForeignKey('document.id', ondelete='SET NULL'), nullable=True)
+    near_duplicate_score = db.Column(db.Float, nullable=True)
+
+    # Processing jobs are removed together with their document
+    jobs = db.relationship('ProcessingJob', backref='document', lazy='dynamic',
+                           cascade='all, delete-orphan')
+    near_duplicate_of = db.relationship('Document', remote_side=[id], foreign_keys=[near_duplicate_of_id])
 
     # Computed/alias properties for template and route compatibility
     @property
@@ -91,6 +107,37 @@ class Document(db.Model):
         except:
             return 'Unknown'
 
+class ProcessingJob(db.Model):
+    """A unit of background work on a document, claimed by exactly one worker"""
+    __tablename__ = 'processing_jobs'
+    __table_args__ = (
+        db.Index('ix_processing_jobs_status_created', 'status', 'created_at'),
+        db.Index('ix_processing_jobs_status_lane', 'status', 'lane'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('document.id'), nullable=False, index=True)
+    # queued -> running -> done / failed
+    status = db.Column(db.String(20), default='queued', nullable=False)
+    # Priority lane, lower runs first: 0 priority, 1 interactive, 2 batch (see scheduler.py)
+    lane = db.Column(db.Integer, default=2, nullable=False)
+    attempts = db.Column(db.Integer, default=0)
+    worker_id = db.Column(db.String(100), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    # The claiming worker owns the job until then; its heartbeats keep pushing it out
+    lease_expires_at = db.Column(db.DateTime, nullable=True, index=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+class WorkerLease(db.Model):
+    """A named, time-limited role only one worker may hold at a time (e.g. the harvester)"""
+    __tablename__ = 'worker_leases'
+
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
 # User loader function for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
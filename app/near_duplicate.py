@@ -0,0 +1,282 @@
+"""
+Near-Duplicate Index - MinHash/LSH over the text of processed documents
+
+Every completed document gets a 128-value MinHash signature of its word
+5-shingles. Signatures are split into 16 bands of 8 values; documents sharing
+any band are candidates, and candidates are ranked by the share of equal
+signature values (an estimate of shingle Jaccard similarity). A lookup touches
+only the candidates, so it stays in the milliseconds as the corpus grows.
+
+The index lives in an append-only binary file: a magic header followed by
+records of ``<document id uint32><kind uint8>`` and, for additions, the
+signature as 128 little-endian uint32 values. Each process replays the file
+on first use and then only reads what other processes appended since.
+"""
+
+import hashlib
+import os
+import struct
+import threading
+from array import array
+from collections import defaultdict
+
+from .metrics import metrics
+from .dispatch import run_blocking
+from .utils.text_extract import extract_text, words
+
+NUM_HASHES = 128
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+SHINGLE_SIZE = 5
+
+MAGIC = b'NDUP1\n'
+RECORD_REMOVE = 0
+RECORD_ADD = 1
+RECORD_HEADER = struct.Struct('<IB')
+SIGNATURE_BYTES = NUM_HASHES * 4
+
+_EMPTY = 1 << 32
+
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """64-bit hashes of the word ``size``-shingles of ``text``"""
+    tokens = words(text)
+    if not tokens:
+        return set()
+    if len(tokens) < size:
+        return {_hash64(' '.join(tokens).encode('utf-8'))}
+    return {_hash64(' '.join(tokens[i:i + size]).encode('utf-8'))
+            for i in range(len(tokens) - size + 1)}
+
+
+def minhash(hashes, num_hashes=NUM_HASHES):
+    """One-permutation MinHash signature of a set of 64-bit hashes, or None if it is empty.
+
+    The low bits of each hash pick a slot and the high 32 bits compete for
+    that slot's minimum, so the signature costs one pass over the shingles
+    instead of one pass per hash function. Empty slots borrow the value of the
+    next filled slot so short texts still compare correctly.
+    """
+    if not hashes:
+        return None
+    slots = [_EMPTY] * num_hashes
+    for h in hashes:
+        slot = h % num_hashes
+        value = h >> 32
+        if value < slots[slot]:
+            slots[slot] = value
+
+    if _EMPTY in slots:
+        filled = [i for i, value in enumerate(slots) if value != _EMPTY]
+        dense = list(slots)
+        for i in range(num_hashes):
+            if slots[i] == _EMPTY:
+                donor = next((j for j in filled if j > i), filled[0])
+                dense[i] = slots[donor]
+        slots = dense
+    return array('I', slots)
+
+
+def estimate_similarity(a, b):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def signature_for_file(path):
+    """MinHash signature of a document's text; None if no text could be extracted"""
+    return minhash(shingle_hashes(extract_text(path)))
+
+
+class NearDuplicateIndex:
+    """LSH index of document signatures backed by an append-only file"""
+
+    def __init__(self, path, threshold=0.8):
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._signatures = {}
+        self._buckets = defaultdict(set)
+        self._offset = 0
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._signatures)
+
+    @staticmethod
+    def _band_keys(signature):
+        raw = signature.tobytes()
+        for band in range(BANDS):
+            yield band, raw[band * ROWS * 4:(band + 1) * ROWS * 4]
+
+    def _apply(self, document_id, signature):
+        old = self._signatures.pop(document_id, None)
+        if old is not None:
+            for key in self._band_keys(old):
+                self._buckets[key].discard(document_id)
+        if signature is not None:
+            self._signatures[document_id] = signature
+            for key in self._band_keys(signature):
+                self._buckets[key].add(document_id)
+
+    def _reset(self):
+        self._signatures.clear()
+        self._buckets.clear()
+        self._offset = 0
+
+    def _refresh(self):
+        """Replay records appended to the index file since the last read"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            self._reset()
+            return
+        if size < self._offset:
+            # File was rebuilt by another process
+            self._reset()
+        if size == self._offset:
+            return
+
+        with open(self.path, 'rb') as f:
+            if self._offset == 0:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f"{self.path} is not a near-duplicate index")
+                self._offset = len(MAGIC)
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+
+        position = 0
+        while position + RECORD_HEADER.size <= len(data):
+            document_id, kind = RECORD_HEADER.unpack_from(data, position)
+            end = position + RECORD_HEADER.size + (SIGNATURE_BYTES if kind == RECORD_ADD else 0)
+            if end > len(data):
+                # Record still being written by another process
+                break
+            signature = None
+            if kind == RECORD_ADD:
+                signature = array('I')
+                signature.frombytes(data[position + RECORD_HEADER.size:end])
+            self._apply(document_id, signature)
+            position = end
+        self._offset += position
+
+    @staticmethod
+    def _record(document_id, signature):
+        if signature is None:
+            return RECORD_HEADER.pack(document_id, RECORD_REMOVE)
+        return RECORD_HEADER.pack(document_id, RECORD_ADD) + signature.tobytes()
+
+    def _append(self, record):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size == 0:
+                record = MAGIC + record
+            # One write per record so concurrent appends never interleave
+            os.write(fd, record)
+        finally:
+            os.close(fd)
+
+    def add(self, document_id, signature):
+        with self._lock:
+            self._refresh()
+            self._append(self._record(document_id, signature))
+            self._refresh()
+
+    def remove(self, document_id):
+        with self._lock:
+            self._refresh()
+            if document_id in self._signatures:
+                self._append(self._record(document_id, None))
+                self._refresh()
+
+    def query(self, signature, exclude=None, limit=5):
+        """Indexed documents at least ``threshold`` similar, as ``(document_id, similarity)`` best first"""
+        with self._lock:
+            self._refresh()
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+            candidates.discard(exclude)
+
+            matches = []
+            for document_id in candidates:
+                similarity = estimate_similarity(signature, self._signatures[document_id])
+                if similarity >= self.threshold:
+                    matches.append((document_id, similarity))
+        matches.sort(key=lambda match: (-match[1], -match[0]))
+        return matches[:limit]
+
+    def rebuild(self, entries):
+        """Replace the whole index with ``(document_id, signature)`` pairs, compacting the file"""
+        partial = self.path + '.tmp'
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(partial, 'wb') as f:
+            f.write(MAGIC)
+            for document_id, signature in entries:
+                f.write(self._record(document_id, signature))
+        with self._lock:
+            os.replace(partial, self.path)
+            self._reset()
+            self._refresh()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Return the process-wide near-duplicate index"""
+    global _index
+    from .processor_backend import _config
+
+    path = _config('NEAR_DUPLICATE_INDEX', os.path.abspath(os.path.join("status", "near_duplicates.idx")))
+    with _index_lock:
+        if _index is None or _index.path != path:
+            _index = NearDuplicateIndex(path, threshold=_config('NEAR_DUPLICATE_THRESHOLD', 0.8, float))
+        return _index
+
+
+def index_document(document, text=None):
+    """Add a processed document to the index; failures are logged, never raised"""
+    try:
+        if text is None:
+            text = run_blocking(extract_text, document.path)
+        signature = minhash(shingle_hashes(text))
+        if signature is not None:
+            get_index().add(document.id, signature)
+    except Exception as e:
+        print(f"⚠️  Could not index document {document.id} for near-duplicate checks: {str(e)}")
+
+
+def check_upload(document):
+    """Flag ``document`` as a near-duplicate of the closest processed document.
+
+    Sets ``near_duplicate_of_id`` and ``near_duplicate_score`` and returns the
+    matched document, or None when nothing is similar enough.
+    """
+    from .models import Document
+
+    with metrics.timed('near_duplicate.check_seconds'):
+        try:
+            # Text extraction is CPU bound; keep it off the request's event loop
+            signature = run_blocking(signature_for_file, document.path)
+            if signature is None:
+                return None
+            index = get_index()
+            for document_id, similarity in index.query(signature, exclude=document.id):
+                match = Document.query.get(document_id)
+                if match is None:
+                    index.remove(document_id)
+                    continue
+                document.near_duplicate_of_id = match.id
+                document.near_duplicate_score = similarity
+                metrics.incr('near_duplicates_flagged_total')
+                return match
+        except Exception as e:
+            print(f"⚠️  Near-duplicate check failed: {str(e)}")
+    return None
@@ -0,0 +1,338 @@
+"""
+Processor Backends - the contract every way of talking to academi.cx implements
+
+``DocumentProcessor`` (Selenium, in document_processor.py) and ``HttpProcessor``
+(pooled HTTP sessions, in http_processor.py) both implement it, and
+``LocalSimilarityProcessor`` (local_similarity.py) scores documents offline.
+The PROCESSOR_BACKEND setting picks which one the app uses.
+"""
+
+import atexit
+import os
+import threading
+import uuid
+from datetime import datetime
+from flask import current_app, has_app_context
+
+from .models import db, Document
+from .browser_pool import BrowserPool, RecyclePolicy
+from .session_store import CookieStore
+from .worker import get_worker_app, job_cancelled
+
+ACADEMI_LOGIN_URL = "https://academi.cx/login/"
+ACADEMI_DASHBOARD_URL = "https://academi.cx/dashboard"
+
+
+def _config(name, default=None, cast=str):
+    """Read a setting from the Flask config, or the environment outside an app context"""
+    if has_app_context():
+        return current_app.config.get(name, default)
+    value = os.getenv(name)
+    return default if value is None else cast(value)
+
+
+def _as_bool(value):
+    return str(value).lower() in ['true', 'on', '1']
+
+
+class ProcessorBackend:
+    """Shared document flow on top of backend specific academi.cx operations.
+
+    Subclasses implement the session lifecycle (``start_session``,
+    ``session_is_healthy``, ``close_session``, ``attach``) and the academi.cx
+    operations (``login``, ``upload_document``, ``scan_dashboard``,
+    ``extract_results``); ``upload_stage`` and ``process_document`` are shared.
+    """
+
+    name = None
+    # Setting holding the number of pooled sessions for this backend
+    pool_size_setting = None
+    # Backends that never talk to academi.cx need neither a session pool nor credentials
+    pooled = True
+    requires_credentials = True
+
+    def __init__(self, email=None, password=None):
+        """Initialize the document processor"""
+        self.email = email or os.getenv('ACADEMI_EMAIL')
+        self.password = password or os.getenv('ACADEMI_PASSWORD')
+
+        if self.requires_credentials and (not self.email or not self.password):
+            raise ValueError("ACADEMI_EMAIL and ACADEMI_PASSWORD environment variables must be set")
+        self.download_dir = _config('DOWNLOAD_DIR', os.path.abspath("downloads"))
+        self.last_upload_wait = None
+        self.cookie_store = CookieStore(
+            _config('ACADEMI_COOKIE_STORE', os.path.abspath(os.path.join("status", "academi_session.json"))),
+            max_age=_config('ACADEMI_SESSION_MAX_AGE', 12 * 60 * 60, int)
+        )
+
+        # Ensure download directory exists
+        os.makedirs(self.download_dir, exist_ok=True)
+
+    # Session lifecycle, used by the session pool
+
+    @classmethod
+    def prepare(cls):
+        """One-time, per-process setup before the first session starts"""
+
+    @classmethod
+    def start_session(cls):
+        """Return a new client that is already logged into academi.cx"""
+        raise NotImplementedError
+
+    @classmethod
+    def session_is_healthy(cls, client):
+        """Whether a pooled client still responds and is still logged in"""
+        raise NotImplementedError
+
+    @classmethod
+    def close_session(cls, client):
+        raise NotImplementedError
+
+    @classmethod
+    def recycle_session(cls, client):
+        """Shut down a client the recycle policy has retired"""
+        cls.close_session(client)
+
+    @classmethod
+    def session_memory(cls, client):
+        """Resident memory in bytes held by a client, or None when it cannot be measured"""
+        return None
+
+    def attach(self, client):
+        """Use a client checked out of the session pool"""
+        raise NotImplementedError
+
+    @property
+    def connected(self):
+        raise NotImplementedError
+
+    # academi.cx operations
+
+    def login(self):
+        raise NotImplementedError
+
+    def upload_document(self, file_path, unique_name=None):
+        """Upload a file and return the unique name academi.cx lists it under, or None.
+
+        ``unique_name`` is the name to upload under; a new one is generated
+        when it is not given.
+        """
+        raise NotImplementedError
+
+    def scan_dashboard(self):
+        """Load the dashboard once and return its rows as ``{'text', 'ready'}`` dicts"""
+        raise NotImplementedError
+
+    def extract_results(self, document_name):
+        """Download the report for a ready document; returns a results dict or None"""
+        raise NotImplementedError
+
+    def cleanup(self):
+        """Clean up resources"""
+
+    # Shared document flow
+
+    def generate_unique_name(self, original_name):
+        """Generate unique filename"""
+        base, ext = os.path.splitext(original_name)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        unique_id = str(uuid.uuid4())[:8]
+        return f"{base}_{timestamp}_{unique_id}{ext}"
+
+    def record_results(self, document, results):
+        """Mark a document as completed with its downloaded report"""
+        document.status = 'completed'
+        document.processed_at = results['processed_at']
+
+        # Scores are only known when the backend computes them; the academi.cx PDF carries none
+        document.similarity_score = results.get('similarity_score', 0.0)
+        document.ai_percentage = results.get('ai_percentage', 0.0)
+        document.word_count = results.get('word_count', 0)
+
+        # Store report path if available
+        if 'report_path' in results:
+            # Store relative path for web access
+            document.report_path = os.path.basename(results['report_path'])
+
+        # Make the document available to near-duplicate checks and local scoring of later uploads
+        from .near_duplicate import index_document
+        from .local_similarity import index_document as index_fingerprints
+        from .utils.text_extract import extract_text
+        text = results.get('text')
+        if text is None:
+            text = extract_text(document.path)
+        index_document(document, text)
+        index_fingerprints(document, text)
+
+    def reserve_upload_name(self, document):
+        """Claim the name a document is uploaded under before uploading it.
+
+        The name is written with a compare-and-set, so of several workers
+        running the same document only one reserves a new name. Returns
+        ``(name, reused)``: ``reused`` is True when an earlier attempt had
+        already reserved the name and may have uploaded it.
+        """
+        name = self.generate_unique_name(os.path.basename(document.path))
+        reserved = Document.query.filter_by(id=document.id, academi_upload_name=None).update(
+            {Document.academi_upload_name: name}, synchronize_session=False)
+        db.session.commit()
+        db.session.refresh(document)
+        return document.academi_upload_name, not reserved
+
+    def upload_stage(self, document_id):
+        """Upload a document to academi.cx unless that already happened.
+
+        Returns True once the document is on academi.cx and waiting to be
+        harvested, False if it failed. Safe to repeat after a crash or a
+        reclaimed lease: a document whose reserved name is already listed on
+        the dashboard is not uploaded a second time.
+        """
+        with get_worker_app().app_context():
+            try:
+                # Get document from database
+                document = Document.query.get(document_id)
+                if not document:
+                    print(f"❌ Document {document_id} not found")
+                    return False
+
+                print(f"🚀 Starting processing for document: {document.original_filename}")
+
+                # Check if document is completed
+                if document.status == 'completed':
+                    print(f"ℹ️  Document already completed")
+                    return True
+
+                # Update status to processing
+                document.status = 'processing'
+                db.session.commit()
+
+                # Check if document was already uploaded to academi.cx
+                if document.academi_uploaded:
+                    print("ℹ️  Document already uploaded to academi.cx, waiting for results...")
+                    return True
+
+                # Setup session and login
+                if not self.connected:
+                    if not self.login():
+                        document.status = 'failed'
+                        document.error_message = 'Failed to login to academi.cx'
+                        db.session.commit()
+                        return False
+
+                print("📤 Uploading document to academi.cx...")
+                print(f"📁 File path: {document.path}")
+
+                if not os.path.exists(document.path):
+                    print(f"❌ File not found at path: {document.path}")
+                    document.status = 'failed'
+                    document.error_message = f'Uploaded file not found: {document.path}'
+                    db.session.commit()
+                    return False
+
+                unique_name, reused = self.reserve_upload_name(document)
+                if reused and any(unique_name in row['text'] for row in self.scan_dashboard()):
+                    print(f"ℹ️  Earlier upload of {unique_name} found on academi.cx, not uploading again")
+                    uploaded_name = unique_name
+                    self.last_upload_wait = 0.0
+                elif job_cancelled():
+                    # Thread workers cannot kill a job; it stops here once another worker owns it
+                    print("⚠️  Job lost its lease to another worker, leaving the upload to it")
+                    return False
+                else:
+                    uploaded_name = self.upload_document(document.path, unique_name)
+                if not uploaded_name:
+                    document.status = 'failed'
+                    document.error_message = 'Failed to upload document to academi.cx'
+                    db.session.commit()
+                    return False
+
+                # Mark as uploaded and save timestamp
+                document.academi_uploaded = True
+                document.academi_upload_time = datetime.utcnow()
+                document.academi_upload_wait = self.last_upload_wait
+                db.session.commit()
+                print(f"✅ Document uploaded successfully to academi.cx as: {uploaded_name}")
+                return True
+
+            except Exception as e:
+                print(f"❌ Error processing document: {str(e)}")
+                try:
+                    document.status = 'failed'
+                    document.error_message = str(e)
+                    db.session.commit()
+                except:
+                    pass
+                return False
+
+    def process_document(self, document_id):
+        """Process a single document by ID.
+
+        Uploads the document, then waits for the shared dashboard harvester to
+        pick up its report instead of polling the dashboard on its own.
+        """
+        if not self.upload_stage(document_id):
+            return False
+
+        from .harvester import get_harvester
+        return get_harvester().wait_for(document_id)
+
+
+def get_processor_class(name=None):
+    """Return the backend class selected by ``name`` or PROCESSOR_BACKEND"""
+    name = (name or _config('PROCESSOR_BACKEND', 'selenium')).lower()
+    if name == 'selenium':
+        from .document_processor import DocumentProcessor
+        return DocumentProcessor
+    if name == 'http':
+        from .http_processor import HttpProcessor
+        return HttpProcessor
+    if name == 'local':
+        from .local_similarity import LocalSimilarityProcessor
+        return LocalSimilarityProcessor
+    raise ValueError(f"Unknown PROCESSOR_BACKEND: {name}")
+
+
+def create_processor(client=None, backend=None):
+    """Create a processor for the configured backend, optionally attached to a pooled client"""
+    processor = get_processor_class(backend)()
+    if client is not None:
+        processor.attach(client)
+    return processor
+
+
+_session_pools = {}
+_session_pools_lock = threading.Lock()
+
+
+def get_session_pool(backend=None):
+    """Return the process-wide pool of logged-in sessions for a backend"""
+    backend_cls = get_processor_class(backend)
+    with _session_pools_lock:
+        pool = _session_pools.get(backend_cls.name)
+        if pool is None:
+            backend_cls.prepare()
+            recycle = RecyclePolicy(
+                max_jobs=_config('BROWSER_RECYCLE_JOBS', 0, int),
+                max_age=_config('BROWSER_RECYCLE_AGE', 0, int),
+                max_rss=_config('BROWSER_RECYCLE_RSS_MB', 0, int) * 1024 * 1024,
+                memory=backend_cls.session_memory
+            )
+            pool = BrowserPool(
+                backend_cls.start_session,
+                size=_config(backend_cls.pool_size_setting, 2, int),
+                health_check=backend_cls.session_is_healthy,
+                closer=backend_cls.close_session,
+                recycle=recycle,
+                recycler=backend_cls.recycle_session
+            )
+            atexit.register(pool.close)
+            _session_pools[backend_cls.name] = pool
+        return pool
+
+
+def resize_session_pools(size):
+    """Resize every session pool this process has started; see BrowserPool.resize"""
+    with _session_pools_lock:
+        pools = list(_session_pools.values())
+    for pool in pools:
+        pool.resize(size)
@@ -0,0 +1,129 @@
+"""
+Scheduler - decides which queued job is claimed next, and where a document stands in the queue
+
+Jobs wait in priority lanes: documents of admins first, then documents
+submitted while their owner had nothing else queued, then everything else
+(bulk submissions). Within a lane users take turns: the next job goes to
+the user who had the fewest jobs claimed in the last ``FAIR_SHARE_WINDOW``
+seconds relative to their ``queue_weight``, so someone uploading 200
+documents gets their share of the workers instead of all of them. Each
+user's own jobs still run in submission order.
+"""
+
+import math
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from .models import db, User, Document, ProcessingJob
+
+LANE_PRIORITY = 0
+LANE_INTERACTIVE = 1
+LANE_BATCH = 2
+LANE_NAMES = {LANE_PRIORITY: 'priority', LANE_INTERACTIVE: 'interactive', LANE_BATCH: 'batch'}
+
+FAIR_SHARE_WINDOW = 600
+THROUGHPUT_WINDOW = 900
+
+
+def assign_lane(document):
+    """Lane a newly queued document goes into"""
+    if document.author is not None and document.author.is_admin:
+        return LANE_PRIORITY
+    others = ProcessingJob.query.join(Document, ProcessingJob.document_id == Document.id).filter(
+        Document.user_id == document.user_id,
+        ProcessingJob.document_id != document.id,
+        ProcessingJob.status.in_(('queued', 'running'))
+    ).count()
+    return LANE_BATCH if others else LANE_INTERACTIVE
+
+
+def _user_weights(user_ids):
+    weights = dict(db.session.query(User.id, User.queue_weight).filter(User.id.in_(user_ids)))
+    return {user_id: max(1, weights.get(user_id) or 1) for user_id in user_ids}
+
+
+def _recent_claims(user_ids, now, window):
+    return dict(
+        db.session.query(Document.user_id, func.count(ProcessingJob.id))
+        .join(Document, ProcessingJob.document_id == Document.id)
+        .filter(Document.user_id.in_(user_ids),
+                ProcessingJob.claimed_at >= now - timedelta(seconds=window))
+        .group_by(Document.user_id)
+    )
+
+
+def next_candidates(window=FAIR_SHARE_WINDOW):
+    """Ids of queued jobs to try claiming, most deserving first.
+
+    One job per user with work in the best non-empty lane: their oldest,
+    ordered by recent claims per weight, then by age.
+    """
+    lane = db.session.query(func.min(ProcessingJob.lane)).filter(ProcessingJob.status == 'queued').scalar()
+    if lane is None:
+        return []
+    heads = db.session.query(Document.user_id, func.min(ProcessingJob.id))\
+                      .join(Document, ProcessingJob.document_id == Document.id)\
+                      .filter(ProcessingJob.status == 'queued', ProcessingJob.lane == lane)\
+                      .group_by(Document.user_id).all()
+    users = [user_id for user_id, _ in heads]
+    claims = _recent_claims(users, datetime.utcnow(), window)
+    weights = _user_weights(users)
+    heads.sort(key=lambda head: (claims.get(head[0], 0) / weights[head[0]], head[1]))
+    return [job_id for _, job_id in heads]
+
+
+def throughput(window=THROUGHPUT_WINDOW):
+    """Jobs finished per second across all workers over the last ``window`` seconds"""
+    since = datetime.utcnow() - timedelta(seconds=window)
+    done = ProcessingJob.query.filter(ProcessingJob.status.in_(('done', 'failed')),
+                                      ProcessingJob.finished_at >= since).count()
+    return done / window
+
+
+def queue_position(document_id):
+    """Where a document's queued job stands, or None when it is not waiting.
+
+    Returns ``{'lane', 'position', 'waited', 'estimated_wait'}``. The
+    position counts every job in better lanes plus, for each other user in
+    the same lane, the turns they get before this job under fair sharing;
+    ``estimated_wait`` (seconds, None until jobs have finished recently)
+    divides it by the recent throughput.
+    """
+    job = ProcessingJob.query.filter_by(document_id=document_id, status='queued').first()
+    if job is None:
+        return None
+    user_id = job.document.user_id
+
+    ahead = ProcessingJob.query.filter(ProcessingJob.status == 'queued',
+                                       ProcessingJob.lane < job.lane).count()
+    lane_jobs = db.session.query(Document.user_id, func.count(ProcessingJob.id), func.min(ProcessingJob.id))\
+                          .join(Document, ProcessingJob.document_id == Document.id)\
+                          .filter(ProcessingJob.status == 'queued', ProcessingJob.lane == job.lane)\
+                          .group_by(Document.user_id).all()
+    own_ahead = ProcessingJob.query.join(Document, ProcessingJob.document_id == Document.id).filter(
+        Document.user_id == user_id,
+        ProcessingJob.status == 'queued',
+        ProcessingJob.lane == job.lane,
+        ProcessingJob.id < job.id
+    ).count()
+    weights = _user_weights([other for other, _, _ in lane_jobs] + [user_id])
+    own_head = min([head for other, _, head in lane_jobs if other == user_id] or [job.id])
+
+    # This job comes up on its owner's turn number own_ahead + 1
+    turns = (own_ahead + 1) / weights[user_id]
+    for other, count, head in lane_jobs:
+        if other == user_id:
+            continue
+        # Users whose oldest job is newer lose ties to this one
+        other_turns = math.ceil(turns * weights[other]) - (1 if head > own_head else 0)
+        ahead += max(0, min(count, other_turns))
+    position = ahead + own_ahead + 1
+
+    rate = throughput()
+    return {
+        'lane': LANE_NAMES.get(job.lane, 'batch'),
+        'position': position,
+        'waited': (datetime.utcnow() - job.created_at).total_seconds(),
+        'estimated_wait': position / rate if rate else None
+    }
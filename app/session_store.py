@@ -0,0 +1,76 @@
+"""
+Session Store - persists the academi.cx cookie jar between jobs and restarts
+"""
+
+import json
+import os
+import threading
+import time
+
+
+class CookieStore:
+    """Keeps the authenticated academi.cx cookies in a local JSON file"""
+
+    def __init__(self, path, max_age=12 * 60 * 60):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    def save(self, cookies):
+        """Write the cookie jar atomically, readable only by the current user"""
+        payload = {'saved_at': time.time(), 'cookies': cookies}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.path)
+
+    def load(self):
+        """Return the stored cookies, or None when missing, unreadable or expired"""
+        with self._lock:
+            try:
+                with open(self.path) as f:
+                    payload = json.load(f)
+            except (OSError, ValueError):
+                return None
+
+        now = time.time()
+        cookies = payload.get('cookies') or []
+        if not cookies or now - payload.get('saved_at', 0) > self.max_age:
+            return None
+
+        # Any cookie that has already expired means the server side session is gone too
+        for cookie in cookies:
+            expiry = cookie.get('expiry')
+            if expiry is not None and expiry <= now:
+                return None
+        return cookies
+
+    def clear(self):
+        """Forget the stored session, e.g. after the server rejected it"""
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def to_cdp_cookie(cookie):
+    """Convert a Selenium cookie dict into a CDP ``Network.CookieParam``"""
+    param = {
+        'name': cookie['name'],
+        'value': cookie['value'],
+        'domain': cookie.get('domain'),
+        'path': cookie.get('path', '/'),
+        'secure': cookie.get('secure', False),
+        'httpOnly': cookie.get('httpOnly', False),
+    }
+    if cookie.get('expiry') is not None:
+        param['expires'] = cookie['expiry']
+    if cookie.get('sameSite') in ('Strict', 'Lax', 'None'):
+        param['sameSite'] = cookie['sameSite']
+    return {key: value for key, value in param.items() if value is not None}
@@ -0,0 +1,282 @@
+"""
+Supervisor - run processing jobs in supervised child processes
+
+Each job process runs one job at a time in its own process group, so a hung
+chromedriver call or a crashed Chrome only ever takes down that process. The
+supervisor enforces a hard per-job timeout: a job process that overruns it,
+or dies, is killed together with every browser it started and replaced by a
+fresh one. Harvesting runs in one more supervised process that must report a
+heartbeat after every dashboard cycle.
+
+Children hand the metrics they recorded to the supervisor (with each job's
+result, and with each harvester heartbeat), so the worker's registry covers
+its whole process tree.
+"""
+
+import multiprocessing
+import os
+import signal
+import time
+
+from .metrics import metrics
+
+# Children start from a clean interpreter instead of inheriting the parent's threads and DB pool
+_context = multiprocessing.get_context('spawn')
+
+
+def _detach():
+    """Put the child in its own process group and leave shutdown signals to the supervisor"""
+    os.setpgrp()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def _job_process_main(connection):
+    _detach()
+    from .harvester import use_external_harvester
+    from .document_processor import process_document_background
+    from .processor_backend import get_processor_class
+    use_external_harvester()
+    try:
+        get_processor_class().prepare()
+    except Exception as e:
+        print(f"⚠️  Backend setup failed, retrying on the first job: {str(e)}")
+
+    while True:
+        message = connection.recv()
+        if message is None:
+            return
+        job_id, document_id = message
+        error = None
+        try:
+            success = process_document_background(document_id, wait=False)
+        except Exception as e:
+            success = False
+            error = str(e)
+        connection.send((job_id, bool(success), error, metrics.drain()))
+
+
+def _harvester_process_main(heartbeat, connection):
+    _detach()
+    from .harvester import get_harvester
+
+    def beat():
+        heartbeat.value = time.time()
+        connection.send(metrics.drain())
+
+    get_harvester().run_forever(heartbeat=beat)
+
+
+def _kill_group(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass
+    if process.is_alive():
+        # Not in its own group yet
+        process.kill()
+    process.join(5)
+
+
+class JobProcess:
+    """One supervised child process and the job it is running"""
+
+    def __init__(self):
+        self.connection, child_connection = _context.Pipe()
+        self.process = _context.Process(target=_job_process_main, args=(child_connection,),
+                                        name='job-process', daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.job = None
+        self.started = None
+
+    @property
+    def busy(self):
+        return self.job is not None
+
+    def start_job(self, job_id, document_id):
+        self.connection.send((job_id, document_id))
+        self.job = (job_id, document_id)
+        self.started = time.monotonic()
+
+    def result(self):
+        """``(job_id, success, error)`` once the running job has finished, else None"""
+        if self.busy and self.connection.poll():
+            job_id, success, error, job_metrics = self.connection.recv()
+            metrics.merge(job_metrics)
+            self.job = None
+            self.started = None
+            return job_id, success, error
+        return None
+
+    def kill(self):
+        _kill_group(self.process)
+        self.connection.close()
+
+    def stop(self, timeout=10):
+        """Shut an idle job process down, letting it quit its browsers first"""
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        self.kill()
+
+
+class JobProcessPool:
+    """A fixed number of job processes with a hard per-job timeout.
+
+    ``poll()`` collects finished jobs and replaces job processes that died or
+    overran ``job_timeout`` seconds; it returns ``(job_id, document_id,
+    success, error)`` for each.
+    """
+
+    def __init__(self, size, job_timeout=600):
+        self.size = size
+        self.job_timeout = job_timeout
+        self._processes = [JobProcess() for _ in range(size)]
+
+    @property
+    def busy(self):
+        return sum(1 for process in self._processes if process.busy)
+
+    @property
+    def idle(self):
+        # After shrinking, busy processes above the size finish their job first
+        return max(0, self.size - self.busy)
+
+    @property
+    def running_jobs(self):
+        return {process.job[0] for process in self._processes if process.busy}
+
+    def submit(self, job_id, document_id):
+        if self.idle:
+            for process in self._processes:
+                if not process.busy:
+                    process.start_job(job_id, document_id)
+                    return
+        raise RuntimeError("No idle job process")
+
+    def resize(self, size):
+        """Run ``size`` job processes: start new ones, or stop idle ones (busy ones once their job is done)"""
+        self.size = size
+        while len(self._processes) < size:
+            self._processes.append(JobProcess())
+        self._shrink()
+
+    def _shrink(self):
+        for process in [process for process in self._processes if not process.busy]:
+            if len(self._processes) <= self.size:
+                break
+            self._processes.remove(process)
+            process.stop()
+
+    def _replace(self, index, reason):
+        self._processes[index].kill()
+        self._processes[index] = JobProcess()
+        metrics.incr('supervisor.processes_restarted')
+        metrics.incr(f'supervisor.processes_restarted.{reason}')
+
+    def cancel(self, job_id):
+        """Kill the process running ``job_id``, dropping the job without an outcome"""
+        for index, process in enumerate(self._processes):
+            if process.job is not None and process.job[0] == job_id:
+                self._replace(index, 'cancelled')
+                return True
+        return False
+
+    def poll(self):
+        outcomes = []
+        for index, process in enumerate(self._processes):
+            job = process.job
+            try:
+                result = process.result()
+            except (EOFError, OSError):
+                result = None
+            if result is not None:
+                job_id, success, error = result
+                outcomes.append((job_id, job[1], success, error))
+                continue
+            if not process.process.is_alive():
+                print(f"💥 Job process {process.process.pid} died (exit code {process.process.exitcode})")
+                self._replace(index, 'died')
+                if job is not None:
+                    outcomes.append(job + (False, 'Job process died'))
+            elif job is not None and time.monotonic() - process.started > self.job_timeout:
+                print(f"⏱️  Job {job[0]} overran {self.job_timeout}s, killing its process")
+                metrics.incr('supervisor.jobs_timed_out')
+                self._replace(index, 'timeout')
+                outcomes.append(job + (False, f'Job timed out after {self.job_timeout} seconds'))
+        self._shrink()
+        metrics.set_gauge('supervisor.busy_processes', self.busy)
+        return outcomes
+
+    def close(self, timeout=50):
+        """Let running jobs finish for up to ``timeout`` seconds, then kill what is left.
+
+        Returns the jobs that finished like ``poll()``; jobs cut short stay
+        running in the queue for recovery to pick up.
+        """
+        for process in self._processes:
+            try:
+                process.connection.send(None)
+            except OSError:
+                pass
+        deadline = time.monotonic() + timeout
+        outcomes = []
+        for process in self._processes:
+            job = process.job
+            process.process.join(max(0, deadline - time.monotonic()))
+            try:
+                result = process.result()
+            except (EOFError, OSError):
+                result = None
+            if result is not None:
+                job_id, success, error = result
+                outcomes.append((job_id, job[1], success, error))
+            process.kill()
+        return outcomes
+
+
+class HarvesterProcess:
+    """The dedicated harvester process, restarted when it dies or stops reporting heartbeats"""
+
+    def __init__(self, stall_timeout=600):
+        self.stall_timeout = stall_timeout
+        self.process = None
+        self.connection = None
+        self._heartbeat = _context.Value('d', 0.0)
+        self.start()
+
+    def start(self):
+        self._heartbeat.value = time.time()
+        self.connection, child_connection = _context.Pipe(duplex=False)
+        self.process = _context.Process(target=_harvester_process_main, args=(self._heartbeat, child_connection),
+                                        name='harvester-process', daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def collect_metrics(self):
+        """Merge the metrics the harvester sent with its heartbeats"""
+        try:
+            while self.connection.poll():
+                metrics.merge(self.connection.recv())
+        except (EOFError, OSError):
+            pass
+
+    def check(self):
+        """Restart the harvester if needed; returns True when it was restarted"""
+        self.collect_metrics()
+        if self.process.is_alive() and time.time() - self._heartbeat.value <= self.stall_timeout:
+            return False
+        print("💥 Harvester process died or stalled, restarting it")
+        _kill_group(self.process)
+        self.connection.close()
+        metrics.incr('supervisor.harvester_restarted')
+        self.start()
+        return True
+
+    def stop(self):
+        self.collect_metrics()
+        _kill_group(self.process)
+        self.connection.close()
@@ -0,0 +1,131 @@
+"""
+Download Watch - wake up as soon as a finished download lands in a directory
+
+Uses Linux inotify through ctypes and falls back to polling the directory
+where inotify is not available (other platforms, exhausted watch limits).
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+# Partial files browsers write before renaming the finished download into place
+PARTIAL_SUFFIXES = ('.crdownload', '.part', '.tmp', '.download')
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            libc.inotify_init1
+            libc.inotify_add_watch
+            _libc = libc
+        except (OSError, AttributeError):
+            _libc = False
+    return _libc or None
+
+
+def inotify_available():
+    return _load_libc() is not None
+
+
+def is_finished_download(name):
+    return not name.startswith('.') and not name.endswith(PARTIAL_SUFFIXES)
+
+
+def _find_finished(directory, ignore):
+    for name in os.listdir(directory):
+        if name not in ignore and is_finished_download(name):
+            return os.path.join(directory, name)
+    return None
+
+
+class _Inotify:
+    """Minimal inotify watch on a single directory"""
+
+    def __init__(self, directory, mask):
+        libc = _load_libc()
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, 'inotify_add_watch failed')
+
+    def read_names(self, timeout):
+        """Wait up to ``timeout`` seconds and return the file names that changed"""
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        names = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+def wait_for_download(directory, timeout=180, ignore=(), poll_interval=0.5, use_inotify=True):
+    """Block until a finished file appears in ``directory`` and return its path.
+
+    Files named in ``ignore`` and partial downloads are skipped. Raises
+    TimeoutError when nothing finishes within ``timeout`` seconds.
+    """
+    ignore = set(ignore)
+    deadline = time.monotonic() + timeout
+
+    watch = None
+    if use_inotify and inotify_available():
+        try:
+            watch = _Inotify(directory, IN_MOVED_TO | IN_CLOSE_WRITE)
+        except OSError:
+            watch = None
+
+    try:
+        # Check after the watch exists so a file finishing right now is not missed
+        path = _find_finished(directory, ignore)
+        while path is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Download did not complete in time.")
+
+            if watch is not None:
+                for name in watch.read_names(remaining):
+                    if name not in ignore and is_finished_download(name):
+                        candidate = os.path.join(directory, name)
+                        if os.path.exists(candidate):
+                            path = candidate
+                            break
+            else:
+                time.sleep(min(poll_interval, remaining))
+                path = _find_finished(directory, ignore)
+        return path
+    finally:
+        if watch is not None:
+            watch.close()
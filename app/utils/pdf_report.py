@@ -0,0 +1,56 @@
+"""
+PDF Report - minimal text-only PDF writer for locally generated reports
+"""
+
+LINES_PER_PAGE = 60
+FONT_SIZE = 10
+LEADING = 12
+
+
+def _escape(text):
+    text = text.encode('latin-1', errors='replace').decode('latin-1')
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _page_stream(title, lines):
+    parts = ['BT', f'/F1 14 Tf 50 800 Td ({_escape(title)}) Tj', f'/F1 {FONT_SIZE} Tf 0 -24 Td']
+    for line in lines:
+        parts.append(f'({_escape(line)}) Tj 0 -{LEADING} Td')
+    parts.append('ET')
+    return '\n'.join(parts).encode('latin-1')
+
+
+def write_text_pdf(path, title, lines):
+    """Write ``lines`` under ``title`` as an A4 PDF, one Helvetica line per entry"""
+    lines = list(lines) or ['']
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then a page and its content per page
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = {
+        1: b'<< /Type /Catalog /Pages 2 0 R >>',
+        2: ('<< /Type /Pages /Kids [%s] /Count %d >>'
+            % (' '.join(f'{page_id} 0 R' for page_id in page_ids), len(pages))).encode('latin-1'),
+        3: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+    }
+    for page_id, page_lines in zip(page_ids, pages):
+        stream = _page_stream(title, page_lines)
+        objects[page_id] = (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+                            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>').encode('latin-1')
+        objects[page_id + 1] = b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream'
+
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(output)
+        output += b'%d 0 obj\n' % number + objects[number] + b'\nendobj\n'
+
+    xref = len(output)
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for number in sorted(objects):
+        output += b'%010d 00000 n \n' % offsets[number]
+    output += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+
+    with open(path, 'wb') as f:
+        f.write(output)
+    return path
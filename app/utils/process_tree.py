@@ -0,0 +1,119 @@
+"""
+Process Tree - walk a process and its descendants through /proc
+
+Used to measure how much memory a browser (chromedriver plus every Chrome
+process below it) holds and to kill browsers left behind by dead jobs.
+Outside Linux nothing can be read and the helpers return empty results.
+"""
+
+import os
+import signal
+
+PROC = '/proc'
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+_CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def stat(pid):
+    """Parsed /proc/<pid>/stat as ``{'pid', 'comm', 'state', 'ppid', 'started'}``, or None if it is gone.
+
+    ``started`` is seconds after boot.
+    """
+    data = _read(os.path.join(PROC, str(pid), 'stat'))
+    if not data:
+        return None
+    # comm is parenthesised and may itself contain spaces or parentheses
+    head, _, tail = data.decode('utf-8', 'replace').rpartition(')')
+    fields = tail.split()
+    return {
+        'pid': int(pid),
+        'comm': head.partition('(')[2],
+        'state': fields[0],
+        'ppid': int(fields[1]),
+        'started': int(fields[19]) / _CLOCK_TICKS
+    }
+
+
+def cmdline(pid):
+    """Command line arguments of a process (empty once it has exited)"""
+    data = _read(os.path.join(PROC, str(pid), 'cmdline'))
+    if not data:
+        return []
+    return data.decode('utf-8', 'replace').rstrip('\0').split('\0')
+
+
+def age(info):
+    """Seconds a process from ``stat`` has been running"""
+    data = _read(os.path.join(PROC, 'uptime'))
+    if not data:
+        return 0.0
+    return float(data.split()[0]) - info['started']
+
+
+def is_alive(pid):
+    info = stat(pid)
+    return info is not None and info['state'] != 'Z'
+
+
+def all_processes():
+    """``{pid: stat}`` for every process currently visible"""
+    processes = {}
+    try:
+        entries = os.listdir(PROC)
+    except OSError:
+        return processes
+    for entry in entries:
+        if entry.isdigit():
+            info = stat(entry)
+            if info is not None:
+                processes[info['pid']] = info
+    return processes
+
+
+def descendants(pid, processes=None):
+    """Pids of every process below ``pid``"""
+    if processes is None:
+        processes = all_processes()
+    children = {}
+    for info in processes.values():
+        children.setdefault(info['ppid'], []).append(info['pid'])
+    found = []
+    stack = list(children.get(pid, ()))
+    while stack:
+        child = stack.pop()
+        found.append(child)
+        stack.extend(children.get(child, ()))
+    return found
+
+
+def rss(pid):
+    """Resident memory of one process in bytes (0 once it has exited)"""
+    data = _read(os.path.join(PROC, str(pid), 'statm'))
+    if not data:
+        return 0
+    return int(data.split()[1]) * _PAGE_SIZE
+
+
+def tree_rss(pid):
+    """Resident memory of ``pid`` and all of its descendants in bytes"""
+    return sum(rss(member) for member in [pid] + descendants(pid))
+
+
+def kill_tree(pid, processes=None):
+    """SIGKILL ``pid`` and its descendants, children first; returns how many were signalled"""
+    killed = 0
+    for member in list(reversed(descendants(pid, processes))) + [pid]:
+        try:
+            os.kill(member, signal.SIGKILL)
+            killed += 1
+        except OSError:
+            pass
+    return killed
@@ -0,0 +1,67 @@
+"""
+Text extraction - plain text of uploaded documents for local similarity checks
+"""
+
+import os
+import re
+import zipfile
+from xml.etree import ElementTree
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # optional: PDFs are skipped without it
+    PdfReader = None
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def extract_txt(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    for encoding in ('utf-8', 'cp1252'):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode('utf-8', errors='replace')
+
+
+def extract_docx(path):
+    """Paragraph text of a .docx, read straight from its word/document.xml"""
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read('word/document.xml'))
+    paragraphs = []
+    for paragraph in root.iter(WORD_NS + 'p'):
+        paragraphs.append(''.join(node.text or '' for node in paragraph.iter(WORD_NS + 't')))
+    return '\n'.join(paragraphs)
+
+
+def extract_pdf(path):
+    if PdfReader is None:
+        return ''
+    reader = PdfReader(path)
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+
+EXTRACTORS = {
+    '.txt': extract_txt,
+    '.docx': extract_docx,
+    '.pdf': extract_pdf,
+}
+
+
+def extract_text(path):
+    """Plain text of a txt, docx or pdf file; '' for unsupported or unreadable files"""
+    extractor = EXTRACTORS.get(os.path.splitext(path)[1].lower())
+    if extractor is None:
+        return ''
+    try:
+        return extractor(path)
+    except Exception as e:
+        print(f"⚠️  Could not extract text from {os.path.basename(path)}: {str(e)}")
+        return ''
+
+
+def words(text):
+    """Lower-cased word tokens of ``text``"""
+    return re.findall(r'\w+', text.lower())
@@ -0,0 +1,392 @@
+"""
+Worker - background processing processes and the Flask app they run under
+"""
+
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+
+from .job_queue import (claim_next, finish, fail_document, recover_interrupted,
+                        renew_leases, reclaim_expired, queue_depth, running_count,
+                        average_job_seconds, LEASE_SECONDS)
+
+_worker_app = None
+_worker_pid = None
+_worker_lock = threading.Lock()
+
+
+def get_worker_app():
+    """Return the app background jobs run under.
+
+    Inside an existing app context that app is reused. Otherwise one app (and
+    so one SQLAlchemy engine and connection pool) is built per process and
+    shared by every job, instead of booting a new app for each document. The
+    app is rebuilt after a fork so children never share the parent's pool.
+    """
+    global _worker_app, _worker_pid
+    if has_app_context():
+        return current_app._get_current_object()
+
+    with _worker_lock:
+        if _worker_app is None or _worker_pid != os.getpid():
+            from . import create_app
+            # Worker and job processes never seed the admin account, so they need no admin credentials
+            _worker_app = create_app(seed_admin=False)
+            _worker_pid = os.getpid()
+        return _worker_app
+
+
+# The lease-lost event of the job running on the current thread; see job_cancelled
+_job_state = threading.local()
+
+
+def job_cancelled():
+    """Whether the job running on this thread lost its lease to another worker"""
+    event = getattr(_job_state, 'cancelled', None)
+    return event is not None and event.is_set()
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Worker:
+    """Claims jobs from the database queue and runs up to ``concurrency`` at once.
+
+    A ``pipelined`` worker runs only the upload stage of each job and hands the
+    document to the dashboard harvester, so its slots keep uploading while
+    earlier documents wait upstream for their reports.
+
+    With ``isolation='process'`` every slot is a supervised child process
+    (see supervisor.py) that is killed and replaced when a job overruns
+    ``job_timeout`` seconds, and harvesting runs in a process of its own.
+    Process isolation implies pipelining.
+
+    Claimed jobs are leased for ``lease_seconds``. The worker renews the
+    leases of its running jobs every third of that and reclaims jobs whose
+    lease ran out on any node, so workers on several hosts can share one
+    queue and a dead node's jobs are picked up by the others. A job whose
+    lease is lost is killed under process isolation; a thread job can only
+    be stopped before its upload starts (see ``job_cancelled``), so run
+    several nodes with process isolation.
+
+    With an ``autoscaler`` (see autoscaler.py) the number of slots follows
+    the queue every ``autoscale_interval`` seconds, starting from
+    ``concurrency``; slots that are scaled away release their browsers.
+
+    Every ``merge_interval`` seconds the worker merges the local similarity
+    index once its delta has grown large, so jobs that add documents never
+    pay for the merge.
+
+    With a ``metrics_dir`` the worker exports its metrics (which include
+    those of its job and harvester processes) there every
+    ``metrics_interval`` seconds for the admin metrics page to aggregate.
+    """
+
+    def __init__(self, app, concurrency=2, poll_interval=2, worker_id=None, stale_after=0,
+                 pipelined=False, reap_interval=0, reap_grace=60, isolation='thread', job_timeout=600,
+                 lease_seconds=LEASE_SECONDS, autoscaler=None, autoscale_interval=30,
+                 merge_interval=0, metrics_dir=None, metrics_interval=30):
+        self.app = app
+        self.autoscaler = autoscaler
+        self.autoscale_interval = autoscale_interval
+        self._next_autoscale = 0
+        if autoscaler is not None:
+            concurrency = autoscaler.clamp(concurrency)
+        self.lease_seconds = lease_seconds
+        self._next_heartbeat = 0
+        self.concurrency = concurrency
+        self.isolation = isolation
+        self.job_timeout = job_timeout
+        self.pipelined = pipelined or isolation == 'process'
+        self._processes = None
+        self._harvester_process = None
+        self.reap_interval = reap_interval
+        self.reap_grace = reap_grace
+        self._next_reap = 0
+        self.merge_interval = merge_interval
+        self._next_merge = 0
+        self.metrics_dir = metrics_dir
+        self.metrics_interval = metrics_interval
+        self._next_metrics = 0
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.worker_id = worker_id or default_worker_id()
+        max_slots = autoscaler.max_slots if autoscaler is not None else concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_slots, thread_name_prefix='job')
+        # Running job ids and the events set when their lease is lost
+        self._running = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    @property
+    def free_slots(self):
+        if self._processes is not None:
+            return self._processes.idle
+        with self._lock:
+            return max(0, self.concurrency - len(self._running))
+
+    def start_processes(self):
+        """Start the supervised job and harvester processes"""
+        from .supervisor import JobProcessPool, HarvesterProcess
+        self._processes = JobProcessPool(self.concurrency, job_timeout=self.job_timeout)
+        self._harvester_process = HarvesterProcess(stall_timeout=self.job_timeout)
+
+    def collect(self):
+        """Record jobs the job processes finished, failed or were killed for"""
+        for outcome in self._processes.poll():
+            self._record(*outcome)
+        self._harvester_process.check()
+
+    def _record(self, job_id, document_id, success, error):
+        with self.app.app_context():
+            if finish(job_id, success, error, worker_id=self.worker_id) is None:
+                print(f"⚠️  Job {job_id} was reclaimed by another worker, dropping its outcome")
+                return
+            if not success and error:
+                fail_document(document_id, error)
+        print(f"📊 Job {job_id} for document {document_id} {'done' if success else 'failed'}")
+
+    def claim(self):
+        """Claim the next job, or None when the queue is empty"""
+        with self.app.app_context():
+            job = claim_next(self.worker_id, self.lease_seconds)
+            if job is None:
+                return None
+            return job.id, job.document_id
+
+    def run_job(self, job_id, document_id):
+        from .document_processor import process_document_background
+
+        error = None
+        try:
+            if self.pipelined:
+                success = process_document_background(document_id, wait=False)
+            else:
+                success = process_document_background(document_id)
+        except Exception as e:
+            success = False
+            error = str(e)
+        with self.app.app_context():
+            if finish(job_id, success, error, worker_id=self.worker_id) is None:
+                print(f"⚠️  Job {job_id} was reclaimed by another worker, dropping its outcome")
+                return
+        print(f"📊 Job {job_id} for document {document_id} {'done' if success else 'failed'}")
+
+    def _run_and_release(self, job_id, document_id):
+        with self._lock:
+            _job_state.cancelled = self._running.get(job_id)
+        try:
+            self.run_job(job_id, document_id)
+        finally:
+            _job_state.cancelled = None
+            with self._lock:
+                self._running.pop(job_id, None)
+
+    def poll_once(self):
+        """Fill free slots with newly claimed jobs; returns how many were started"""
+        if self._processes is not None:
+            self.collect()
+        started = 0
+        while self.free_slots > 0 and not self._stop.is_set():
+            claimed = self.claim()
+            if claimed is None:
+                break
+            job_id, document_id = claimed
+            if self._processes is not None:
+                self._processes.submit(job_id, document_id)
+            else:
+                with self._lock:
+                    self._running[job_id] = threading.Event()
+                self._executor.submit(self._run_and_release, job_id, document_id)
+            started += 1
+        return started
+
+    def recover(self):
+        """Pick interrupted documents back up; see job_queue.recover_interrupted"""
+        with self.app.app_context():
+            requeued, resumed = recover_interrupted(self.stale_after)
+        if requeued or resumed:
+            print(f"♻️  Recovered interrupted documents: {requeued} re-queued for upload, "
+                  f"{resumed} resumed for harvesting")
+        if resumed and self._harvester_process is None:
+            from .harvester import get_harvester
+            get_harvester().ensure_running()
+        return requeued, resumed
+
+    def running_jobs(self):
+        if self._processes is not None:
+            return self._processes.running_jobs
+        with self._lock:
+            return set(self._running)
+
+    def heartbeat(self):
+        """Renew the leases of running jobs and reclaim jobs whose lease expired anywhere"""
+        with self.app.app_context():
+            lost = renew_leases(self.worker_id, self.running_jobs(), self.lease_seconds)
+            requeued, resumed = reclaim_expired()
+        for job_id in lost:
+            print(f"⚠️  Lost the lease on job {job_id}")
+            # Stop it before the new owner uploads the document too
+            if self._processes is not None:
+                self._processes.cancel(job_id)
+            else:
+                with self._lock:
+                    event = self._running.get(job_id)
+                if event is not None:
+                    event.set()
+        if requeued or resumed:
+            print(f"♻️  Reclaimed expired jobs: {requeued} re-queued for upload, "
+                  f"{resumed} resumed for harvesting")
+        if resumed and self._harvester_process is None:
+            from .harvester import get_harvester
+            get_harvester().ensure_running()
+        return lost
+
+    def resize(self, slots):
+        """Run ``slots`` jobs at once from now on"""
+        self.concurrency = slots
+        if self._processes is not None:
+            self._processes.resize(slots)
+        else:
+            from .processor_backend import resize_session_pools
+            resize_session_pools(slots)
+
+    def autoscale(self):
+        """Let the autoscaler size the slots to the queue; returns the slot count"""
+        with self.app.app_context():
+            queued = queue_depth()
+            running = running_count()
+            latency = average_job_seconds()
+        from .autoscaler import available_memory
+        slots = self.autoscaler.decide(self.concurrency, queued, running, latency, available_memory())
+        if slots != self.concurrency:
+            self.resize(slots)
+        return slots
+
+    def reap(self):
+        """Kill browsers left behind by dead jobs; see browser_reaper"""
+        from .browser_reaper import reap
+        try:
+            return reap(self.reap_grace)
+        except Exception as e:
+            print(f"⚠️  Browser reaper failed: {str(e)}")
+            return 0
+
+    def merge_similarity_index(self):
+        """Merge the local similarity index if its delta has grown large; see local_similarity"""
+        from .local_similarity import get_index
+        from .metrics import metrics
+        with self.app.app_context():
+            index = get_index()
+        if not index.needs_merge:
+            return False
+        with metrics.timed('local_similarity.merge_seconds'):
+            index.merge()
+        print("🗂️  Merged the local similarity index")
+        return True
+
+    def export_metrics(self):
+        """Write this worker's metrics to ``metrics_dir``; see metrics.export"""
+        from .metrics import export
+        try:
+            export(self.metrics_dir, self.worker_id)
+        except OSError as e:
+            print(f"⚠️  Exporting metrics failed: {str(e)}")
+
+    def prepare(self):
+        """Do the backend's one-time setup (resolving chromedriver, ...) before the first claim"""
+        from .processor_backend import get_processor_class
+        with self.app.app_context():
+            get_processor_class().prepare()
+
+    def run(self):
+        mode = 'upload' if self.pipelined else 'processing'
+        try:
+            # Also fills webdriver-manager's cache before job processes resolve the driver themselves
+            self.prepare()
+        except Exception as e:
+            print(f"⚠️  Backend setup failed, retrying on the first job: {str(e)}")
+        if self.isolation == 'process':
+            self.start_processes()
+            mode += ' process'
+        print(f"👷 Worker {self.worker_id} started with {self.concurrency} {mode} slot(s)")
+        if self.isolation == 'process' and self.app.config.get('BROWSER_TABS_PER_BROWSER', 1) > 1:
+            print("⚠️  BROWSER_TABS_PER_BROWSER has no effect with WORKER_ISOLATION=process: "
+                  "every job process starts its own Chrome; use WORKER_ISOLATION=thread to share browsers")
+        try:
+            self.recover()
+        except Exception as e:
+            print(f"⚠️  Recovery of interrupted documents failed: {str(e)}")
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"⚠️  Error claiming jobs: {str(e)}")
+            if time.monotonic() >= self._next_heartbeat:
+                try:
+                    self.heartbeat()
+                except Exception as e:
+                    print(f"⚠️  Heartbeat failed: {str(e)}")
+                self._next_heartbeat = time.monotonic() + self.lease_seconds / 3
+            if self.autoscaler is not None and time.monotonic() >= self._next_autoscale:
+                try:
+                    self.autoscale()
+                except Exception as e:
+                    print(f"⚠️  Autoscaling failed: {str(e)}")
+                self._next_autoscale = time.monotonic() + self.autoscale_interval
+            if self.reap_interval and time.monotonic() >= self._next_reap:
+                self.reap()
+                self._next_reap = time.monotonic() + self.reap_interval
+            if self.merge_interval and time.monotonic() >= self._next_merge:
+                try:
+                    self.merge_similarity_index()
+                except Exception as e:
+                    print(f"⚠️  Merging the similarity index failed: {str(e)}")
+                self._next_merge = time.monotonic() + self.merge_interval
+            if self.metrics_dir and time.monotonic() >= self._next_metrics:
+                self.export_metrics()
+                self._next_metrics = time.monotonic() + self.metrics_interval
+            self._stop.wait(self.poll_interval)
+        print("🛑 Worker stopping, waiting for running jobs to finish...")
+        self._executor.shutdown(wait=True)
+        if self._processes is not None:
+            for outcome in self._processes.close():
+                self._record(*outcome)
+            self._harvester_process.stop()
+        if self.metrics_dir:
+            self.export_metrics()
+
+    def stop(self, *args):
+        self._stop.set()
+
+
+def main(concurrency=None):
+    """Entry point for a dedicated processing worker process"""
+    from .autoscaler import from_config
+    app = get_worker_app()
+    worker = Worker(
+        app,
+        concurrency=concurrency or app.config.get('WORKER_CONCURRENCY', 2),
+        poll_interval=app.config.get('WORKER_POLL_INTERVAL', 2),
+        stale_after=app.config.get('WORKER_RECOVERY_STALE_AFTER', 0),
+        pipelined=app.config.get('WORKER_PIPELINE', True),
+        reap_interval=app.config.get('BROWSER_REAPER_INTERVAL', 300),
+        reap_grace=app.config.get('BROWSER_REAPER_GRACE', 120),
+        isolation=app.config.get('WORKER_ISOLATION', 'process'),
+        job_timeout=app.config.get('WORKER_JOB_TIMEOUT', 600),
+        lease_seconds=app.config.get('WORKER_LEASE_SECONDS', LEASE_SECONDS),
+        # A fixed --concurrency turns autoscaling off
+        autoscaler=None if concurrency else from_config(app.config),
+        autoscale_interval=app.config.get('AUTOSCALE_INTERVAL', 30),
+        merge_interval=app.config.get('LOCAL_SIMILARITY_MERGE_INTERVAL', 600),
+        metrics_dir=app.config.get('METRICS_DIR'),
+        metrics_interval=app.config.get('METRICS_EXPORT_INTERVAL', 30)
+    )
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
@@ -44,6 +44,94 @@ class Config:
     ALLOWED_EXTENSIONS = {'txt', 'pdf', 'doc', 'docx'}
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     
+    # Processing workers (python worker.py): jobs each worker runs at once and queue poll interval
+    WORKER_CONCURRENCY = int(os.environ.get('WORKER_CONCURRENCY', '2'))
+    WORKER_POLL_INTERVAL = float(os.environ.get('WORKER_POLL_INTERVAL', '2'))
+    # On startup, running jobs whose lease expired are treated as abandoned, as are jobs without
+    # a lease (claimed before leases existed) claimed more than this many seconds ago
+    WORKER_RECOVERY_STALE_AFTER = int(os.environ.get('WORKER_RECOVERY_STALE_AFTER', '0'))
+    # Pipelined workers: WORKER_CONCURRENCY slots only upload, and HARVEST_CONCURRENCY sessions
+    # download finished reports, so uploads continue while earlier documents wait on academi.cx
+    WORKER_PIPELINE = os.environ.get('WORKER_PIPELINE', 'true').lower() in ['true', 'on', '1']
+    # 'process' runs each slot (and the harvester) in a supervised child process whose job is
+    # killed after WORKER_JOB_TIMEOUT seconds; 'thread' runs jobs in the worker process itself
+    WORKER_ISOLATION = os.environ.get('WORKER_ISOLATION', 'process')
+    WORKER_JOB_TIMEOUT = int(os.environ.get('WORKER_JOB_TIMEOUT', '600'))
+    # Claimed jobs (and the harvester role) are leased for this many seconds and renewed by
+    # heartbeats; a node that stops renewing loses its jobs to the other worker nodes
+    WORKER_LEASE_SECONDS = int(os.environ.get('WORKER_LEASE_SECONDS', '120'))
+    # Autoscaling: slots start at WORKER_CONCURRENCY and follow the queue between these bounds,
+    # sized to clear the backlog within AUTOSCALE_TARGET_DRAIN seconds; equal bounds disable it.
+    # Slots are only added while the host keeps AUTOSCALE_MEMORY_RESERVE_MB free.
+    WORKER_MIN_CONCURRENCY = int(os.environ.get('WORKER_MIN_CONCURRENCY', '1'))
+    WORKER_MAX_CONCURRENCY = int(os.environ.get('WORKER_MAX_CONCURRENCY', '4'))
+    AUTOSCALE_INTERVAL = float(os.environ.get('AUTOSCALE_INTERVAL', '30'))
+    AUTOSCALE_TARGET_DRAIN = int(os.environ.get('AUTOSCALE_TARGET_DRAIN', '300'))
+    AUTOSCALE_SCALE_DOWN_AFTER = int(os.environ.get('AUTOSCALE_SCALE_DOWN_AFTER', '300'))
+    AUTOSCALE_SLOT_MEMORY_MB = int(os.environ.get('AUTOSCALE_SLOT_MEMORY_MB', '600'))
+    AUTOSCALE_MEMORY_RESERVE_MB = int(os.environ.get('AUTOSCALE_MEMORY_RESERVE_MB', '512'))
+    
+    # Processor backend: 'selenium' (browser), 'http' (pooled HTTP sessions) or 'local' (offline scoring)
+    PROCESSOR_BACKEND = os.environ.get('PROCESSOR_BACKEND', 'selenium')
+    HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', '8'))
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '10'))
+    HTTP_REQUEST_TIMEOUT = int(os.environ.get('HTTP_REQUEST_TIMEOUT', '30'))
+    
+    # Browser automation settings
+    BROWSER_POOL_SIZE = int(os.environ.get('BROWSER_POOL_SIZE', '2'))
+    BROWSER_POOL_CHECKOUT_TIMEOUT = int(os.environ.get('BROWSER_POOL_CHECKOUT_TIMEOUT', '300'))
+    # Above 1, pooled sessions are tabs: BROWSER_POOL_SIZE documents share ceil(size / tabs) Chromes.
+    # Tabs only share a Chrome between the slots of one process, so they need WORKER_ISOLATION=thread
+    BROWSER_TABS_PER_BROWSER = int(os.environ.get('BROWSER_TABS_PER_BROWSER', '1'))
+    # Replace pooled browsers after this many jobs, seconds, or MB of resident memory
+    # summed over the Chrome process tree (0 disables a limit; HTTP sessions use jobs and age)
+    BROWSER_RECYCLE_JOBS = int(os.environ.get('BROWSER_RECYCLE_JOBS', '50'))
+    BROWSER_RECYCLE_AGE = int(os.environ.get('BROWSER_RECYCLE_AGE', str(6 * 60 * 60)))
+    BROWSER_RECYCLE_RSS_MB = int(os.environ.get('BROWSER_RECYCLE_RSS_MB', '1500'))
+    # Workers kill orphaned Chrome/chromedriver processes this often (0 disables; also `flask browser reap`)
+    BROWSER_REAPER_INTERVAL = int(os.environ.get('BROWSER_REAPER_INTERVAL', '300'))
+    BROWSER_REAPER_GRACE = int(os.environ.get('BROWSER_REAPER_GRACE', '120'))
+    
+    # Pin the chromedriver binary; offline mode never lets webdriver-manager hit the network
+    CHROMEDRIVER_PATH = os.environ.get('CHROMEDRIVER_PATH')
+    CHROMEDRIVER_OFFLINE = os.environ.get('CHROMEDRIVER_OFFLINE', 'false').lower() in ['true', 'on', '1']
+    
+    # Lean page-load profile: no images or fonts, eager page loads, optional domain allowlist
+    BROWSER_LEAN_PROFILE = os.environ.get('BROWSER_LEAN_PROFILE', 'false').lower() in ['true', 'on', '1']
+    BROWSER_ALLOWED_DOMAINS = [d.strip() for d in os.environ.get('BROWSER_ALLOWED_DOMAINS', '').split(',') if d.strip()]
+    
+    # Saved academi.cx session (cookie jar) reused across jobs and restarts
+    ACADEMI_COOKIE_STORE = os.environ.get('ACADEMI_COOKIE_STORE') or \
+        os.path.join(os.path.abspath(os.path.dirname(__file__)), 'status', 'academi_session.json')
+    ACADEMI_SESSION_MAX_AGE = int(os.environ.get('ACADEMI_SESSION_MAX_AGE', str(12 * 60 * 60)))
+    
+    # Upper bound (seconds) on waiting for an upload to show up on the dashboard
+    UPLOAD_COMPLETE_TIMEOUT = int(os.environ.get('UPLOAD_COMPLETE_TIMEOUT', '50'))
+    
+    # Dashboard harvester: seconds between dashboard scans and the overall result deadline
+    HARVEST_INTERVAL = int(os.environ.get('HARVEST_INTERVAL', '15'))
+    HARVEST_TIMEOUT = int(os.environ.get('HARVEST_TIMEOUT', '600'))
+    HARVEST_CONCURRENCY = int(os.environ.get('HARVEST_CONCURRENCY', '1'))
+    
+    # Local near-duplicate check of uploads against processed documents (MinHash/LSH index file)
+    NEAR_DUPLICATE_INDEX = os.environ.get('NEAR_DUPLICATE_INDEX') or \
+        os.path.join(os.path.abspath(os.path.dirname(__file__)), 'status', 'near_duplicates.idx')
+    NEAR_DUPLICATE_THRESHOLD = float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', '0.8'))
+    
+    # Offline similarity engine (PROCESSOR_BACKEND=local): fingerprint index location, and
+    # whether documents academi.cx fails on or times out are scored locally instead of failing
+    LOCAL_SIMILARITY_DIR = os.environ.get('LOCAL_SIMILARITY_DIR') or \
+        os.path.join(os.path.abspath(os.path.dirname(__file__)), 'status', 'similarity')
+    LOCAL_SIMILARITY_FALLBACK = os.environ.get('LOCAL_SIMILARITY_FALLBACK', 'false').lower() in ['true', 'on', '1']
+    # Seconds between worker checks that merge the index once its delta is large (0 = only `flask local-similarity merge`)
+    LOCAL_SIMILARITY_MERGE_INTERVAL = int(os.environ.get('LOCAL_SIMILARITY_MERGE_INTERVAL', '600'))
+    
+    # Workers and web processes export their metrics here every METRICS_EXPORT_INTERVAL seconds;
+    # /admin/metrics aggregates the files
+    METRICS_DIR = os.environ.get('METRICS_DIR') or \
+        os.path.join(os.path.abspath(os.path.dirname(__file__)), 'status', 'metrics')
+    METRICS_EXPORT_INTERVAL = int(os.environ.get('METRICS_EXPORT_INTERVAL', '30'))
+    
     # Plagiarism checker settings
     CSV_OUTPUT = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'results.csv')
     
@@ -3,6 +3,7 @@
 import pytest
 import tempfile
 import os
+import shutil
 from app import create_app
 from app.models import db, User, Document
 from config import TestingConfig
@@ -17,7 +18,17 @@ def app():
     # Override the database URI to use the temporary database
     TestingConfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
     
+    # Uploads, reports and the saved academi.cx session go to a private directory, not the repo's
+    files_dir = tempfile.mkdtemp()
+    TestingConfig.UPLOAD_FOLDER = os.path.join(files_dir, 'uploads')
+    TestingConfig.DOWNLOAD_DIR = os.path.join(files_dir, 'downloads')
+    
     app = create_app(TestingConfig)
+    app.config['ACADEMI_COOKIE_STORE'] = os.path.join(files_dir, 'academi_session.json')
+    # Keep each test's near-duplicate index private
+    app.config['NEAR_DUPLICATE_INDEX'] = db_path + '.near_duplicates.idx'
+    app.config['LOCAL_SIMILARITY_DIR'] = db_path + '.similarity'
+    app.config['METRICS_DIR'] = db_path + '.metrics'
     
     with app.app_context():
         db.create_all()
@@ -25,6 +36,11 @@ def app():
         
     os.close(db_fd)
     os.unlink(db_path)
+    if os.path.exists(app.config['NEAR_DUPLICATE_INDEX']):
+        os.unlink(app.config['NEAR_DUPLICATE_INDEX'])
+    shutil.rmtree(app.config['LOCAL_SIMILARITY_DIR'], ignore_errors=True)
+    shutil.rmtree(app.config['METRICS_DIR'], ignore_errors=True)
+    shutil.rmtree(files_dir, ignore_errors=True)
 
 
 @pytest.fixture
@@ -0,0 +1,75 @@
+"""Unit tests for the queue-driven slot autoscaler."""
+
+import pytest
+from app.autoscaler import Autoscaler
+from app.metrics import metrics
+
+MB = 1024 * 1024
+
+
+class FakeClock:
+    """Monotonic clock the tests move forward by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def scaler(clock):
+    metrics.reset()
+    return Autoscaler(min_slots=1, max_slots=6, target_drain=300, scale_down_after=120,
+                      slot_memory=500 * MB, memory_reserve=500 * MB, clock=clock)
+
+
+@pytest.mark.unit
+class TestAutoscaler:
+    """Test slots follow the queue within bounds, memory and the scale-down delay."""
+
+    def test_scales_up_to_clear_backlog(self, scaler):
+        """Test a queue spike adds the slots needed to drain it in time."""
+        assert scaler.decide(1, queued=20, running=1, latency=60) == 5
+        assert scaler.decide(1, queued=500, running=1, latency=60) == 6
+
+        snapshot = metrics.snapshot()
+        assert snapshot['counters']['autoscaler.scaled_up.queue'] == 2
+        assert snapshot['gauges']['autoscaler.slots'] == 6
+
+    def test_growth_limited_by_memory(self, scaler):
+        """Test slots are only added while the host has memory for their browsers."""
+        assert scaler.decide(1, queued=50, running=1, latency=60, memory=1600 * MB) == 3
+        assert scaler.decide(3, queued=50, running=3, latency=60, memory=400 * MB) == 2
+        assert metrics.snapshot()['counters']['autoscaler.scaled_down.memory'] == 1
+
+    def test_scales_down_slowly_when_idle(self, scaler, clock):
+        """Test idle slots are released one at a time after the delay."""
+        assert scaler.decide(4, queued=0, running=0) == 4
+        clock.now = 60
+        assert scaler.decide(4, queued=0, running=0) == 4
+        clock.now = 120
+        assert scaler.decide(4, queued=0, running=0) == 3
+        clock.now = 180
+        assert scaler.decide(3, queued=0, running=0) == 3
+        clock.now = 240
+        assert scaler.decide(3, queued=0, running=0) == 2
+
+    def test_backlog_resets_scale_down_delay(self, scaler, clock):
+        """Test a returning backlog cancels a pending scale-down."""
+        scaler.decide(2, queued=0, running=0)
+        clock.now = 100
+        assert scaler.decide(2, queued=10, running=2, latency=60) == 3
+        clock.now = 150
+        assert scaler.decide(3, queued=0, running=0) == 3
+
+    def test_never_below_minimum(self, scaler, clock):
+        """Test memory pressure and idleness never drop below min_slots."""
+        assert scaler.decide(1, queued=0, running=0, memory=100 * MB) == 1
+        clock.now = 1000
+        assert scaler.decide(1, queued=0, running=0) == 1
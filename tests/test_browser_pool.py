@@ -0,0 +1,172 @@
+"""Unit tests for the browser session pool."""
+
+import threading
+import pytest
+from app.browser_pool import BrowserPool, RecyclePolicy
+
+
+class FakeDriver:
+    """Stand-in for a WebDriver that records whether it was quit."""
+
+    def __init__(self):
+        self.healthy = True
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.mark.unit
+class TestBrowserPool:
+    """Test BrowserPool checkout, checkin and recycling."""
+
+    def make_pool(self, size=2, recycle=None):
+        started = []
+
+        def factory():
+            driver = FakeDriver()
+            started.append(driver)
+            return driver
+
+        pool = BrowserPool(factory, size=size, health_check=lambda c: c.healthy, recycle=recycle)
+        return pool, started
+
+    def test_session_is_reused(self):
+        """Test a returned session is handed out again without a new start."""
+        pool, started = self.make_pool()
+
+        first = pool.checkout()
+        pool.checkin(first)
+        second = pool.checkout()
+
+        assert second is first
+        assert len(started) == 1
+        assert first.jobs == 1
+
+    def test_pool_size_is_enforced(self):
+        """Test checkout times out when every session is in use."""
+        pool, started = self.make_pool(size=1)
+
+        pool.checkout()
+        with pytest.raises(TimeoutError):
+            pool.checkout(timeout=0.05)
+        assert len(started) == 1
+
+    def test_unhealthy_session_is_recycled(self):
+        """Test an unhealthy idle session is quit and replaced."""
+        pool, started = self.make_pool(size=1)
+
+        session = pool.checkout()
+        pool.checkin(session)
+        session.client.healthy = False
+
+        replacement = pool.checkout()
+        assert replacement is not session
+        assert session.client.quit_called is True
+        assert len(started) == 2
+
+    def test_broken_checkin_frees_slot(self):
+        """Test a waiter gets a new session when a broken one is returned."""
+        pool, started = self.make_pool(size=1)
+        session = pool.checkout()
+        result = {}
+
+        def wait_for_session():
+            result['session'] = pool.checkout(timeout=5)
+
+        waiter = threading.Thread(target=wait_for_session)
+        waiter.start()
+        pool.checkin(session, broken=True)
+        waiter.join(timeout=5)
+
+        assert result['session'] is not session
+        assert session.client.quit_called is True
+
+    def test_context_manager_marks_errors_as_broken(self):
+        """Test an exception inside the lease discards the session."""
+        pool, started = self.make_pool()
+
+        with pytest.raises(RuntimeError):
+            with pool.session() as session:
+                raise RuntimeError('browser crashed')
+
+        assert session.client.quit_called is True
+        assert pool.created == 0
+
+    def test_shrinking_quits_surplus_sessions(self):
+        """Test resizing down quits idle sessions now and busy ones on checkin."""
+        pool, started = self.make_pool(size=3)
+        sessions = [pool.checkout() for _ in range(3)]
+        pool.checkin(sessions[0])
+
+        assert pool.resize(1) == 1
+        assert started[0].quit_called
+        pool.checkin(sessions[1])
+        pool.checkin(sessions[2])
+
+        assert started[1].quit_called
+        assert not started[2].quit_called
+        assert pool.created == 1
+        assert pool.checkout() is sessions[2]
+
+    def test_close_quits_idle_sessions(self):
+        """Test closing the pool quits idle browsers."""
+        pool, started = self.make_pool()
+        session = pool.checkout()
+        pool.checkin(session)
+
+        pool.close()
+
+        assert session.client.quit_called is True
+        with pytest.raises(RuntimeError):
+            pool.checkout()
+
+
+@pytest.mark.unit
+class TestRecyclePolicy:
+    """Test pooled sessions are replaced once they have served long enough."""
+
+    def make_pool(self, **limits):
+        started = []
+
+        def factory():
+            driver = FakeDriver()
+            driver.rss = 0
+            started.append(driver)
+            return driver
+
+        policy = RecyclePolicy(memory=lambda client: client.rss, **limits)
+        return BrowserPool(factory, size=1, recycle=policy), started
+
+    def test_recycled_after_max_jobs(self):
+        """Test a session is quit on checkin once it reaches the job limit."""
+        pool, started = self.make_pool(max_jobs=2)
+
+        for _ in range(3):
+            pool.checkin(pool.checkout())
+
+        assert len(started) == 2
+        assert started[0].quit_called is True
+        assert started[1].quit_called is False
+
+    def test_recycled_over_memory_ceiling(self):
+        """Test an idle session over the memory ceiling is replaced on checkout."""
+        pool, started = self.make_pool(max_rss=100)
+        session = pool.checkout()
+        pool.checkin(session)
+        session.client.rss = 150
+
+        replacement = pool.checkout()
+
+        assert replacement is not session
+        assert session.client.quit_called is True
+
+    def test_recycled_by_age(self):
+        """Test a session older than the age limit is replaced."""
+        pool, started = self.make_pool(max_age=60)
+        session = pool.checkout()
+        session.created_at -= 61
+        pool.checkin(session)
+
+        assert pool.checkout() is not session
+        assert len(started) == 2
@@ -0,0 +1,74 @@
+"""Unit tests for finding and killing orphaned browsers."""
+
+import os
+import pytest
+from app import browser_reaper
+from app.utils import process_tree
+
+ME = os.getpid()
+DEAD_WORKER = 999999
+
+
+class FakeDriver:
+    """Object standing in for a WebDriver that owns a chromedriver."""
+
+
+def process(pid, ppid, comm, state='S'):
+    return {'pid': pid, 'comm': comm, 'state': state, 'ppid': ppid, 'started': 0.0}
+
+
+@pytest.fixture
+def fake_processes(monkeypatch):
+    """Two browsers of this process (one still driven), one of a dead worker, one without chromedriver."""
+    processes = {
+        10: process(10, ME, 'chromedriver'),
+        11: process(11, 10, 'chrome'),
+        12: process(12, 11, 'chrome'),
+        20: process(20, ME, 'chromedriver'),
+        21: process(21, 20, 'chrome'),
+        30: process(30, 1, 'chromedriver'),
+        31: process(31, 30, 'chrome'),
+        41: process(41, 1, 'chrome'),
+    }
+    owners = {11: ME, 21: ME, 31: DEAD_WORKER, 41: ME}
+    monkeypatch.setattr(process_tree, 'cmdline', lambda pid: (
+        ['chrome', f'{browser_reaper.OWNER_SWITCH}={owners[pid]}'] if pid in owners else ['chrome']))
+    monkeypatch.setattr(process_tree, 'age', lambda info: 600)
+    monkeypatch.setattr(process_tree, 'is_alive', lambda pid: pid != DEAD_WORKER)
+    monkeypatch.setattr(browser_reaper, '_tracked', {})
+    return processes
+
+
+@pytest.mark.unit
+class TestFindOrphans:
+    """Test which browsers count as orphaned."""
+
+    def test_orphans_found(self, fake_processes):
+        """Test released, abandoned and driverless browsers are orphans and driven ones are not."""
+        driver = FakeDriver()
+        browser_reaper.track(driver, 10)
+
+        orphans = dict(browser_reaper.find_orphans(grace=60, processes=fake_processes))
+
+        assert orphans == {
+            20: 'driver released without quit',
+            30: 'owner exited',
+            41: 'chromedriver exited'
+        }
+
+    def test_young_browsers_left_alone(self, fake_processes, monkeypatch):
+        """Test browsers inside the grace period are never reaped."""
+        monkeypatch.setattr(process_tree, 'age', lambda info: 5)
+
+        assert browser_reaper.find_orphans(grace=60, processes=fake_processes) == []
+
+    def test_reap_kills_whole_tree(self, fake_processes, monkeypatch):
+        """Test reaping kills each orphan's chromedriver and every Chrome below it."""
+        driver = FakeDriver()
+        browser_reaper.track(driver, 10)
+        killed = []
+        monkeypatch.setattr(process_tree, 'all_processes', lambda: fake_processes)
+        monkeypatch.setattr(process_tree.os, 'kill', lambda pid, sig: killed.append(pid))
+
+        assert browser_reaper.reap(grace=60) == 5
+        assert sorted(killed) == [20, 21, 30, 31, 41]
@@ -0,0 +1,98 @@
+"""Unit tests for serving several documents from tabs of one browser."""
+
+import pytest
+from selenium.webdriver.remote.command import Command
+from app.browser_tabs import BrowserTabs, is_tab, close_tab
+
+
+class FakeBrowserDriver:
+    """Stand-in for a WebDriver that tracks windows and which one commands ran in."""
+
+    def __init__(self):
+        self.windows = ['main']
+        self.current = 'main'
+        self.log = []
+        self.quit_called = False
+
+    @property
+    def current_window_handle(self):
+        return self.current
+
+    def execute(self, driver_command, params=None):
+        if driver_command == Command.NEW_WINDOW:
+            handle = f'tab-{len(self.windows)}'
+            self.windows.append(handle)
+            return {'value': {'handle': handle}}
+        if driver_command == Command.SWITCH_TO_WINDOW:
+            self.current = params['handle']
+        elif driver_command == Command.CLOSE:
+            self.windows.remove(self.current)
+        else:
+            self.log.append((self.current, driver_command))
+        return {'value': None}
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.mark.unit
+class TestBrowserTabs:
+    """Test tabs share browsers and run their commands in their own window."""
+
+    def make_tabs(self, max_tabs=2, setup_tab=None):
+        started = []
+
+        def start_browser():
+            driver = FakeBrowserDriver()
+            started.append(driver)
+            return driver
+
+        return BrowserTabs(start_browser, max_tabs, setup_tab), started
+
+    def test_tabs_share_a_browser(self):
+        """Test a second browser starts only once the first is full."""
+        tabs, started = self.make_tabs(max_tabs=2)
+
+        first, second, third = tabs.open_tab(), tabs.open_tab(), tabs.open_tab()
+
+        assert len(started) == 2
+        assert first.browser is second.browser
+        assert third.browser is not first.browser
+        assert first.window_handle == 'main'
+        assert all(is_tab(tab) for tab in (first, second, third))
+
+    def test_commands_run_in_their_tab(self):
+        """Test each tab switches the browser to its window before a command."""
+        tabs, started = self.make_tabs()
+        first, second = tabs.open_tab(), tabs.open_tab()
+
+        first.execute('getCurrentUrl')
+        second.execute('getCurrentUrl')
+        first.execute('getTitle')
+
+        assert started[0].log == [('main', 'getCurrentUrl'), ('tab-1', 'getCurrentUrl'),
+                                  ('main', 'getTitle')]
+        assert first.command_count == 2
+
+    def test_browser_quits_with_last_tab(self):
+        """Test closing tabs closes windows and the last one quits the browser."""
+        tabs, started = self.make_tabs()
+        first, second = tabs.open_tab(), tabs.open_tab()
+
+        close_tab(second)
+        assert started[0].windows == ['main']
+        assert not started[0].quit_called
+
+        close_tab(first)
+        assert started[0].quit_called
+        assert tabs.browsers == 0
+
+    def test_new_tabs_are_set_up(self):
+        """Test tabs opened in new windows get their per-tab setup in their own window."""
+        tabs, started = self.make_tabs(setup_tab=lambda tab: tab.execute('setBlockedURLs'))
+
+        first, second = tabs.open_tab(), tabs.open_tab()
+
+        assert started[0].log == [('tab-1', 'setBlockedURLs')]
+        assert second.command_count == 1
+        assert first.command_count == 0
@@ -0,0 +1,22 @@
+"""Tests for upload deduplication."""
+
+import hashlib
+import io
+import pytest
+from werkzeug.datastructures import FileStorage
+from app.dedup import save_and_hash
+
+
+@pytest.mark.unit
+class TestSaveAndHash:
+    """Test uploads are hashed while they are written."""
+
+    def test_writes_file_and_returns_digest(self, tmp_path):
+        """Test the saved bytes and the digest both match the upload."""
+        content = b'x' * 200000
+        path = tmp_path / 'upload.txt'
+
+        digest = save_and_hash(FileStorage(io.BytesIO(content), 'upload.txt'), str(path), chunk_size=4096)
+
+        assert path.read_bytes() == content
+        assert digest == hashlib.sha256(content).hexdigest()
@@ -0,0 +1,35 @@
+"""Unit tests for dispatching blocking work off the gevent hub."""
+
+import threading
+import time
+import pytest
+from app import dispatch
+
+
+@pytest.mark.unit
+class TestRunBlocking:
+    """Test blocking work runs inline without gevent and on an OS thread with it."""
+
+    def test_inline_without_gevent(self, monkeypatch):
+        """Test the function is called directly when gevent is not patched in."""
+        monkeypatch.setattr(dispatch, 'gevent_active', lambda: False)
+
+        assert dispatch.run_blocking(threading.get_ident) == threading.get_ident()
+
+    def test_hub_stays_responsive(self, monkeypatch):
+        """Test other greenlets keep running while blocking work runs on a native thread."""
+        gevent = pytest.importorskip('gevent')
+        monkeypatch.setattr(dispatch, 'gevent_active', lambda: True)
+        ticks = []
+
+        def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                gevent.sleep(0.01)
+
+        greenlet = gevent.spawn(ticker)
+        thread_id = dispatch.run_blocking(lambda: time.sleep(0.2) or threading.get_ident())
+        greenlet.join()
+
+        assert thread_id != threading.get_ident()
+        assert len(ticks) == 5
@@ -0,0 +1,189 @@
+"""Unit tests for document processor helpers that do not need a browser."""
+
+import os
+import pytest
+from app import document_processor
+from app.models import db, User, Document
+
+
+class ExplodingDriverManager:
+    """Fails the test if webdriver-manager is asked to resolve anything."""
+
+    def install(self):
+        raise AssertionError('webdriver-manager must not be called')
+
+
+class FakeDriver:
+    """Stand-in for a WebDriver: dashboard rows appear after a few polls, reports download on click."""
+
+    def __init__(self, row_after=None, report=b'%PDF-1.4'):
+        self.row_after = row_after
+        self.report = report
+        self.polls = 0
+        self.download_path = None
+        self.cdp_commands = []
+
+    def find_elements(self, by, value):
+        self.polls += 1
+        if self.row_after is not None and self.polls > self.row_after:
+            return ['row']
+        return []
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp_commands.append((cmd, params))
+        if cmd == 'Browser.setDownloadBehavior':
+            self.download_path = params['downloadPath']
+
+    def execute_script(self, script, *args):
+        if script == document_processor.CLICK_DOWNLOAD_JS:
+            with open(os.path.join(self.download_path, 'report.pdf'), 'wb') as f:
+                f.write(self.report)
+        return True
+
+
+@pytest.fixture
+def processor(app, tmp_path):
+    app.config['DOWNLOAD_DIR'] = str(tmp_path)
+    return document_processor.DocumentProcessor(email='a@example.com', password='secret')
+
+
+@pytest.mark.unit
+class TestResolveChromedriver:
+    """Test chromedriver resolution is pinned, cached and can stay offline."""
+
+    @pytest.fixture(autouse=True)
+    def reset_cache(self, monkeypatch):
+        monkeypatch.setattr(document_processor, '_chromedriver_path', None)
+        monkeypatch.setattr(document_processor, 'ChromeDriverManager', ExplodingDriverManager)
+
+    def test_pinned_path(self, app, tmp_path):
+        """Test CHROMEDRIVER_PATH is used without any lookup."""
+        binary = tmp_path / 'chromedriver'
+        binary.write_text('#!/bin/sh\n')
+        os.chmod(binary, 0o755)
+        app.config['CHROMEDRIVER_PATH'] = str(binary)
+
+        assert document_processor.resolve_chromedriver() == str(binary)
+
+    def test_resolved_once(self, app, tmp_path):
+        """Test the resolved path is cached for later browsers."""
+        binary = tmp_path / 'chromedriver'
+        binary.write_text('#!/bin/sh\n')
+        os.chmod(binary, 0o755)
+        app.config['CHROMEDRIVER_PATH'] = str(binary)
+        document_processor.resolve_chromedriver()
+
+        app.config['CHROMEDRIVER_PATH'] = '/does/not/exist'
+        assert document_processor.resolve_chromedriver() == str(binary)
+
+    def test_offline_without_binary(self, app, monkeypatch):
+        """Test offline mode fails clearly instead of going to the network."""
+        app.config['CHROMEDRIVER_PATH'] = None
+        app.config['CHROMEDRIVER_OFFLINE'] = True
+        monkeypatch.setattr(document_processor.shutil, 'which', lambda name: None)
+
+        with pytest.raises(RuntimeError):
+            document_processor.resolve_chromedriver()
+
+
+@pytest.mark.unit
+class TestLeanProfile:
+    """Test the lean browser profile options."""
+
+    def test_lean_options(self, app):
+        """Test eager loading, image blocking and the domain allowlist."""
+        from selenium import webdriver
+
+        app.config['BROWSER_ALLOWED_DOMAINS'] = ['academi.cx']
+        processor = document_processor.DocumentProcessor(email='a@example.com', password='secret')
+        options = webdriver.ChromeOptions()
+
+        processor._apply_lean_options(options)
+
+        assert options.page_load_strategy == 'eager'
+        assert '--blink-settings=imagesEnabled=false' in options.arguments
+        assert '--host-resolver-rules=MAP * ~NOTFOUND, EXCLUDE academi.cx, EXCLUDE *.academi.cx' in options.arguments
+
+    def test_no_allowlist(self, app):
+        """Test all domains may load when no allowlist is configured."""
+        from selenium import webdriver
+
+        app.config['BROWSER_ALLOWED_DOMAINS'] = []
+        processor = document_processor.DocumentProcessor(email='a@example.com', password='secret')
+        options = webdriver.ChromeOptions()
+
+        processor._apply_lean_options(options)
+
+        assert not any(arg.startswith('--host-resolver-rules') for arg in options.arguments)
+
+
+@pytest.mark.unit
+class TestWaitForUpload:
+    """Test the upload wait ends when the dashboard lists the document and records how long it took."""
+
+    def test_row_appears(self, processor):
+        """Test the wait returns as soon as the uploaded row is listed."""
+        processor.driver = FakeDriver(row_after=1)
+
+        assert processor.wait_for_upload('essay_20240101_abcd1234.pdf', timeout=5)
+        assert processor.driver.polls == 2
+        assert 0 <= processor.last_upload_wait < 5
+
+    def test_timeout(self, processor):
+        """Test a row that never shows up gives up after the timeout."""
+        processor.driver = FakeDriver()
+
+        assert not processor.wait_for_upload('essay.pdf', timeout=0.2)
+        assert processor.last_upload_wait >= 0.2
+
+    def test_wait_recorded_on_document(self, app, processor, tmp_path):
+        """Test the upload stage stores the measured wait in academi_upload_wait."""
+        path = tmp_path / 'essay.pdf'
+        path.write_bytes(b'%PDF-1.4')
+        user = User(username='uploader', email='uploader@example.com')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+        document = Document(filename='essay.pdf', original_filename='essay.pdf', path=str(path), user_id=user.id)
+        db.session.add(document)
+        db.session.commit()
+
+        def upload_document(file_path, unique_name=None):
+            processor.last_upload_wait = 1.5
+            return unique_name
+
+        processor.driver = FakeDriver()
+        processor.upload_document = upload_document
+
+        assert processor.upload_stage(document.id)
+        db.session.expire_all()
+        document = db.session.get(Document, document.id)
+        assert document.academi_uploaded
+        assert document.academi_upload_wait == 1.5
+
+
+@pytest.mark.unit
+class TestReportDownload:
+    """Test reports download into a private directory and are moved into place atomically."""
+
+    def test_job_download_dir(self, processor, tmp_path):
+        """Test each job gets its own directory inside DOWNLOAD_DIR and Chrome is pointed at it."""
+        processor.driver = FakeDriver()
+
+        first, second = processor.job_download_dir(), processor.job_download_dir()
+
+        assert first != second
+        assert os.path.dirname(first) == str(tmp_path)
+        assert os.path.basename(first).startswith('.job-')
+        assert processor.driver.cdp_commands[-1] == (
+            'Browser.setDownloadBehavior', {'behavior': 'allow', 'downloadPath': second})
+
+    def test_extract_results_moves_report(self, processor, tmp_path):
+        """Test the downloaded report is renamed into DOWNLOAD_DIR and the job directory removed."""
+        processor.driver = FakeDriver(report=b'%PDF-1.4 report')
+
+        results = processor.extract_results('essay_20240101_abcd1234.pdf')
+
+        assert results['report_path'] == str(tmp_path / 'essay_20240101_abcd1234_similarity_report.pdf')
+        assert (tmp_path / 'essay_20240101_abcd1234_similarity_report.pdf').read_bytes() == b'%PDF-1.4 report'
+        assert os.listdir(tmp_path) == ['essay_20240101_abcd1234_similarity_report.pdf']
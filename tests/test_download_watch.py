@@ -0,0 +1,64 @@
+"""Unit tests for download completion detection."""
+
+import os
+import threading
+import time
+import pytest
+from app.utils.download_watch import wait_for_download, inotify_available, is_finished_download
+
+
+def finish_download_later(directory, name, delay=0.1):
+    """Simulate Chrome writing a .crdownload file and renaming it when done."""
+    def run():
+        partial = os.path.join(directory, name + '.crdownload')
+        with open(partial, 'wb') as f:
+            f.write(b'%PDF-1.4')
+        time.sleep(delay)
+        os.rename(partial, os.path.join(directory, name))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+@pytest.mark.unit
+class TestWaitForDownload:
+    """Test wait_for_download with inotify and with polling."""
+
+    def test_partial_files_are_not_finished(self):
+        """Test partial and hidden files are ignored."""
+        assert is_finished_download('report.pdf') is True
+        assert is_finished_download('report.pdf.crdownload') is False
+        assert is_finished_download('.com.google.Chrome.abc') is False
+
+    @pytest.mark.skipif(not inotify_available(), reason='inotify not available')
+    def test_inotify_returns_new_file(self, tmp_path):
+        """Test the finished file path is returned as soon as it is renamed."""
+        thread = finish_download_later(str(tmp_path), 'report.pdf')
+
+        path = wait_for_download(str(tmp_path), timeout=5)
+        thread.join()
+
+        assert path == str(tmp_path / 'report.pdf')
+
+    def test_polling_fallback_returns_new_file(self, tmp_path):
+        """Test the polling fallback finds the finished file."""
+        thread = finish_download_later(str(tmp_path), 'report.pdf')
+
+        path = wait_for_download(str(tmp_path), timeout=5, poll_interval=0.05, use_inotify=False)
+        thread.join()
+
+        assert path == str(tmp_path / 'report.pdf')
+
+    def test_existing_file_is_returned(self, tmp_path):
+        """Test a download that finished before waiting started is found."""
+        (tmp_path / 'done.pdf').write_bytes(b'%PDF-1.4')
+
+        assert wait_for_download(str(tmp_path), timeout=1) == str(tmp_path / 'done.pdf')
+
+    def test_ignored_files_and_timeout(self, tmp_path):
+        """Test ignored files do not count and a timeout is raised."""
+        (tmp_path / 'old.pdf').write_bytes(b'%PDF-1.4')
+
+        with pytest.raises(TimeoutError):
+            wait_for_download(str(tmp_path), timeout=0.2, ignore={'old.pdf'})
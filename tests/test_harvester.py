@@ -0,0 +1,160 @@
+"""Tests for the shared dashboard harvester."""
+
+from datetime import datetime, timedelta
+import pytest
+from app import harvester as harvester_module
+from app.harvester import DashboardHarvester, match_ready_rows
+from app.models import db, User, Document
+
+
+class FakePool:
+    """Pool that hands out a dummy session."""
+
+    class Lease:
+        client = None
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    def __init__(self):
+        self.checkouts = 0
+
+    def session(self, timeout=None):
+        self.checkouts += 1
+        return self.Lease()
+
+
+class FakeProcessor:
+    """Processor whose dashboard is a fixed list of rows."""
+
+    rows = []
+    scans = 0
+    fetched = []
+
+    def scan_dashboard(self):
+        FakeProcessor.scans += 1
+        return self.rows
+
+    def extract_results(self, name):
+        FakeProcessor.fetched.append(name)
+        return {'document_name': name, 'processed_at': datetime.utcnow(),
+                'report_path': f'/downloads/{name}_similarity_report.pdf'}
+
+    def record_results(self, document, results):
+        document.status = 'completed'
+        document.processed_at = results['processed_at']
+        document.report_path = 'report.pdf'
+
+
+def add_document(name, uploaded_at=None):
+    user = User.query.first()
+    if user is None:
+        user = User(username='harvest', email='harvest@example.com')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+    document = Document(filename=name, original_filename=name, path=f'/tmp/{name}',
+                        user_id=user.id, status='processing', academi_uploaded=True,
+                        academi_upload_name=name,
+                        academi_upload_time=uploaded_at or datetime.utcnow())
+    db.session.add(document)
+    db.session.commit()
+    return document.id
+
+
+@pytest.mark.unit
+class TestMatchReadyRows:
+    """Test matching dashboard rows against pending names."""
+
+    def test_only_ready_rows_match(self):
+        """Test rows without results are not matched."""
+        rows = [{'text': 'a_1.pdf Processing', 'ready': False},
+                {'text': 'b_2.pdf View Results', 'ready': True}]
+
+        assert match_ready_rows(rows, ['a_1.pdf', 'b_2.pdf', 'c_3.pdf']) == {'b_2.pdf'}
+
+
+@pytest.mark.integration
+class TestDashboardHarvester:
+    """Test a harvest cycle resolves all pending documents at once."""
+
+    @pytest.fixture(autouse=True)
+    def fake_processor(self, monkeypatch):
+        FakeProcessor.scans = 0
+        FakeProcessor.fetched = []
+        monkeypatch.setattr(harvester_module, 'create_processor', lambda client: FakeProcessor())
+
+    def test_single_scan_for_many_documents(self, app):
+        """Test one dashboard scan resolves every ready document."""
+        with app.app_context():
+            ready_ids = [add_document(f'doc_{i}.pdf') for i in range(3)]
+            waiting_id = add_document('slow.pdf')
+        FakeProcessor.rows = [{'text': f'doc_{i}.pdf View Results', 'ready': True} for i in range(3)] + \
+                             [{'text': 'slow.pdf Processing', 'ready': False}]
+
+        pool = FakePool()
+        harvester = DashboardHarvester(app, pool, interval=0, timeout=600)
+        remaining = harvester.run_cycle()
+
+        assert remaining == 1
+        assert FakeProcessor.scans == 1
+        assert sorted(FakeProcessor.fetched) == ['doc_0.pdf', 'doc_1.pdf', 'doc_2.pdf']
+        with app.app_context():
+            assert all(Document.query.get(i).status == 'completed' for i in ready_ids)
+            assert Document.query.get(waiting_id).status == 'processing'
+        assert pool.checkouts == 1
+
+    def test_ready_documents_spread_over_workers(self, app):
+        """Test ready reports are downloaded on several sessions at once."""
+        with app.app_context():
+            ready_ids = [add_document(f'doc_{i}.pdf') for i in range(4)]
+        FakeProcessor.rows = [{'text': f'doc_{i}.pdf View Results', 'ready': True} for i in range(4)]
+
+        pool = FakePool()
+        harvester = DashboardHarvester(app, pool, interval=0, timeout=600, workers=2)
+
+        assert harvester.run_cycle() == 0
+        assert pool.checkouts == 2
+        assert sorted(FakeProcessor.fetched) == [f'doc_{i}.pdf' for i in range(4)]
+        with app.app_context():
+            assert all(Document.query.get(i).status == 'completed' for i in ready_ids)
+
+    def test_only_the_leader_harvests(self, app):
+        """Test a harvester without the lease leaves the dashboard to the leader."""
+        from app.job_queue import acquire_lease
+        with app.app_context():
+            add_document('doc.pdf')
+            assert acquire_lease(DashboardHarvester.LEASE_NAME, 'other-node', 60)
+        FakeProcessor.rows = [{'text': 'doc.pdf View Results', 'ready': True}]
+
+        pool = FakePool()
+        harvester = DashboardHarvester(app, pool, interval=0, timeout=600, holder='this-node')
+
+        assert harvester.run_cycle() == 1
+        assert FakeProcessor.scans == 0
+        assert pool.checkouts == 0
+
+    def test_timed_out_documents_fail(self, app):
+        """Test documents past the deadline are marked failed."""
+        with app.app_context():
+            document_id = add_document('old.pdf', datetime.utcnow() - timedelta(seconds=700))
+        FakeProcessor.rows = []
+
+        harvester = DashboardHarvester(app, FakePool(), interval=0, timeout=600)
+
+        assert harvester.run_cycle() == 0
+        with app.app_context():
+            assert Document.query.get(document_id).status == 'failed'
+
+    def test_wait_for_returns_when_completed(self, app):
+        """Test a waiting job is woken once its document is harvested."""
+        with app.app_context():
+            document_id = add_document('wait.pdf')
+        FakeProcessor.rows = [{'text': 'wait.pdf View Results', 'ready': True}]
+
+        harvester = DashboardHarvester(app, FakePool(), interval=0.01, timeout=600)
+
+        assert harvester.wait_for(document_id, timeout=5) is True
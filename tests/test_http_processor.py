@@ -0,0 +1,63 @@
+"""Unit tests for the HTTP processor backend."""
+
+import pytest
+from app.http_processor import HttpProcessor, parse_page, find_link
+from app.document_processor import DocumentProcessor
+from app.processor_backend import get_processor_class
+
+
+DASHBOARD_HTML = """
+<html><body>
+<form action="/upload/" method="post" enctype="multipart/form-data">
+  <input type="hidden" name="csrfmiddlewaretoken" value="tok">
+  <input type="file" name="document">
+  <button type="submit">Upload</button>
+</form>
+<table>
+  <tr><td>essay_20240101_120000_abcd1234.docx</td><td>Processing</td></tr>
+  <tr><td>thesis_20240101_120500_ef567890.pdf</td>
+      <td><a href="/results/42/">View Results</a></td></tr>
+</table>
+</body></html>
+"""
+
+
+@pytest.mark.unit
+class TestPageParser:
+    """Test parsing academi.cx pages without a browser."""
+
+    def test_upload_form(self):
+        """Test the upload form and its hidden fields are found."""
+        form = parse_page(DASHBOARD_HTML).find_form(input_type='file')
+
+        assert form['action'] == '/upload/'
+        assert form['method'] == 'post'
+        assert {'name': 'csrfmiddlewaretoken', 'type': 'hidden', 'value': 'tok'} in form['inputs']
+
+    def test_rows_and_results_links(self):
+        """Test rows keep their text and results links."""
+        rows = parse_page(DASHBOARD_HTML).rows
+
+        assert len(rows) == 2
+        assert 'essay_20240101_120000_abcd1234.docx' in rows[0]['text']
+        assert find_link(rows[0]['links'], 'View Results') is None
+        assert find_link(rows[1]['links'], 'View Results')['url'] == '/results/42/'
+
+
+@pytest.mark.unit
+class TestBackendSelection:
+    """Test PROCESSOR_BACKEND picks the implementation."""
+
+    def test_default_is_selenium(self, app):
+        """Test Selenium stays the default backend."""
+        assert get_processor_class() is DocumentProcessor
+
+    def test_http_backend(self, app):
+        """Test the HTTP backend can be selected by config."""
+        app.config['PROCESSOR_BACKEND'] = 'http'
+        assert get_processor_class() is HttpProcessor
+
+    def test_unknown_backend(self, app):
+        """Test an unknown backend name is rejected."""
+        with pytest.raises(ValueError):
+            get_processor_class('carrier-pigeon')
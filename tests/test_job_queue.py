@@ -0,0 +1,213 @@
+"""Tests for the database-backed processing job queue."""
+
+import pytest
+from datetime import datetime, timedelta
+from app.models import db, User, Document, ProcessingJob
+from app.job_queue import (enqueue, claim_next, finish, queue_depth, recover_interrupted,
+                           renew_leases, reclaim_expired, acquire_lease)
+
+
+def add_document(name='queued.pdf'):
+    user = User.query.first()
+    if user is None:
+        user = User(username='queue', email='queue@example.com')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+    document = Document(filename=name, original_filename=name, path=f'/tmp/{name}',
+                        user_id=user.id, status='processing')
+    db.session.add(document)
+    db.session.commit()
+    return document.id
+
+
+def expire(job_id):
+    job = db.session.get(ProcessingJob, job_id)
+    job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+@pytest.mark.unit
+class TestJobQueue:
+    """Test enqueueing and atomic claiming."""
+
+    def test_enqueue_is_idempotent(self, app):
+        """Test a document only ever has one active job."""
+        with app.app_context():
+            document_id = add_document()
+
+            first = enqueue(document_id)
+            second = enqueue(document_id)
+
+            assert first.id == second.id
+            assert queue_depth() == 1
+
+    def test_claim_in_order_and_once(self, app):
+        """Test jobs are claimed oldest first and never twice."""
+        with app.app_context():
+            first_id = enqueue(add_document('a.pdf')).id
+            second_id = enqueue(add_document('b.pdf')).id
+
+            first = claim_next('worker-1')
+            second = claim_next('worker-2')
+
+            assert (first.id, second.id) == (first_id, second_id)
+            assert first.status == 'running'
+            assert first.worker_id == 'worker-1'
+            assert first.attempts == 1
+            assert claim_next('worker-3') is None
+
+    def test_finish(self, app):
+        """Test finishing records the outcome and frees the document."""
+        with app.app_context():
+            document_id = add_document()
+            enqueue(document_id)
+            job = claim_next('worker-1')
+            finish(job.id, False, 'boom')
+
+            job = db.session.get(ProcessingJob, job.id)
+            assert job.status == 'failed'
+            assert job.error == 'boom'
+            assert job.finished_at is not None
+            assert enqueue(document_id).id != job.id
+
+    def test_jobs_deleted_with_document(self, app):
+        """Test deleting a document removes its jobs."""
+        with app.app_context():
+            document_id = add_document()
+            enqueue(document_id)
+
+            db.session.delete(db.session.get(Document, document_id))
+            db.session.commit()
+
+            assert ProcessingJob.query.count() == 0
+
+
+@pytest.mark.unit
+class TestRecoverInterrupted:
+    """Test documents interrupted by a crash are resumed without re-uploading."""
+
+    def test_abandoned_jobs(self, app):
+        """Test uploaded documents go to the harvester and the rest are re-queued."""
+        with app.app_context():
+            uploaded_id = add_document('uploaded.pdf')
+            fresh_id = add_document('fresh.pdf')
+            db.session.get(Document, uploaded_id).academi_uploaded = True
+            db.session.commit()
+            enqueue(uploaded_id)
+            enqueue(fresh_id)
+            uploaded_job = claim_next('dead-worker')
+            fresh_job = claim_next('dead-worker')
+            expire(uploaded_job.id)
+            expire(fresh_job.id)
+
+            assert recover_interrupted() == (1, 1)
+
+            assert db.session.get(ProcessingJob, uploaded_job.id).status == 'done'
+            fresh_job = db.session.get(ProcessingJob, fresh_job.id)
+            assert fresh_job.status == 'queued'
+            assert fresh_job.worker_id is None
+            assert queue_depth() == 1
+            assert db.session.get(Document, uploaded_id).academi_uploaded
+
+    def test_processing_documents_without_job(self, app):
+        """Test processing documents with no active job are picked up."""
+        with app.app_context():
+            uploaded_id = add_document('uploaded.pdf')
+            add_document('fresh.pdf')
+            db.session.get(Document, uploaded_id).academi_uploaded = True
+            db.session.commit()
+
+            assert recover_interrupted() == (1, 1)
+            assert queue_depth() == 1
+            assert ProcessingJob.query.filter_by(document_id=uploaded_id).count() == 0
+
+    def test_leased_jobs_left_alone(self, app):
+        """Test jobs another node holds under a live lease survive a startup recovery."""
+        with app.app_context():
+            enqueue(add_document())
+            job = claim_next('live-node')
+
+            assert recover_interrupted() == (0, 0)
+            assert db.session.get(ProcessingJob, job.id).worker_id == 'live-node'
+
+    def test_jobs_without_lease(self, app):
+        """Test jobs claimed before leases existed fall back to the stale threshold."""
+        with app.app_context():
+            enqueue(add_document())
+            job = claim_next('old-worker')
+            job.lease_expires_at = None
+            db.session.commit()
+
+            assert recover_interrupted(stale_after=3600) == (0, 0)
+            assert recover_interrupted() == (1, 0)
+
+    def test_recent_jobs_left_alone(self, app):
+        """Test jobs younger than the stale threshold keep running."""
+        with app.app_context():
+            enqueue(add_document())
+            claim_next('live-worker')
+
+            assert recover_interrupted(stale_after=3600) == (0, 0)
+            assert ProcessingJob.query.filter_by(status='running').count() == 1
+
+
+@pytest.mark.unit
+class TestLeases:
+    """Test lease-based job ownership across worker nodes."""
+
+    def test_claim_sets_lease_and_heartbeat_renews_it(self, app):
+        """Test heartbeats extend leases only for jobs the worker still holds."""
+        with app.app_context():
+            enqueue(add_document())
+            job = claim_next('node-a', lease_seconds=60)
+            first_expiry = job.lease_expires_at
+            assert first_expiry > datetime.utcnow()
+
+            assert renew_leases('node-a', [job.id], lease_seconds=600) == set()
+            assert db.session.get(ProcessingJob, job.id).lease_expires_at > first_expiry
+            assert renew_leases('node-b', [job.id]) == {job.id}
+
+    def test_expired_leases_are_reclaimed(self, app):
+        """Test a dead node's jobs are re-queued or handed to the harvester."""
+        with app.app_context():
+            uploaded_id = add_document('uploaded.pdf')
+            db.session.get(Document, uploaded_id).academi_uploaded = True
+            db.session.commit()
+            enqueue(uploaded_id)
+            enqueue(add_document('fresh.pdf'))
+            enqueue(add_document('live.pdf'))
+            uploaded_job = claim_next('dead-node')
+            fresh_job = claim_next('dead-node')
+            live_job = claim_next('live-node')
+            expire(uploaded_job.id)
+            expire(fresh_job.id)
+
+            assert reclaim_expired() == (1, 1)
+            assert db.session.get(ProcessingJob, uploaded_job.id).status == 'done'
+            assert db.session.get(ProcessingJob, fresh_job.id).status == 'queued'
+            assert db.session.get(ProcessingJob, live_job.id).status == 'running'
+            assert reclaim_expired() == (0, 0)
+
+    def test_finish_ignored_after_reclaim(self, app):
+        """Test a worker that lost its job cannot overwrite the new owner's outcome."""
+        with app.app_context():
+            enqueue(add_document())
+            job = claim_next('slow-node')
+            expire(job.id)
+            reclaim_expired()
+            claim_next('new-node')
+
+            assert finish(job.id, False, 'late', worker_id='slow-node') is None
+            assert finish(job.id, True, worker_id='new-node').status == 'done'
+
+    def test_named_lease_has_one_holder(self, app):
+        """Test only one node holds a named lease until it expires."""
+        with app.app_context():
+            assert acquire_lease('harvester', 'node-a', 60)
+            assert acquire_lease('harvester', 'node-a', 60)
+            assert not acquire_lease('harvester', 'node-b', 60)
+
+            assert acquire_lease('harvester', 'node-a', -1)
+            assert acquire_lease('harvester', 'node-b', 60)
+            assert not acquire_lease('harvester', 'node-a', 60)
@@ -0,0 +1,203 @@
+"""Tests for the offline similarity engine."""
+
+import random
+import pytest
+from app import local_similarity
+from app.local_similarity import FingerprintIndex, LocalSimilarityProcessor, fingerprints
+from app.models import db, User, Document
+from app.utils.pdf_report import write_text_pdf
+
+VOCABULARY = [f'term{i}' for i in range(2000)]
+
+
+def tokens(seed, length=400):
+    rng = random.Random(seed)
+    return [rng.choice(VOCABULARY) for _ in range(length)]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def scoring(request, monkeypatch):
+    """Run a test with vectorized and pure-Python scoring."""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(local_similarity, 'np', None)
+    return request.param
+
+
+@pytest.mark.unit
+class TestFingerprints:
+    """Test winnowed fingerprints."""
+
+    def test_shared_passage_detected(self):
+        """Test a copied passage of at least eight words shares fingerprints."""
+        passage = tokens(1, 8)
+        first = fingerprints(tokens(2, 100) + passage + tokens(3, 100))
+        second = fingerprints(tokens(4, 100) + passage + tokens(5, 100))
+        assert first & second
+
+    def test_density(self):
+        """Test winnowing keeps a fraction of the shingles."""
+        assert len(fingerprints(tokens(1, 1000))) < 600
+
+
+@pytest.mark.unit
+class TestFingerprintIndex:
+    """Test the memory-mapped inverted index."""
+
+    def test_score_copied_half(self, tmp_path, scoring):
+        """Test a document half copied from another scores about half."""
+        index = FingerprintIndex(str(tmp_path))
+        source = tokens(1)
+        index.add(1, fingerprints(source))
+        index.add(2, fingerprints(tokens(2)))
+        index.merge()
+        index.add(3, fingerprints(tokens(3)))
+
+        similarity, sources = index.score(fingerprints(source[:200] + tokens(9, 200)))
+
+        assert 40 <= similarity <= 60
+        assert [document_id for document_id, _ in sources] == [1]
+
+    def test_delta_and_generation_agree(self, tmp_path, scoring):
+        """Test merged and unmerged postings score the same."""
+        index = FingerprintIndex(str(tmp_path))
+        for document_id in range(1, 6):
+            index.add(document_id, fingerprints(tokens(document_id)))
+        query = fingerprints(tokens(3))
+        before = index.score(query)
+        index.merge()
+
+        assert index.score(query) == before
+        assert before[0] == 100.0
+
+    def test_exclude_and_remove(self, tmp_path, scoring):
+        """Test a document never matches itself and removed documents stop matching."""
+        index = FingerprintIndex(str(tmp_path))
+        text = fingerprints(tokens(1))
+        index.add(1, text)
+        index.add(2, text)
+        index.merge()
+
+        assert index.score(text, exclude=1)[1][0][0] == 2
+        index.remove(2)
+        assert index.score(text, exclude=1) == (0.0, [])
+        assert len(index) == 1
+
+    def test_readded_document_replaced(self, tmp_path, scoring):
+        """Test a merge keeps only the latest postings of a document added again."""
+        index = FingerprintIndex(str(tmp_path))
+        index.add(1, fingerprints(tokens(1)))
+        index.add(2, fingerprints(tokens(2)))
+        index.merge()
+        index.remove(1)
+        index.add(1, fingerprints(tokens(3)))
+        index.merge()
+
+        assert index.score(fingerprints(tokens(1)))[1] == []
+        assert index.score(fingerprints(tokens(3)))[1][0][0] == 1
+        assert list(index._generation.hashes) == sorted(index._generation.hashes)
+
+    def test_add_leaves_merge_to_maintenance(self, tmp_path):
+        """Test additions only flag the index for merging."""
+        index = FingerprintIndex(str(tmp_path), merge_threshold=1)
+        assert not index.needs_merge
+
+        index.add(1, fingerprints(tokens(1)))
+        assert index._generation is None
+        assert index.needs_merge
+        index.merge()
+        assert not index.needs_merge
+
+    def test_shared_between_processes(self, tmp_path):
+        """Test additions and merges by one instance are seen by another."""
+        writer = FingerprintIndex(str(tmp_path))
+        reader = FingerprintIndex(str(tmp_path))
+        text = fingerprints(tokens(1))
+
+        writer.add(1, text)
+        assert 1 in reader
+        assert reader.score(text)[0] == 100.0
+        writer.add(2, fingerprints(tokens(2)))
+        writer.merge()
+        assert reader.score(fingerprints(tokens(2)))[1][0][0] == 2
+
+
+@pytest.mark.unit
+class TestPdfReport:
+    """Test the minimal PDF writer."""
+
+    def test_structure(self, tmp_path):
+        """Test the file is a PDF with one page per 60 lines and a valid xref offset."""
+        path = tmp_path / 'report.pdf'
+        write_text_pdf(str(path), 'Report (local)', [f'line {i}' for i in range(61)])
+        data = path.read_bytes()
+
+        assert data.startswith(b'%PDF-1.4')
+        assert b'/Count 2' in data
+        startxref = int(data.rsplit(b'startxref\n', 1)[1].split(b'\n')[0])
+        assert data[startxref:].startswith(b'xref')
+
+
+@pytest.mark.integration
+class TestLocalSimilarityProcessor:
+    """Test the local backend completes documents with scores and a report."""
+
+    def test_process_document(self, app, tmp_path):
+        """Test a resubmitted essay is scored against the stored corpus."""
+        app.config['DOWNLOAD_DIR'] = str(tmp_path)
+        essay = ' '.join(tokens(1))
+        with app.app_context():
+            user = User(username='local', email='local@example.com')
+            user.set_password('password')
+            db.session.add(user)
+            db.session.commit()
+            ids = []
+            for name, text in [('original.txt', essay), ('copy.txt', essay)]:
+                path = tmp_path / name
+                path.write_text(text)
+                document = Document(filename=name, original_filename=name, path=str(path),
+                                    user_id=user.id, status='processing')
+                db.session.add(document)
+                db.session.commit()
+                ids.append(document.id)
+
+            processor = LocalSimilarityProcessor()
+            assert processor.process_document(ids[0])
+            assert processor.process_document(ids[1])
+
+            db.session.expire_all()
+            original, copy = db.session.get(Document, ids[0]), db.session.get(Document, ids[1])
+            assert original.status == 'completed'
+            assert original.similarity_score == 0.0
+            assert copy.similarity_score == 100.0
+            assert copy.word_count == 400
+            assert (tmp_path / copy.report_path).read_bytes().startswith(b'%PDF')
+
+    def test_report_hides_other_users_filenames(self, app, tmp_path):
+        """Test matches owned by another user are listed without their filename."""
+        app.config['DOWNLOAD_DIR'] = str(tmp_path)
+        essay = ' '.join(tokens(1))
+        with app.app_context():
+            ids = []
+            for username, name in [('owner', 'private-thesis.txt'), ('other', 'copy.txt')]:
+                user = User(username=username, email=f'{username}@example.com')
+                user.set_password('password')
+                db.session.add(user)
+                db.session.commit()
+                path = tmp_path / name
+                path.write_text(essay)
+                document = Document(filename=name, original_filename=name, path=str(path),
+                                    user_id=user.id, status='processing')
+                db.session.add(document)
+                db.session.commit()
+                ids.append(document.id)
+
+            processor = LocalSimilarityProcessor()
+            assert processor.process_document(ids[0])
+            assert processor.process_document(ids[1])
+
+            db.session.expire_all()
+            report = (tmp_path / db.session.get(Document, ids[1]).report_path).read_bytes()
+            assert b'private-thesis' not in report
+            assert b'document from another user' in report
@@ -1,8 +1,9 @@
 """Tests for main application routes."""
 
+import hashlib
 import pytest
 import io
-from app.models import Document, User, db
+from app.models import Document, User, ProcessingJob, db
 
 
 @pytest.mark.integration
@@ -99,3 +100,96 @@ class TestMainRoutes:
         with app.app_context():
             doc = Document.query.get(sample_document.id)
             assert doc is None
+
+    def test_upload_queues_job(self, client, logged_in_user, app):
+        """Test an upload is queued for a worker instead of processed in the request."""
+        data = {
+            'document': (io.BytesIO(b'queued content'), 'queued.txt'),
+            'csrf_token': 'dummy'
+        }
+
+        client.post('/upload', data=data, content_type='multipart/form-data')
+
+        with app.app_context():
+            doc = Document.query.filter(Document.original_filename == 'queued.txt').first()
+            job = ProcessingJob.query.filter_by(document_id=doc.id).one()
+            assert job.status == 'queued'
+
+    def test_identical_upload_reuses_report(self, client, logged_in_user, app, tmp_path):
+        """Test resubmitting identical bytes completes at once with the earlier report."""
+        app.config['DOWNLOAD_DIR'] = str(tmp_path)
+        (tmp_path / 'first_similarity_report.pdf').write_bytes(b'%PDF-1.4')
+        content = b'identical submission'
+
+        client.post('/upload', data={'document': (io.BytesIO(content), 'first.txt')},
+                    content_type='multipart/form-data')
+        with app.app_context():
+            first = Document.query.filter_by(original_filename='first.txt').first()
+            assert first.content_sha256 is not None
+            first.status = 'completed'
+            first.similarity_score = 42.0
+            first.report_path = 'first_similarity_report.pdf'
+            db.session.commit()
+
+        client.post('/upload', data={'document': (io.BytesIO(content), 'again.txt')},
+                    content_type='multipart/form-data')
+
+        with app.app_context():
+            again = Document.query.filter_by(original_filename='again.txt').first()
+            assert again.status == 'completed'
+            assert again.similarity_score == 42.0
+            assert again.report_path == 'first_similarity_report.pdf'
+            assert ProcessingJob.query.filter_by(document_id=again.id).count() == 0
+
+    def test_other_users_identical_upload_is_flagged(self, client, logged_in_user, app, tmp_path):
+        """Test identical bytes checked for another user are queued and flagged as a copy, not reused."""
+        app.config['DOWNLOAD_DIR'] = str(tmp_path)
+        (tmp_path / 'theirs_similarity_report.pdf').write_bytes(b'%PDF-1.4')
+        content = b'submission of another student'
+        with app.app_context():
+            other = User(username='other', email='other@example.com')
+            other.set_password('password')
+            db.session.add(other)
+            db.session.commit()
+            original = Document(filename='theirs.txt', original_filename='theirs.txt', path='/tmp/theirs.txt',
+                                user_id=other.id, status='completed', similarity_score=42.0,
+                                report_path='theirs_similarity_report.pdf',
+                                content_sha256=hashlib.sha256(content).hexdigest())
+            db.session.add(original)
+            db.session.commit()
+            original_id = original.id
+
+        client.post('/upload', data={'document': (io.BytesIO(content), 'mine.txt')},
+                    content_type='multipart/form-data')
+
+        with app.app_context():
+            mine = Document.query.filter_by(original_filename='mine.txt').first()
+            assert mine.status == 'processing'
+            assert mine.report_path is None
+            assert mine.near_duplicate_of_id == original_id
+            assert mine.near_duplicate_score == 1.0
+            assert ProcessingJob.query.filter_by(document_id=mine.id).one().status == 'queued'
+
+    def test_revised_upload_flagged_as_near_duplicate(self, client, logged_in_user, app):
+        """Test a lightly revised resubmission is linked to the earlier document."""
+        from app.near_duplicate import index_document
+
+        words = ' '.join(f'paragraph{i % 97} sentence{i % 89} word{i}' for i in range(400))
+        client.post('/upload', data={'document': (io.BytesIO(words.encode()), 'draft.txt')},
+                    content_type='multipart/form-data')
+        with app.app_context():
+            draft = Document.query.filter_by(original_filename='draft.txt').first()
+            draft.status = 'completed'
+            db.session.commit()
+            index_document(draft)
+            draft_id = draft.id
+
+        revised = words.replace('word7 ', 'changed ')
+        client.post('/upload', data={'document': (io.BytesIO(revised.encode()), 'final.txt')},
+                    content_type='multipart/form-data')
+
+        with app.app_context():
+            final = Document.query.filter_by(original_filename='final.txt').first()
+            assert final.near_duplicate_of_id == draft_id
+            assert final.near_duplicate_score > 0.9
+            assert final.status == 'processing'
@@ -0,0 +1,102 @@
+"""Unit tests for processing metrics."""
+
+import json
+import os
+import pytest
+from app.metrics import Metrics, export, aggregate
+from app.document_processor import instrument_driver
+
+
+class FakeDriver:
+    """Driver whose commands all succeed."""
+
+    def execute(self, driver_command, params=None):
+        return {'value': driver_command}
+
+
+@pytest.mark.unit
+class TestMetrics:
+    """Test the metrics registry."""
+
+    def test_counters_gauges_and_summaries(self):
+        """Test each metric kind shows up in the snapshot."""
+        registry = Metrics()
+        registry.incr('jobs')
+        registry.incr('jobs', 2)
+        registry.set_gauge('slots', 4)
+        registry.observe('latency', 1.0)
+        registry.observe('latency', 3.0)
+
+        snapshot = registry.snapshot()
+
+        assert snapshot['counters']['jobs'] == 3
+        assert snapshot['gauges']['slots'] == 4
+        assert snapshot['summaries']['latency'] == {'count': 2, 'sum': 4.0, 'min': 1.0, 'max': 3.0, 'avg': 2.0}
+
+    def test_timed(self):
+        """Test timed blocks are observed in seconds."""
+        registry = Metrics()
+        with registry.timed('block'):
+            pass
+
+        assert registry.snapshot()['summaries']['block']['count'] == 1
+
+    def test_drain_and_merge(self):
+        """Test a child's drained metrics add up in its parent's registry."""
+        parent, child = Metrics(), Metrics()
+        parent.incr('jobs')
+        parent.observe('latency', 4.0)
+        child.incr('jobs', 2)
+        child.set_gauge('slots', 1)
+        child.observe('latency', 2.0)
+
+        parent.merge(child.drain())
+        snapshot = parent.snapshot()
+
+        assert child.snapshot() == {'counters': {}, 'gauges': {}, 'summaries': {}}
+        assert snapshot['counters']['jobs'] == 3
+        assert snapshot['gauges']['slots'] == 1
+        assert snapshot['summaries']['latency'] == {'count': 2, 'sum': 6.0, 'min': 2.0, 'max': 4.0, 'avg': 3.0}
+
+    def test_export_and_aggregate(self, tmp_path):
+        """Test exported snapshots of several processes are summed, gauges kept per process."""
+        for source, jobs, latency in [('host:1', 1, 1.0), ('host:2', 2, 5.0)]:
+            registry = Metrics()
+            registry.incr('jobs', jobs)
+            registry.set_gauge('slots', jobs)
+            registry.observe('latency', latency)
+            export(str(tmp_path), source, registry)
+        (tmp_path / 'metrics-broken.json').write_text('{')
+
+        combined = aggregate(str(tmp_path))
+
+        assert combined['counters'] == {'jobs': 3}
+        assert combined['gauges'] == {'host:1': {'slots': 1}, 'host:2': {'slots': 2}}
+        assert combined['summaries']['latency'] == {'count': 2, 'sum': 6.0, 'min': 1.0, 'max': 5.0, 'avg': 3.0}
+        assert set(combined['sources']) == {'host:1', 'host:2'}
+
+    def test_aggregate_drops_stale_snapshots(self, tmp_path):
+        """Test snapshots of processes that stopped exporting are left out and deleted."""
+        registry = Metrics()
+        registry.incr('jobs')
+        export(str(tmp_path), 'host:1', registry)
+        stale = export(str(tmp_path), 'host:2', registry)
+        with open(stale) as f:
+            data = json.load(f)
+        data['written_at'] -= 600
+        with open(stale, 'w') as f:
+            json.dump(data, f)
+
+        combined = aggregate(str(tmp_path), max_age=90)
+
+        assert combined['counters'] == {'jobs': 1}
+        assert set(combined['sources']) == {'host:1'}
+        assert not os.path.exists(stale)
+
+    def test_instrumented_driver_counts_commands(self):
+        """Test every WebDriver command is counted."""
+        driver = instrument_driver(FakeDriver())
+
+        driver.execute('get', {'url': 'https://academi.cx/dashboard'})
+        assert driver.execute('executeScript')['value'] == 'executeScript'
+        assert driver.command_count == 2
@@ -0,0 +1,128 @@
+"""Tests for the local near-duplicate index."""
+
+import random
+import zipfile
+import pytest
+from app.near_duplicate import (NearDuplicateIndex, minhash, shingle_hashes,
+                                estimate_similarity, signature_for_file, NUM_HASHES)
+from app.utils.text_extract import extract_text
+
+WORDS = ['policy', 'spectrum', 'network', 'licence', 'operator', 'tariff', 'mobile', 'data',
+         'rural', 'coverage', 'regulator', 'market', 'fibre', 'access', 'consumer', 'quality']
+
+
+def essay(seed, length=600):
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(WORDS) + str(rng.randint(0, 50)) for _ in range(length))
+
+
+def revise(text, fraction, seed=0):
+    """Replace a fraction of the words of ``text``"""
+    rng = random.Random(seed)
+    tokens = text.split()
+    for i in rng.sample(range(len(tokens)), int(len(tokens) * fraction)):
+        tokens[i] = 'edited'
+    return ' '.join(tokens)
+
+
+def signature(text):
+    return minhash(shingle_hashes(text))
+
+
+@pytest.mark.unit
+class TestMinHash:
+    """Test signatures estimate text similarity."""
+
+    def test_identical_and_unrelated(self):
+        """Test identical texts match exactly and unrelated texts barely at all."""
+        text = essay(1)
+        assert estimate_similarity(signature(text), signature(text)) == 1.0
+        assert estimate_similarity(signature(text), signature(essay(2))) < 0.1
+
+    def test_light_revision_stays_similar(self):
+        """Test a lightly revised text keeps a high estimated similarity."""
+        text = essay(1)
+        assert estimate_similarity(signature(text), signature(revise(text, 0.02))) > 0.7
+
+    def test_short_and_empty_texts(self):
+        """Test short texts get full signatures and empty ones none."""
+        assert len(signature('just three words')) == NUM_HASHES
+        assert signature('') is None
+
+
+@pytest.mark.unit
+class TestNearDuplicateIndex:
+    """Test the on-disk LSH index."""
+
+    def test_query_finds_revision(self, tmp_path):
+        """Test a revision is matched and unrelated documents are not."""
+        index = NearDuplicateIndex(str(tmp_path / 'index.idx'), threshold=0.6)
+        original = essay(1)
+        index.add(1, signature(original))
+        index.add(2, signature(essay(2)))
+
+        matches = index.query(signature(revise(original, 0.02)))
+
+        assert [document_id for document_id, _ in matches] == [1]
+        assert matches[0][1] > 0.7
+
+    def test_shared_between_instances(self, tmp_path):
+        """Test records appended by one process are seen by another."""
+        path = str(tmp_path / 'index.idx')
+        writer = NearDuplicateIndex(path)
+        reader = NearDuplicateIndex(path)
+        text = essay(3)
+
+        writer.add(7, signature(text))
+        assert reader.query(signature(text)) == [(7, 1.0)]
+
+        writer.remove(7)
+        assert reader.query(signature(text)) == []
+        assert len(reader) == 0
+
+    def test_file_is_compact(self, tmp_path):
+        """Test each document costs one fixed-size record."""
+        path = tmp_path / 'index.idx'
+        index = NearDuplicateIndex(str(path))
+        for document_id in range(10):
+            index.add(document_id, signature(essay(document_id)))
+
+        assert path.stat().st_size == 6 + 10 * (5 + NUM_HASHES * 4)
+
+    def test_rebuild_compacts(self, tmp_path):
+        """Test a rebuild keeps only the given entries."""
+        path = tmp_path / 'index.idx'
+        index = NearDuplicateIndex(str(path))
+        index.add(1, signature(essay(1)))
+        index.remove(1)
+
+        index.rebuild([(2, signature(essay(2)))])
+
+        assert len(index) == 1
+        assert path.stat().st_size == 6 + 5 + NUM_HASHES * 4
+
+
+@pytest.mark.unit
+class TestTextExtraction:
+    """Test local text extraction."""
+
+    def test_docx(self, tmp_path):
+        """Test paragraph text is read from a docx."""
+        path = tmp_path / 'essay.docx'
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('word/document.xml', (
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                '<w:body><w:p><w:r><w:t>Spectrum </w:t></w:r><w:r><w:t>policy</w:t></w:r></w:p>'
+                '<w:p><w:r><w:t>Second paragraph</w:t></w:r></w:p></w:body></w:document>'
+            ))
+
+        assert extract_text(str(path)) == 'Spectrum policy\nSecond paragraph'
+
+    def test_txt_and_unsupported(self, tmp_path):
+        """Test text files are read and unsupported types yield nothing."""
+        (tmp_path / 'essay.txt').write_text('plain text essay')
+        (tmp_path / 'essay.doc').write_bytes(b'\xd0\xcf\x11\xe0')
+
+        assert extract_text(str(tmp_path / 'essay.txt')) == 'plain text essay'
+        assert extract_text(str(tmp_path / 'essay.doc')) == ''
+        assert signature_for_file(str(tmp_path / 'essay.doc')) is None
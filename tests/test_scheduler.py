@@ -0,0 +1,101 @@
+"""Tests for fair scheduling across users and priority lanes."""
+
+import pytest
+from app.models import db, User, Document, ProcessingJob
+from app.job_queue import enqueue, claim_next
+from app.scheduler import LANE_PRIORITY, LANE_INTERACTIVE, LANE_BATCH, queue_position
+
+
+def add_user(name, is_admin=False, queue_weight=1):
+    user = User(username=name, email=f'{name}@example.com', is_admin=is_admin, queue_weight=queue_weight)
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def submit(user_id, count=1):
+    """Upload and queue ``count`` documents for a user; returns their ids"""
+    ids = []
+    for _ in range(count):
+        document = Document(filename='d.pdf', original_filename='d.pdf', path='/tmp/d.pdf',
+                            user_id=user_id, status='processing')
+        db.session.add(document)
+        db.session.commit()
+        enqueue(document.id)
+        ids.append(document.id)
+    return ids
+
+
+def claim_owners(count):
+    owners = []
+    for _ in range(count):
+        job = claim_next('worker')
+        owners.append(job.document.user_id)
+    return owners
+
+
+@pytest.mark.unit
+class TestScheduler:
+    """Test lanes and weighted round-robin decide the claim order."""
+
+    def test_lanes(self, app):
+        """Test admins and single submissions jump the batch queue."""
+        with app.app_context():
+            bulk = add_user('bulk')
+            single = add_user('single')
+            admin = add_user('boss', is_admin=True)
+            bulk_ids = submit(bulk, 3)
+            single_id, = submit(single)
+            admin_id, = submit(admin)
+
+            lanes = {job.document_id: job.lane for job in ProcessingJob.query}
+            assert lanes[bulk_ids[0]] == LANE_INTERACTIVE
+            assert lanes[bulk_ids[1]] == LANE_BATCH
+            assert lanes[single_id] == LANE_INTERACTIVE
+            assert lanes[admin_id] == LANE_PRIORITY
+
+            claimed = [claim_next('worker').document_id for _ in range(5)]
+            assert claimed == [admin_id, bulk_ids[0], single_id, bulk_ids[1], bulk_ids[2]]
+
+    def test_users_take_turns(self, app):
+        """Test a bulk upload does not starve a later user."""
+        with app.app_context():
+            bulk = add_user('bulk')
+            other = add_user('other')
+            submit(bulk, 6)
+            claim_next('worker')
+            submit(other, 2)
+
+            assert claim_owners(4) == [other, bulk, other, bulk]
+
+    def test_weights(self, app):
+        """Test a user with twice the weight gets twice the turns."""
+        with app.app_context():
+            light = add_user('light')
+            heavy = add_user('heavy', queue_weight=2)
+            submit(light, 5)
+            submit(heavy, 5)
+            claim_next('worker')
+            claim_next('worker')
+
+            assert claim_owners(6).count(heavy) == 4
+
+    def test_queue_position(self, app):
+        """Test a document's position counts the other users' turns ahead of it."""
+        with app.app_context():
+            bulk = add_user('bulk')
+            other = add_user('other')
+            submit(bulk, 2)
+            bulk_ids = submit(bulk, 4)
+            other_id, = submit(other)
+
+            position = queue_position(other_id)
+            assert position['lane'] == 'interactive'
+            assert position['position'] == 2
+            assert position['waited'] >= 0
+            assert position['estimated_wait'] is None
+            assert queue_position(bulk_ids[-1])['position'] == 7
+            claim_next('worker')
+            claim_next('worker')
+            assert queue_position(other_id) is None
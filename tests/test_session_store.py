@@ -0,0 +1,65 @@
+"""Unit tests for the saved academi.cx session store."""
+
+import os
+import time
+import pytest
+from app.session_store import CookieStore, to_cdp_cookie
+
+
+@pytest.mark.unit
+class TestCookieStore:
+    """Test saving and loading the cookie jar."""
+
+    def test_round_trip(self, tmp_path):
+        """Test saved cookies are loaded back."""
+        store = CookieStore(str(tmp_path / 'session.json'))
+        cookies = [{'name': 'sessionid', 'value': 'abc', 'domain': 'academi.cx',
+                    'expiry': int(time.time()) + 3600}]
+
+        store.save(cookies)
+
+        assert store.load() == cookies
+        assert os.stat(store.path).st_mode & 0o777 == 0o600
+
+    def test_missing_store(self, tmp_path):
+        """Test a missing file means there is no session."""
+        store = CookieStore(str(tmp_path / 'missing.json'))
+        assert store.load() is None
+
+    def test_expired_cookie_invalidates_session(self, tmp_path):
+        """Test an expired cookie forces a real login."""
+        store = CookieStore(str(tmp_path / 'session.json'))
+        store.save([{'name': 'sessionid', 'value': 'abc', 'expiry': int(time.time()) - 1}])
+
+        assert store.load() is None
+
+    def test_max_age(self, tmp_path):
+        """Test sessions older than max_age are not reused."""
+        store = CookieStore(str(tmp_path / 'session.json'), max_age=0)
+        store.save([{'name': 'sessionid', 'value': 'abc'}])
+        time.sleep(0.01)
+
+        assert store.load() is None
+
+    def test_clear(self, tmp_path):
+        """Test clearing removes the stored session."""
+        store = CookieStore(str(tmp_path / 'session.json'))
+        store.save([{'name': 'sessionid', 'value': 'abc'}])
+
+        store.clear()
+        store.clear()
+
+        assert store.load() is None
+
+    def test_cdp_conversion(self):
+        """Test Selenium cookies are converted to CDP cookie params."""
+        cookie = {'name': 'sessionid', 'value': 'abc', 'domain': '.academi.cx',
+                  'path': '/', 'secure': True, 'httpOnly': True,
+                  'expiry': 1700000000, 'sameSite': 'Lax'}
+
+        param = to_cdp_cookie(cookie)
+
+        assert param['expires'] == 1700000000
+        assert 'expiry' not in param
+        assert param['sameSite'] == 'Lax'
+        assert param['domain'] == '.academi.cx'
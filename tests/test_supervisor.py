@@ -0,0 +1,110 @@
+"""Unit tests for the supervised job process pool."""
+
+import time
+import pytest
+from app import supervisor
+
+
+class FakeProcessHandle:
+    """Stand-in for a multiprocessing.Process."""
+
+    pid = 4242
+    exitcode = None
+
+    def __init__(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+
+class FakeJobProcess(supervisor.JobProcess):
+    """Job process that never spawns; tests decide how its job ends."""
+
+    instances = []
+
+    def __init__(self):
+        self.process = FakeProcessHandle()
+        self.job = None
+        self.started = None
+        self.outcome = None
+        self.killed = False
+        FakeJobProcess.instances.append(self)
+
+    def start_job(self, job_id, document_id):
+        self.job = (job_id, document_id)
+        self.started = time.monotonic()
+
+    def result(self):
+        if self.busy and self.outcome is not None:
+            result, self.job, self.outcome = self.outcome, None, None
+            return result
+        return None
+
+    def kill(self):
+        self.killed = True
+        self.process.alive = False
+
+    def stop(self, timeout=10):
+        self.kill()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeJobProcess.instances = []
+    monkeypatch.setattr(supervisor, 'JobProcess', FakeJobProcess)
+    return supervisor.JobProcessPool(2, job_timeout=60)
+
+
+@pytest.mark.unit
+class TestJobProcessPool:
+    """Test finished, hung and crashed jobs are reported and their processes replaced."""
+
+    def test_finished_job_frees_process(self, pool):
+        """Test a finished job is reported and its process reused."""
+        pool.submit(1, 10)
+        assert pool.idle == 1
+        FakeJobProcess.instances[0].outcome = (1, True, None)
+
+        assert pool.poll() == [(1, 10, True, None)]
+        assert pool.idle == 2
+        assert len(FakeJobProcess.instances) == 2
+
+    def test_hung_job_is_killed_and_replaced(self, pool):
+        """Test a job past the timeout fails and its process is replaced."""
+        pool.submit(1, 10)
+        hung = FakeJobProcess.instances[0]
+        hung.started -= 61
+
+        outcomes = pool.poll()
+
+        assert outcomes == [(1, 10, False, 'Job timed out after 60 seconds')]
+        assert hung.killed is True
+        assert len(FakeJobProcess.instances) == 3
+        assert pool.idle == 2
+
+    def test_crashed_process_is_replaced(self, pool):
+        """Test a job process that died fails its job and is replaced."""
+        pool.submit(1, 10)
+        FakeJobProcess.instances[0].process.alive = False
+
+        assert pool.poll() == [(1, 10, False, 'Job process died')]
+        assert pool.idle == 2
+
+    def test_resize(self, pool):
+        """Test growing starts processes and shrinking stops busy ones only after their job."""
+        pool.resize(3)
+        assert pool.idle == 3
+        pool.submit(1, 10)
+        pool.submit(2, 20)
+
+        pool.resize(1)
+        assert len(FakeJobProcess.instances) == 3
+        assert FakeJobProcess.instances[2].killed
+        assert pool.idle == 0
+
+        FakeJobProcess.instances[0].outcome = (1, True, None)
+        assert pool.poll() == [(1, 10, True, None)]
+        assert FakeJobProcess.instances[0].killed
+        assert pool.busy == 1
+        assert pool.idle == 0
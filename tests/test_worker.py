@@ -0,0 +1,171 @@
+"""Tests for the background worker."""
+
+import threading
+import pytest
+from app import worker
+
+
+def outside_app_context(func):
+    """Run ``func`` in a fresh thread, which has no app context."""
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault('value', func()))
+    thread.start()
+    thread.join()
+    return result['value']
+
+
+@pytest.mark.unit
+class TestWorkerApp:
+    """Test the per-process worker app."""
+
+    @pytest.fixture(autouse=True)
+    def reset_worker_app(self, monkeypatch, app):
+        monkeypatch.setattr(worker, '_worker_app', None)
+        monkeypatch.setattr(worker, '_worker_pid', None)
+        built = []
+
+        def fake_create_app(**options):
+            built.append(options)
+            return app
+
+        monkeypatch.setattr('app.create_app', fake_create_app)
+        return built
+
+    def test_reuses_current_app(self, app, reset_worker_app):
+        """Test the app of an existing context is used as is."""
+        with app.app_context():
+            assert worker.get_worker_app() is app
+        assert reset_worker_app == []
+
+    def test_built_once_per_process(self, app, reset_worker_app):
+        """Test jobs outside an app context share one app."""
+        first = outside_app_context(worker.get_worker_app)
+        second = outside_app_context(worker.get_worker_app)
+
+        assert first is second
+        # Workers leave seeding the admin account to the web app
+        assert reset_worker_app == [{'seed_admin': False}]
+
+    def test_rebuilt_after_fork(self, app, reset_worker_app, monkeypatch):
+        """Test a forked child builds its own app."""
+        outside_app_context(worker.get_worker_app)
+        monkeypatch.setattr(worker.os, 'getpid', lambda: -1)
+        outside_app_context(worker.get_worker_app)
+
+        assert len(reset_worker_app) == 2
+
+
+@pytest.mark.integration
+class TestWorker:
+    """Test the worker claims jobs up to its concurrency limit."""
+
+    def test_poll_respects_concurrency(self, app, monkeypatch):
+        """Test only as many jobs as there are slots are claimed."""
+        from app.job_queue import enqueue, queue_depth
+        from app.models import db, User, Document, ProcessingJob
+
+        with app.app_context():
+            user = User(username='worker', email='worker@example.com')
+            user.set_password('password')
+            db.session.add(user)
+            db.session.commit()
+            for i in range(3):
+                document = Document(filename=f'{i}.pdf', original_filename=f'{i}.pdf',
+                                    path=f'/tmp/{i}.pdf', user_id=user.id)
+                db.session.add(document)
+                db.session.commit()
+                enqueue(document.id)
+
+        release = threading.Event()
+        processed = []
+
+        def fake_process(document_id):
+            processed.append(document_id)
+            release.wait(5)
+            return True
+
+        monkeypatch.setattr('app.document_processor.process_document_background', fake_process)
+        job_worker = worker.Worker(app, concurrency=2, poll_interval=0.01, worker_id='test')
+
+        assert job_worker.poll_once() == 2
+        assert job_worker.poll_once() == 0
+        release.set()
+        job_worker._executor.shutdown(wait=True)
+
+        with app.app_context():
+            assert queue_depth() == 1
+            assert ProcessingJob.query.filter_by(status='done').count() == 2
+
+    def test_pipelined_worker_only_uploads(self, app, monkeypatch):
+        """Test a pipelined worker finishes jobs after the upload stage."""
+        from app.job_queue import enqueue
+        from app.models import db, User, Document, ProcessingJob
+
+        with app.app_context():
+            user = User(username='pipeline', email='pipeline@example.com')
+            user.set_password('password')
+            db.session.add(user)
+            db.session.commit()
+            document = Document(filename='p.pdf', original_filename='p.pdf',
+                                path='/tmp/p.pdf', user_id=user.id)
+            db.session.add(document)
+            db.session.commit()
+            enqueue(document.id)
+
+        calls = []
+        monkeypatch.setattr('app.document_processor.process_document_background',
+                            lambda document_id, wait=True: calls.append(wait) or True)
+        job_worker = worker.Worker(app, concurrency=1, worker_id='test', pipelined=True)
+
+        assert job_worker.poll_once() == 1
+        job_worker._executor.shutdown(wait=True)
+
+        assert calls == [False]
+        with app.app_context():
+            assert ProcessingJob.query.filter_by(status='done').count() == 1
+
+    def test_lost_lease_cancels_thread_job(self, app, monkeypatch):
+        """Test a thread job sees it lost its lease once a heartbeat finds out."""
+        started = threading.Event()
+        release = threading.Event()
+        seen = []
+
+        def fake_process(document_id, wait=True):
+            started.set()
+            release.wait(5)
+            seen.append(worker.job_cancelled())
+            return False
+
+        monkeypatch.setattr('app.document_processor.process_document_background', fake_process)
+        monkeypatch.setattr(worker, 'renew_leases', lambda worker_id, job_ids, lease_seconds: set(job_ids))
+        monkeypatch.setattr(worker, 'reclaim_expired', lambda: (0, 0))
+        job_worker = worker.Worker(app, concurrency=1, worker_id='test')
+        job_worker._running[7] = threading.Event()
+        job_worker._executor.submit(job_worker._run_and_release, 7, 70)
+
+        assert started.wait(5)
+        assert job_worker.heartbeat() == {7}
+        release.set()
+        job_worker._executor.shutdown(wait=True)
+
+        assert seen == [True]
+        assert not worker.job_cancelled()
+
+    def test_backend_prepared_before_claiming(self, app, monkeypatch):
+        """Test the worker sets up the backend (e.g. resolves chromedriver) before its first claim."""
+        calls = []
+
+        class FakeBackend:
+            @classmethod
+            def prepare(cls):
+                calls.append('prepare')
+
+        monkeypatch.setattr('app.processor_backend.get_processor_class', lambda name=None: FakeBackend)
+        job_worker = worker.Worker(app, concurrency=1, worker_id='test')
+        monkeypatch.setattr(job_worker, 'recover', lambda: calls.append('recover'))
+        monkeypatch.setattr(job_worker, 'poll_once', lambda: calls.append('poll'))
+        monkeypatch.setattr(job_worker, 'heartbeat', lambda: job_worker.stop())
+
+        job_worker.run()
+
+        assert calls == ['prepare', 'recover', 'poll']
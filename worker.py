@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""
+Processing worker - claims queued documents from the database and processes them
+
+Usage: python worker.py
+"""
+
+from app.worker import main
+
+if __name__ == '__main__':
+    main()